@@ -1,5 +1,14 @@
 import argparse
 
+if __name__.find('.')<0:
+    import batchinput
+    import filters
+    import sampleshard
+else:
+    from . import batchinput
+    from . import filters
+    from . import sampleshard
+
 
 class SpacingAction(argparse.Action):
     """
@@ -13,11 +22,7 @@ class SpacingAction(argparse.Action):
         super(SpacingAction, self).__init__(option_strings, dest, **kwargs)
 
     def __call__(self, parser, namespace, values, option_string=None):
-        parts = values.split(",")
-        if len(parts) == 1:
-            values = (int(parts), int(parts))
-        elif len(parts) > 1:
-            values = (int(parts[0]), int(parts[1]))
+        values = batchinput.parse_spacing(values)
 
         setattr(namespace, self.dest, values)
 
@@ -29,6 +34,7 @@ def parser():
     Requirements arguments:
         digits:
         A string each digit characters which sequenced transformed to an image using MNIST images.
+        It might be skipped if a manifest is set using --input.
 
     Optiononal arguments:
         -o | --output:   Default: mnist_numbers_sequence.png
@@ -40,6 +46,12 @@ def parser():
         -w | --image_width:
             A width of a result image.
 
+        --image_height:
+            A height of a result image. Default is a height of a digit multiplied by a count of lines.
+
+        -l | --line_length:
+            A maximum count of digits in one line of an image. Longer sequences wrap into lines.
+
         -s | --spacing:   Default: 0,0
             A range of spacing between digit images separated a comma.
             Format: minimum,maximum
@@ -55,12 +67,73 @@ def parser():
             Supported filters:
                 "blur" - a little bit blurring an image
                 "distort" - make a random horizontal moving each line of an image.
+                "elastic" - a random elastic deformation of an image.
+                "affine" - a random rotation, shear and scale of an image.
+                "noise" - add a gaussian noise to an image.
             Filter applied by order of value.
-            Format: filter1,filter2
+            Parameters of a filter follow a name separated by colon, missed ones get defaults.
+            Format: filter1[:param=value[:param=value]],filter2
             Example:
                 blur
                 distort,blur
-                blur,distort
+                blur:sigma=1.5,distort:alpha=10
+                affine:rotation=15:scale=0.8/1.2
+
+        --list_filters
+            Print supported filters with parameters and exit.
+
+        -i | --input:
+            A manifest to generate many images in one process. Use "-" to read a standard input.
+            Supported formats:
+                CSV with a header, columns: digits,image_width,spacing,evenly,filters,output,image_height,line_length
+                JSONL, one object per line with the same keys
+                one digits sequence per line
+            Empty values of a row are replaced by values of the console arguments.
+            Images without an output name are stored as the output name with a row index, ex. image_000042.png
+
+        --input_format:   Default: auto
+            A format of a manifest: auto, csv, jsonl, lines.
+
+        -b | --batch_size:   Default: 256
+            A count of rows of a manifest processed at once.
+
+        --writers:   Default: count of CPU
+            A count of threads compressing and writing images of a manifest.
+            Images are stored in parallel with generating the next ones.
+
+        --compress_level:   Default: 6
+            A PNG (zlib) compression level from 0 (no compression, fastest) to 9 (smallest files).
+
+        --fsync:   Default: none
+            A policy of flushing images to a storage:
+                none - rely on an operating system;
+                file - flush each file;
+                full - flush each file and a directory entry.
+
+        --seed:
+            A seed of random numbers. The same seed and arguments produce the same images.
+
+        -a | --annotations:   Default: off
+            Store annotations of digits of images of a manifest: one NumPy file per batch
+            next to images, ex. image_annotations_000000.npy. Each record contains a row index,
+            a digit, an index of a source MNIST image, a bounding box x0,x1,y0,y1 and applied filters.
+
+        --balanced:   Default: off
+            Choose source images of a manifest without replacement per digit: each image of a digit
+            is using once per epoch before shuffling the next one.
+
+        --tight:   Default: off
+            Crop digit images to ink columns (a random layout only), so a spacing is between ink of digits
+            and "-s 0" places digits closely. Ink extents of source images are computing once and storing
+            next to MNIST data files.
+
+        --resize_mode:   Default: linear
+            A mode of resizing digits and images:
+                nearest - the nearest pixel, the fastest one;
+                area - an average of covered pixels;
+                linear - a linear interpolation with anti-aliasing;
+                cubic - a bicubic interpolation with anti-aliasing, the best quality and the slowest one.
+            Integer ratios of nearest and area modes are repeating or averaging pixels without resampling.
 
     Returns
     -------
@@ -76,12 +149,251 @@ def parser():
                         help='a directory stored downloaded MNIST data files')
     parser.add_argument('-w', '--image_width', type=str,
                         help='a width of the result image')
+    parser.add_argument('--image_height', type=int,
+                        help='a height of the result image')
+    parser.add_argument('-l', '--line_length', type=int,
+                        help='a maximum count of digits in one line of the result image')
+    parser.add_argument('-s', '--spacing', metavar='min,max', type=str, action=SpacingAction,
+                        help='a spacing range min,max. Default: 0,0')
+    parser.add_argument('-e', '--evenly', action='store_true',
+                        help='an evenly placed of spacing against a default randomly choosen in the spacing range.')
+    parser.add_argument('-f', '--filters', metavar='filter1,filter2', type=str,
+                        help='additional filters applyed on digit images, ex. "blur:sigma=1.5,distort". See --list_filters')
+    parser.add_argument('--list_filters', action='store_true',
+                        help='print supported filters with parameters and exit')
+    parser.add_argument('-i', '--input', metavar='manifest', type=str,
+                        help='a manifest (CSV, JSONL or one sequence per line) to generate many images. Use "-" for stdin')
+    parser.add_argument('--input_format', choices=['auto', 'csv', 'jsonl', 'lines'], default='auto',
+                        help='a format of a manifest. Default: auto')
+    parser.add_argument('-b', '--batch_size', type=int, default=256,
+                        help='a count of rows of a manifest processed at once. Default: 256')
+    parser.add_argument('--writers', type=int,
+                        help='a count of threads storing images. Default: count of CPU')
+    parser.add_argument('--compress_level', type=int, choices=range(10), default=6, metavar='0-9',
+                        help='a PNG compression level. Default: 6')
+    parser.add_argument('--fsync', choices=['none', 'file', 'full'], default='none',
+                        help='a policy of flushing images to a storage. Default: none')
+    parser.add_argument('--seed', type=int,
+                        help='a seed of random numbers to reproduce images')
+    parser.add_argument('-a', '--annotations', action='store_true',
+                        help='store annotations of digits of a manifest images next to images')
+    parser.add_argument('--balanced', action='store_true',
+                        help='choose source images of a manifest without replacement per digit')
+    parser.add_argument('--tight', action='store_true',
+                        help='crop digit images to ink columns, so a spacing is between ink of digits')
+    parser.add_argument('--resize_mode', choices=filters.RESIZE_MODES, default=filters.RESIZE_DEFAULT_MODE,
+                        help='a mode of resizing: nearest, area, linear, cubic. Default: linear')
+    parser.add_argument('digits', nargs='?', help='a numbers sequence')
+
+    return parser
+
+
+def bulk_parser():
+    """
+    Create a parser of console arguments of a bulk dataset tool.
+
+    Requirements arguments:
+        target_directory:
+        A directory of a dataset. A checkpoint of a stopped job of the directory is using to continue it.
+
+        -n | --count:
+        A count of samples of a dataset. It is not required by --merge.
+
+    Optiononal arguments:
+        --length:   Default: 1,10
+            A range min,max of a count of digits of a sample.
+
+        --shard_size:   Default: 1024
+            A count of samples of one shard.
+
+        --checkpoint_every:   Default: 1
+            A count of shards between storing a checkpoint.
+
+        --max_shards:
+            A maximum count of shards generated by a run.
+
+        --rank:   Default: $RANK, $SLURM_PROCID or 0
+            An index of a node of a multi-node job.
+
+        --world_size:   Default: $WORLD_SIZE, $SLURM_NTASKS or 1
+            A count of nodes of a multi-node job. Nodes share a directory of a dataset and a seed.
+
+        --merge:
+            Merge manifests of completed nodes of a multi-node job to the manifest of a dataset and exit.
+
+        --append:
+            Append --count samples to a completed dataset with the same parameters and seed,
+            other options of a dataset are ignoring. The manifest is replacing when new shards are completed.
+
+        --shard_format:   Default: npy
+            A format of images of shards:
+                npy - a NumPy file;
+                zlib, lzma - a sample shard compressing each image by zlib or lzma;
+                packed - a sample shard of deltas of rows packed to a bitmap, the fastest decoding one.
+            A sample shard has an offset table, so any image is reading without decompressing others.
+
+        --writers:   Default: count of CPU
+            A count of threads compressing images of sample shards.
+
+        -d, -w, --image_height, -l, -s, -e, -f, --balanced, --resize_mode, --seed, --fsync:
+            The same options as a generator tool has, see parser.
+
+    Returns
+    -------
+    An object of ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(
+        description='Generate a dataset of random numbers sequences by shards')
+    parser.add_argument('target_directory', help='a directory of a dataset')
+    parser.add_argument('-n', '--count', type=int,
+                        help='a count of samples of a dataset')
+    parser.add_argument('--length', metavar='min,max', type=str, action=SpacingAction, default=(1, 10),
+                        help='a range of a count of digits of a sample. Default: 1,10')
+    parser.add_argument('--shard_size', type=int, default=1024,
+                        help='a count of samples of one shard. Default: 1024')
+    parser.add_argument('--checkpoint_every', type=int, default=1,
+                        help='a count of shards between storing a checkpoint. Default: 1')
+    parser.add_argument('--max_shards', type=int,
+                        help='a maximum count of shards generated by a run')
+    parser.add_argument('--rank', type=int,
+                        help='an index of a node of a multi-node job. Default: $RANK, $SLURM_PROCID or 0')
+    parser.add_argument('--world_size', type=int,
+                        help='a count of nodes of a multi-node job. Default: $WORLD_SIZE, $SLURM_NTASKS or 1')
+    parser.add_argument('--merge', action='store_true',
+                        help='merge manifests of completed nodes to the manifest of a dataset and exit')
+    parser.add_argument('--append', action='store_true',
+                        help='append --count samples to a completed dataset')
+    parser.add_argument('--shard_format', choices=['npy'] + sampleshard.SAMPLE_SHARD_CODECS, default='npy',
+                        help='a format of images of shards: npy, zlib, lzma, packed. Default: npy')
+    parser.add_argument('--writers', type=int,
+                        help='a count of threads compressing images of shards. Default: count of CPU')
+    parser.add_argument('-d', '--data_directory', type=str,
+                        help='a directory stored downloaded MNIST data files')
+    parser.add_argument('-w', '--image_width', type=int,
+                        help='a width of images')
+    parser.add_argument('--image_height', type=int,
+                        help='a height of images')
+    parser.add_argument('-l', '--line_length', type=int,
+                        help='a maximum count of digits in one line of an image')
     parser.add_argument('-s', '--spacing', metavar='min,max', type=str, action=SpacingAction,
                         help='a spacing range min,max. Default: 0,0')
     parser.add_argument('-e', '--evenly', action='store_true',
                         help='an evenly placed of spacing against a default randomly choosen in the spacing range.')
     parser.add_argument('-f', '--filters', metavar='filter1,filter2', type=str,
-                        help='additional filters applyed on digit images. Supported filters: "blur" and "distort" ')
-    parser.add_argument('digits', help='a numbers sequence')
+                        help='additional filters applyed on digit images, ex. "blur:sigma=1.5,distort"')
+    parser.add_argument('--balanced', action='store_true',
+                        help='choose source images without replacement per digit')
+    parser.add_argument('--resize_mode', choices=filters.RESIZE_MODES, default=filters.RESIZE_DEFAULT_MODE,
+                        help='a mode of resizing: nearest, area, linear, cubic. Default: linear')
+    parser.add_argument('--seed', type=int,
+                        help='a seed of random numbers of a dataset')
+    parser.add_argument('--fsync', choices=['none', 'file', 'full'], default='none',
+                        help='a policy of flushing files to a storage. Default: none')
+
+    return parser
+
+
+def stream_parser():
+    """
+    Create a parser of console arguments of a tool generating an image of a very long sequence by tiles.
+
+    Requirements arguments:
+        digits:
+        A numbers sequence. Use "@file" to read digits from a file.
+
+    Optiononal arguments:
+        -o | --output:   Default: mnist_numbers_sequence.png
+            A name of a result PNG or .npy (float32 array) file.
+
+        --memory_budget:   Default: 64
+            A maximum size of working arrays in megabytes.
+
+        --resize_mode:   Default: linear
+            A mode of resizing digits and an image: nearest, area or linear, see parser.
+            A cubic mode is not supported by tiles.
+
+        -d, -w, --image_height, -s, -e, -f, --seed, --compress_level, --fsync:
+            The same options as a generator tool has, see parser.
+
+    Returns
+    -------
+    An object of ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(
+        description='Generate an image of a very long numbers sequence by tiles under a memory budget')
+    parser.add_argument('-o', '--output', metavar='image_name.png', default='mnist_numbers_sequence.png',
+                        help='a name of a result PNG or .npy file. Default: mnist_numbers_sequence.png')
+    parser.add_argument('--memory_budget', metavar='MB', type=int, default=64,
+                        help='a maximum size of working arrays in megabytes. Default: 64')
+    parser.add_argument('-d', '--data_directory', type=str,
+                        help='a directory stored downloaded MNIST data files')
+    parser.add_argument('-w', '--image_width', type=int,
+                        help='a width of the result image')
+    parser.add_argument('--image_height', type=int,
+                        help='a height of the result image')
+    parser.add_argument('-s', '--spacing', metavar='min,max', type=str, action=SpacingAction,
+                        help='a spacing range min,max. Default: 0,0')
+    parser.add_argument('-e', '--evenly', action='store_true',
+                        help='an evenly placed of spacing against a default randomly choosen in the spacing range.')
+    parser.add_argument('-f', '--filters', metavar='filter1,filter2', type=str,
+                        help='additional filters applyed on digit images, ex. "blur:sigma=1.5,distort"')
+    parser.add_argument('--seed', type=int,
+                        help='a seed of random numbers to reproduce an image')
+    parser.add_argument('--compress_level', type=int, choices=range(10), default=6, metavar='0-9',
+                        help='a PNG compression level. Default: 6')
+    parser.add_argument('--fsync', choices=['none', 'file', 'full'], default='none',
+                        help='a policy of flushing an image to a storage. Default: none')
+    parser.add_argument('--resize_mode', choices=filters.RESIZE_WINDOW_MODES, default=filters.RESIZE_DEFAULT_MODE,
+                        help='a mode of resizing: nearest, area, linear. Default: linear')
+    parser.add_argument('digits', help='a numbers sequence or @file')
+
+    return parser
+
+
+def test_data_parser():
+    """
+    Create a parser of console arguments of a tool generating test datafiles MNIST comparable.
+
+    Requirements arguments:
+        target_directory:
+        A target directory to store testing datafiles.
+
+    Optiononal arguments:
+        -n | --count:   Default: 20
+            A count of records.
+
+        --width, --height:   Default: 28
+            A size of one image.
+
+        --label_distribution:
+            Weights of digits from 0 to 9 separated comma, ex. 1,1,1,1,1,1,1,1,1,2.
+            Labels are cycling digits if it is not set.
+
+        --random_content:   Default: off
+            Fill images by random strokes instead of a digit value in the first element.
+
+        --seed:
+            A seed of random labels and content.
+
+    Returns
+    -------
+    An object of ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(
+        description='Generate test datafiles MNIST comparable')
+    parser.add_argument('target_directory', help='a target directory to store testing datafiles')
+    parser.add_argument('-n', '--count', type=int, default=20,
+                        help='a count of records. Default: 20')
+    parser.add_argument('--width', type=int, default=28,
+                        help='a width of one image. Default: 28')
+    parser.add_argument('--height', type=int, default=28,
+                        help='a height of one image. Default: 28')
+    parser.add_argument('--label_distribution', metavar='w0,...,w9',
+                        type=lambda value: [float(part) for part in value.split(",")],
+                        help='weights of digits from 0 to 9 separated comma')
+    parser.add_argument('--random_content', action='store_true',
+                        help='fill images by random strokes')
+    parser.add_argument('--seed', type=int,
+                        help='a seed of random labels and content')
 
     return parser
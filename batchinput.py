@@ -0,0 +1,232 @@
+import csv
+import io
+import json
+import os
+import sys
+
+BATCH_INPUT_FORMATS = ['auto', 'csv', 'jsonl', 'lines']
+
+BATCH_INPUT_FIELDS = ['digits', 'image_width', 'spacing', 'evenly', 'filters', 'output',
+                      'image_height', 'line_length']
+
+
+def parse_spacing(value):
+    """
+    Converting a spacing value of a manifest row to a tuple of the minimum and maximum width of spacing.
+
+    Parameters
+    ----------
+    value: str, int or list-like
+        A value like "3", "2,100", 3 or [2, 100]. Empty values mean a default spacing.
+
+    Returns
+    -------
+    A (minimum, maximum) pair (tuple) or None if the value is empty.
+    """
+    if value is None or value == '':
+        return None
+
+    if isinstance(value, str):
+        value = [int(part) for part in value.split(",") if part.strip()]
+    elif isinstance(value, int):
+        value = [value]
+
+    value = list(value)
+    if len(value) == 1:
+        return (int(value[0]), int(value[0]))
+
+    return (int(value[0]), int(value[1]))
+
+
+def parse_flag(value):
+    """
+    Converting a flag value of a manifest row to a boolean.
+
+    Parameters
+    ----------
+    value: str, bool or None
+        A value like "1", "true", "yes", "on" or a boolean.
+
+    Returns
+    -------
+    A boolean value of a flag or None if the value is empty.
+    """
+    if isinstance(value, bool):
+        return value
+
+    if value is None or str(value).strip() == '':
+        return None
+
+    return str(value).strip().lower() in ['1', 'true', 'yes', 'on', 'y']
+
+
+def parse_int(value):
+    """
+    Converting an optional int value of a manifest row.
+
+    Parameters
+    ----------
+    value: str, int or None
+        A value of a field.
+
+    Returns
+    -------
+    An int value or None if the value is empty.
+    """
+    if value is None or str(value).strip() == '':
+        return None
+
+    return int(value)
+
+
+def parse_row(values, line_number=0):
+    """
+    Normalizing a row of a manifest into a dictionary of generation parameters.
+    Empty values are replaced by None to use a default parameter of a generator.
+
+    Parameters
+    ----------
+    values: dict
+        A raw row of a manifest. A row has to contain the "digits" field.
+
+    line_number: int    Default: 0
+        A number of a line of the manifest which helps to describe an error.
+
+    Returns
+    -------
+    A dictionary with keys: digits, image_width, spacing, evenly, filters, output, image_height, line_length.
+
+    Raises
+    ------
+    An exception describing an invalid row.
+    """
+    unknown = [key for key in values if key not in BATCH_INPUT_FIELDS]
+    if unknown:
+        raise Exception("line {}: unknown fields {}".format(line_number, unknown))
+
+    digits = values.get('digits')
+    digits = '' if digits is None else str(digits).strip()
+    if not digits or not digits.isdigit():
+        raise Exception("line {}: digits '{}' has to be a not empty string of digits".format(
+            line_number, digits))
+
+    return {
+        'digits': [int(digit) for digit in digits],
+        'image_width': parse_int(values.get('image_width')),
+        'spacing': parse_spacing(values.get('spacing')),
+        'evenly': parse_flag(values.get('evenly')),
+        'filters': str(values.get('filters') or '').strip() or None,
+        'output': str(values.get('output') or '').strip() or None,
+        'image_height': parse_int(values.get('image_height')),
+        'line_length': parse_int(values.get('line_length')),
+    }
+
+
+def detect_format(lines, file_name=None):
+    """
+    Detecting a format of a manifest using an extension of a file or the first not empty line.
+
+    Parameters
+    ----------
+    lines: list of str
+        Lines of a manifest.
+
+    file_name: str      Default: None
+        A name of a manifest file.
+
+    Returns
+    -------
+    One of the formats: "csv", "jsonl" or "lines".
+    """
+    if file_name:
+        ext = os.path.splitext(file_name)[1].lower()
+        if ext == '.csv':
+            return 'csv'
+        if ext in ['.jsonl', '.json', '.ndjson']:
+            return 'jsonl'
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            return 'jsonl'
+        if line.split(',')[0].strip().lower() == 'digits':
+            return 'csv'
+        break
+
+    return 'lines'
+
+
+def parse_rows(lines, fmt='auto', file_name=None):
+    """
+    Parsing lines of a manifest into rows of generation parameters.
+
+    Supported formats:
+        csv - a header is required and has to contain the "digits" column;
+        jsonl - one JSON object per line;
+        lines - one digits sequence per line.
+
+    Parameters
+    ----------
+    lines: list of str
+        Lines of a manifest.
+
+    fmt: str     Default: auto
+        A format of a manifest. One of "auto", "csv", "jsonl", "lines".
+
+    file_name: str      Default: None
+        A name of a manifest file using to detect a format.
+
+    Returns
+    -------
+    A list of dictionaries containing generation parameters, see parse_row.
+    """
+    if fmt not in BATCH_INPUT_FORMATS:
+        raise Exception("unknown manifest format '{}', supported are {}".format(fmt, BATCH_INPUT_FORMATS))
+
+    if fmt == 'auto':
+        fmt = detect_format(lines, file_name=file_name)
+
+    rows = []
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO("".join(lines)))
+        for line_number, values in enumerate(reader, 2):
+            rows.append(parse_row(values, line_number))
+    else:
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            if fmt == 'jsonl':
+                values = json.loads(line)
+            else:
+                values = {'digits': line}
+
+            rows.append(parse_row(values, line_number))
+
+    return rows
+
+
+def read_rows(source, fmt='auto'):
+    """
+    Reading a manifest from a file or a standard input.
+
+    Parameters
+    ----------
+    source: str
+        A path of a manifest file. Use "-" to read a standard input.
+
+    fmt: str     Default: auto
+        A format of a manifest. One of "auto", "csv", "jsonl", "lines".
+
+    Returns
+    -------
+    A list of dictionaries containing generation parameters, see parse_row.
+    """
+    if source == '-':
+        return parse_rows(sys.stdin.readlines(), fmt=fmt)
+
+    with open(source, 'r', newline='') as f:
+        return parse_rows(f.readlines(), fmt=fmt, file_name=source)
@@ -0,0 +1,75 @@
+import unittest
+
+if __name__.find('.')<0:
+    import batchinput
+else:
+    from . import batchinput
+
+
+class TestParseRows(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_parse_spacing(self):
+        test_cases = [
+            ("3", (3, 3)),
+            ("2,100", (2, 100)),
+            ([2, 100], (2, 100)),
+            (5, (5, 5)),
+            ("", None),
+            (None, None),
+        ]
+
+        for test, expected in test_cases:
+            self.assertEqual(batchinput.parse_spacing(test), expected)
+
+    def test_formats(self):
+        expected = [
+            {'digits': [1, 2, 3], 'image_width': None, 'spacing': None,
+                'evenly': None, 'filters': None, 'output': None,
+                'image_height': None, 'line_length': None},
+            {'digits': [4, 5], 'image_width': 100, 'spacing': (2, 5),
+                'evenly': True, 'filters': 'blur', 'output': 'b.png',
+                'image_height': 56, 'line_length': None},
+        ]
+
+        test_cases = [
+            ([
+                "digits,image_width,spacing,evenly,filters,output,image_height\n",
+                "123,,,,,,\n",
+                '45,100,"2,5",1,blur,b.png,56\n',
+            ], 'csv'),
+            ([
+                '{"digits": "123"}\n',
+                '\n',
+                '{"digits": "45", "image_width": 100, "spacing": [2, 5], "evenly": true, "filters": "blur", "output": "b.png", "image_height": 56}\n',
+            ], 'jsonl'),
+        ]
+
+        for lines, fmt in test_cases:
+            self.assertEqual(batchinput.detect_format(lines), fmt)
+            self.assertEqual(batchinput.parse_rows(lines), expected)
+
+        rows = batchinput.parse_rows(["123\n", "\n", "45\n"])
+        self.assertEqual([row['digits'] for row in rows], [[1, 2, 3], [4, 5]])
+        # digits of a JSONL row might be a number
+        rows = batchinput.parse_rows(['{"digits": 0}\n', '{"digits": 12}\n'])
+        self.assertEqual([row['digits'] for row in rows], [[0], [1, 2]])
+
+    def test_invalid_rows(self):
+        test_cases = [
+            (["12a\n"], 'lines'),
+            (['{"digits": "12", "width": 10}\n'], 'jsonl'),
+            (["digits\n", "x1\n"], 'csv'),
+        ]
+
+        for lines, fmt in test_cases:
+            with self.assertRaises(Exception):
+                batchinput.parse_rows(lines, fmt=fmt)
+
+
+if __name__ == '__main__':
+    unittest.main()
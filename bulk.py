@@ -0,0 +1,950 @@
+import concurrent.futures
+import json
+import os
+import numpy as np
+
+if __name__.find('.')<0:
+    import argsparser
+    import datasetstats
+    import filters
+    import generator
+    import helper
+    import mnistdata
+    import sampleshard
+    import writer
+else:
+    from . import argsparser
+    from . import datasetstats
+    from . import filters
+    from . import generator
+    from . import helper
+    from . import mnistdata
+    from . import sampleshard
+    from . import writer
+
+BULK_SHARD_SIZE = 1024
+BULK_CHECKPOINT_FILE = "checkpoint.json"
+BULK_MANIFEST_FILE = "manifest.json"
+# the first word of spawn keys of shards separates them from other streams of the same seed
+BULK_SHARD_KEY = 1
+# environment variables of a rank of a node and a count of nodes of a multi-node job, the first set one is using
+BULK_RANK_ENV = ['RANK', 'SLURM_PROCID']
+BULK_WORLD_SIZE_ENV = ['WORLD_SIZE', 'SLURM_NTASKS']
+# formats of images of shards: a NumPy file or a sample shard compressed by a codec, see sampleshard
+BULK_SHARD_FORMATS = ['npy'] + sampleshard.SAMPLE_SHARD_CODECS
+BULK_DEFAULT_SHARD_FORMAT = 'npy'
+
+
+def bulk_params(images, count, length=(1, 10), spacing_range=None, image_width=None, image_height=None,
+                line_length=None, evenly=False, filters_str=None, balanced=False, shard_size=BULK_SHARD_SIZE,
+                resize_mode=filters.RESIZE_DEFAULT_MODE, shard_format=BULK_DEFAULT_SHARD_FORMAT):
+    """
+    Checking parameters of a bulk job and replacing empty ones by default values.
+    All of images of a job have the same width and height, so default values are based on the longest sequence.
+
+    Parameters
+    ----------
+    images: object
+        An MNIST image db.
+
+    count: int
+        A count of samples of a dataset.
+
+    length: tuple   Default: (1, 10)
+        A (minimum, maximum) pair of a count of digits of a sample.
+
+    spacing_range, image_width, image_height, line_length, evenly:
+        The same parameters as generator.generate_numbers_sequence has.
+
+    filters_str: str   Default: None
+        A string of filters, see filters.parse_filters.
+
+    balanced: boolean   Default: False
+        A flag to choose source images without replacement per digit, see mnistdata.EpochSampler.
+
+    shard_size: int   Default: BULK_SHARD_SIZE
+        A count of samples of one shard.
+
+    resize_mode: str   Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing, see generator.generate_numbers_sequence.
+
+    shard_format: str   Default: BULK_DEFAULT_SHARD_FORMAT
+        A format of images of shards, one of BULK_SHARD_FORMATS: a NumPy file or a sample shard
+        compressing each image independently by a codec, see sampleshard.
+
+    Returns
+    -------
+    A JSON serializable dictionary of parameters.
+
+    Raises
+    ------
+    An exception describing invalid parameters.
+    """
+    count, shard_size = int(count), int(shard_size)
+    if count <= 0 or shard_size <= 0:
+        raise Exception("count {} and shard size {} have to be positive numbers".format(count, shard_size))
+
+    minimum, maximum = int(length[0]), int(length[1])
+    if minimum <= 0 or minimum > maximum:
+        raise Exception("length {} has to be an ordered range of positive numbers".format(length))
+
+    line_length = min(int(line_length or maximum), maximum)
+    spacing_range, image_width = generator.default_parameters(images.digit_width(), line_length,
+                                                              spacing_range, image_width)
+    generator.check_parameters(line_length, spacing_range, image_width)
+    if not image_height:
+        image_height = images.digit_height() * -(-maximum // line_length)
+
+    # check a filters string before generating
+    filters.parse_filters(filters_str)
+    if resize_mode not in filters.RESIZE_MODES:
+        raise Exception("unknown resize mode '{}', supported are {}".format(resize_mode, filters.RESIZE_MODES))
+    if shard_format not in BULK_SHARD_FORMATS:
+        raise Exception("unknown shard format '{}', supported are {}".format(shard_format, BULK_SHARD_FORMATS))
+
+    params = {
+        'count': count,
+        'shard_size': shard_size,
+        'length': [minimum, maximum],
+        'spacing': [int(spacing_range[0]), int(spacing_range[1])],
+        'image_width': int(image_width),
+        'image_height': int(image_height),
+        'line_length': line_length,
+        'evenly': bool(evenly),
+        'filters': filters_str or None,
+        'balanced': bool(balanced),
+    }
+    # parameters of a job with a default resizing are the same as before adding it, so checkpoints are resuming
+    if resize_mode != filters.RESIZE_DEFAULT_MODE:
+        params['resize_mode'] = resize_mode
+    if shard_format != BULK_DEFAULT_SHARD_FORMAT:
+        params['shard_format'] = shard_format
+
+    return params
+
+
+def bulk_segments(params):
+    """
+    Getting counts of samples of segments of a dataset: the first generated part and appended ones
+    (see append_bulk). Each segment starts a new shard.
+    """
+    return params.get('segments') or [params['count']]
+
+
+def append_params(params, count):
+    """
+    Getting parameters of a dataset extended by a segment of count samples.
+    """
+    count = int(count)
+    if count <= 0:
+        raise Exception("count {} has to be a positive number".format(count))
+
+    segments = bulk_segments(params) + [count]
+
+    return dict(params, count=sum(segments), segments=segments)
+
+
+def shard_count(params):
+    """
+    Returns
+    -------
+    A count of shards of a bulk job.
+    """
+    return sum(-(-segment // params['shard_size']) for segment in bulk_segments(params))
+
+
+def shard_range(params, shard):
+    """
+    Getting samples of a shard.
+
+    Parameters
+    ----------
+    params: dict
+        Parameters of a job, see bulk_params.
+
+    shard: int
+        An index of a shard.
+
+    Returns
+    -------
+    A tuple of an index of the first sample and a count of samples of a shard.
+    """
+    size = params['shard_size']
+    first = 0
+    for segment in bulk_segments(params):
+        shards = -(-segment // size)
+        if shard < shards:
+            return first + shard * size, min(size, segment - shard * size)
+
+        shard -= shards
+        first += segment
+
+    raise Exception("shard {} is out of a dataset".format(shard))
+
+
+def shard_rng(entropy, shard, stream):
+    """
+    Creating a source of random numbers of a shard.
+    It is a pure function of a seed and a shard, so any shard might be generated again
+    in any order and in any process with the same result.
+
+    Parameters
+    ----------
+    entropy: int
+        A seed of a job, see helper.seed_entropy.
+
+    shard: int
+        An index of a shard.
+
+    stream: int
+        An index of a stream of a shard: 0 - digits of samples, 1 - generating images.
+
+    Returns
+    -------
+    An object of numpy.random.Generator.
+    """
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(BULK_SHARD_KEY, shard, stream)))
+
+
+def shard_digits(entropy, params, shard):
+    """
+    Getting digits sequences of samples of a shard.
+
+    Parameters
+    ----------
+    entropy: int
+        A seed of a job.
+
+    params: dict
+        Parameters of a job, see bulk_params.
+
+    shard: int
+        An index of a shard.
+
+    Returns
+    -------
+    A list of int arrays of digits.
+    """
+    _, count = shard_range(params, shard)
+    rng = shard_rng(entropy, shard, 0)
+
+    lengths = rng.integers(params['length'][0], params['length'][1], size=count, endpoint=True)
+    digits = rng.integers(10, size=int(lengths.sum()))
+
+    return np.split(digits, np.cumsum(lengths)[:-1])
+
+
+def rank_shards(params, rank=0, world_size=1):
+    """
+    Getting shards of a node of a multi-node job: shards are dealing to nodes in turn,
+    so nodes generate disjoint parts of a dataset of the same size.
+
+    Parameters
+    ----------
+    params: dict
+        Parameters of a job, see bulk_params.
+
+    rank: int   Default: 0
+        An index of a node from 0 to world_size - 1.
+
+    world_size: int   Default: 1
+        A count of nodes of a job.
+
+    Returns
+    -------
+    A range of indexes of shards.
+    """
+    return range(rank, shard_count(params), world_size)
+
+
+def env_rank(names, default):
+    """
+    Getting a rank or a world size of a node from the first set environment variable.
+
+    Parameters
+    ----------
+    names: list of str
+        Names of environment variables, ex. BULK_RANK_ENV.
+
+    default: int
+        A value if none of variables is set.
+
+    Returns
+    -------
+    An int value.
+    """
+    for name in names:
+        if os.environ.get(name):
+            return int(os.environ[name])
+
+    return default
+
+
+def node_file_name(file_name, rank, world_size):
+    """
+    Getting a name of a file of a node: a file of a single-node job has no index of a node.
+    """
+    if world_size == 1:
+        return file_name
+
+    return helper.indexed_file_name(file_name, rank)
+
+
+def generate_shard(entropy, params, shard, images, sampler=None):
+    """
+    Generating samples of a shard.
+
+    Parameters
+    ----------
+    entropy: int
+        A seed of a job.
+
+    params: dict
+        Parameters of a job, see bulk_params.
+
+    shard: int
+        An index of a shard.
+
+    images: object
+        An MNIST image db.
+
+    sampler: mnistdata.EpochSampler   Default: None
+        A sampler of source images without replacement.
+
+    Returns
+    -------
+    A tuple of an uint8 array of images with a shape (count, image_height, image_width),
+    an array of labels (strings of digits) and an array of generator.ANNOTATION_DTYPE of all digits of a shard,
+    the "sample" field is an index of a sample in a dataset.
+    """
+    first, _ = shard_range(params, shard)
+    digits_seqs = shard_digits(entropy, params, shard)
+
+    imgs, annotations = generator.generate_numbers_sequences(digits_seqs, tuple(params['spacing']),
+                                                             params['image_width'],
+                                                             images=images,
+                                                             evenly=params['evenly'],
+                                                             fltrs=filters.parse_filters(params['filters']),
+                                                             seed=shard_rng(entropy, shard, 1),
+                                                             image_height=params['image_height'],
+                                                             line_length=params['line_length'],
+                                                             return_annotations=True,
+                                                             sampler=sampler,
+                                                             resize_mode=params.get('resize_mode',
+                                                                                    filters.RESIZE_DEFAULT_MODE))
+
+    labels = np.array(["".join(str(digit) for digit in digits) for digits in digits_seqs],
+                      dtype="U{}".format(params['length'][1]))
+    annotations = np.concatenate(annotations)
+    annotations['sample'] += first
+
+    return writer.to_uint8(np.stack(imgs)), labels, annotations
+
+
+def generate_shards(entropy, params, images, shards, balanced=False):
+    """
+    Generating samples of shards one by one.
+    A sampler of a balanced dataset seeks to the beginning of each shard by counts of digits of previous shards,
+    so a shard is the same as generating all of shards of a dataset.
+
+    Parameters
+    ----------
+    entropy: int
+        A seed of a job.
+
+    params: dict
+        Parameters of a job, see bulk_params.
+
+    images: object
+        An MNIST image db.
+
+    shards: list of ints
+        Indexes of shards in an increasing order.
+
+    balanced: boolean   Default: False
+        Choose source images without replacement per digit, see mnistdata.EpochSampler.
+
+    Returns
+    -------
+    A generator of tuples of an index of a shard and a result of generate_shard.
+    """
+    shards = set(shards)
+    sampler = None
+    # counts of digits of previous shards to seek a sampler
+    counts = np.zeros(10, dtype=np.int64)
+    if balanced:
+        sampler = mnistdata.EpochSampler(images.labels, seed=entropy)
+
+    for shard in range(shard_count(params)):
+        if not shards:
+            return
+        # digits of every shard are counting to seek a sampler, it is cheap against generating images
+        if sampler:
+            sampler.seek(counts)
+            counts += np.bincount(np.concatenate(shard_digits(entropy, params, shard)), minlength=10)
+
+        if shard not in shards:
+            continue
+
+        shards.remove(shard)
+        yield (shard,) + generate_shard(entropy, params, shard, images, sampler=sampler)
+
+
+def write_shard(target_dir, params, shard, imgs, labels, annotations, fsync='none', executor=None):
+    """
+    Storing a shard as NumPy files: images, labels and annotations, and statistics of a shard as a JSON file
+    (see datasetstats.DatasetStats), so statistics of a dataset are merging without reading images again.
+    Images of a job with a codec shard format are storing as a sample shard, see sampleshard.
+    Each file is writing atomically, see writer.write_file.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a dataset.
+
+    params: dict
+        Parameters of a job, see bulk_params.
+
+    shard: int
+        An index of a shard.
+
+    imgs, labels, annotations:
+        Arrays of a shard, see generate_shard.
+
+    fsync: str     Default: none
+        A policy of flushing data to a storage, see writer.write_file.
+
+    executor: concurrent.futures.Executor   Default: None
+        A pool of writer threads compressing images of a sample shard, see sampleshard.encode_shard.
+
+    Returns
+    -------
+    An entry of a shard of a manifest: a dictionary with keys shard, first, count, images, labels, annotations,
+    stats (names of files of a shard).
+    """
+    first, count = shard_range(params, shard)
+    entry = {'shard': shard, 'first': first, 'count': count}
+
+    shard_format = params.get('shard_format', BULK_DEFAULT_SHARD_FORMAT)
+    for name, arr in [('images', imgs), ('labels', labels), ('annotations', annotations)]:
+        if name == 'images' and shard_format != BULK_DEFAULT_SHARD_FORMAT:
+            entry[name] = helper.indexed_file_name("shard_images" + sampleshard.SAMPLE_SHARD_EXTENSION, shard)
+            sampleshard.write_shard(os.path.join(target_dir, entry[name]), arr, shard_format,
+                                    executor=executor, fsync=fsync)
+            continue
+
+        entry[name] = helper.indexed_file_name("shard_{}.npy".format(name), shard)
+        writer.write_file(os.path.join(target_dir, entry[name]), writer.encode_npy(arr), fsync=fsync)
+
+    entry['stats'] = helper.indexed_file_name("shard_stats.json", shard)
+    write_json(os.path.join(target_dir, entry['stats']),
+               datasetstats.DatasetStats().update(imgs, annotations).to_dict(), fsync=fsync)
+
+    return entry
+
+
+def read_shard(target_dir, entry):
+    """
+    Reading a shard of a dataset. Images are mapping to memory, not reading.
+    Images of a sample shard are decompressing on access, see sampleshard.SampleShard.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a dataset.
+
+    entry: dict
+        An entry of a shard of a manifest.
+
+    Returns
+    -------
+    A tuple of arrays of images, labels and annotations.
+    """
+    images_file_name = os.path.join(target_dir, entry['images'])
+    if images_file_name.endswith(sampleshard.SAMPLE_SHARD_EXTENSION):
+        imgs = sampleshard.SampleShard(images_file_name)
+    else:
+        imgs = np.load(images_file_name, mmap_mode='r')
+
+    return (imgs,
+            np.load(os.path.join(target_dir, entry['labels'])),
+            np.load(os.path.join(target_dir, entry['annotations'])))
+
+
+def bulk_stats(target_dir, shards):
+    """
+    Merging statistics of shards to statistics of a dataset in the order of shards,
+    so a dataset has the same statistics for any count of nodes.
+    Statistics of a shard written without them (ex. resuming an older checkpoint) are computing from its files.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a dataset.
+
+    shards: list of dicts
+        Entries of shards of a manifest ordered by an index.
+
+    Returns
+    -------
+    A dictionary of statistics, see datasetstats.DatasetStats.to_dict.
+    """
+    stats = datasetstats.DatasetStats()
+    for entry in shards:
+        if entry.get('stats'):
+            stats.merge(datasetstats.DatasetStats.from_dict(read_json(os.path.join(target_dir, entry['stats']))))
+        else:
+            imgs, _, annotations = read_shard(target_dir, entry)
+            stats.update(imgs, annotations)
+
+    return stats.to_dict()
+
+
+def read_json(file_name):
+    """
+    Returns
+    -------
+    A content of a JSON file or None if a file doesn't exist.
+    """
+    if not os.path.exists(file_name):
+        return None
+
+    with open(file_name, 'r') as f:
+        return json.load(f)
+
+
+def write_json(file_name, content, fsync='none'):
+    """
+    Storing a JSON file atomically, so readers never see a half-written file.
+    """
+    writer.write_file(file_name, json.dumps(content, indent=1).encode(), fsync=fsync)
+
+
+def read_manifest(target_dir):
+    """
+    Reading a manifest of a completed dataset.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a dataset.
+
+    Returns
+    -------
+    A dictionary with keys: seed, params, shards (a list of entries of shards ordered by an index),
+    stats (statistics of a dataset, see bulk_stats).
+
+    Raises
+    ------
+    An exception if a dataset is not completed.
+    """
+    manifest = read_json(os.path.join(target_dir, BULK_MANIFEST_FILE))
+    if manifest is None:
+        raise Exception("'{}' doesn't contain a completed dataset".format(target_dir))
+
+    return manifest
+
+
+def generate_bulk(target_dir, count, length=(1, 10), spacing_range=None, image_width=None,
+                  image_height=None, line_length=None, evenly=False, filters_str=None, balanced=False,
+                  shard_size=BULK_SHARD_SIZE,
+                  resize_mode=filters.RESIZE_DEFAULT_MODE,
+                  shard_format=BULK_DEFAULT_SHARD_FORMAT,
+                  seed=None,
+                  data_home=None,
+                  images=None,
+                  checkpoint_every=1,
+                  max_shards=None,
+                  fsync='none',
+                  rank=0,
+                  world_size=1,
+                  writers=None,
+                  verbose=False):
+    """
+    Generating a dataset of random numbers sequences by shards and storing them to a directory.
+
+    A job periodically persists a checkpoint: completed shards and a seed.
+    A restarted job skips completed shards and continues where it left off.
+    A shard is a pure function of a seed and an index of a shard (see shard_rng), a sampler of a balanced dataset
+    seeks to the beginning of each shard by counts of digits of previous shards,
+    so the resulting dataset is identical to an uninterrupted run.
+    The manifest file is written when all of shards are completed.
+
+    A multi-node job runs the same call with a rank of each node on a shared directory.
+    A node generates its part of shards (see rank_shards), stores its own checkpoint and a manifest of a node
+    (ex. checkpoint_000001.json, manifest_000001.json). A node completing the last part merges manifests
+    of nodes to the manifest of a dataset, see merge_bulk. A dataset doesn't depend on a count of nodes.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a dataset.
+
+    count, length, spacing_range, image_width, image_height, line_length, evenly, filters_str, balanced,
+    shard_size, resize_mode, shard_format:
+        Parameters of a dataset, see bulk_params.
+
+    seed: None, int or numpy.random.Generator   Default: None
+        A seed of a dataset. A seed of a checkpoint is using to resume a job if it is None.
+        A multi-node job requires an int seed shared by all of nodes.
+
+    data_home: str  Default: None
+        A custom path of storing MNIST datafiles.
+
+    images: object
+        A custom MNIST image db to prevent using default DB of a mnistdata module.
+
+    checkpoint_every: int   Default: 1
+        A count of shards between storing a checkpoint.
+
+    max_shards: int   Default: None
+        A maximum count of shards generated by a call, ex. to split a long job to limited runs.
+
+    fsync: str     Default: none
+        A policy of flushing data to a storage, see writer.write_file.
+
+    rank: int   Default: 0
+        An index of a node of a multi-node job from 0 to world_size - 1.
+
+    world_size: int   Default: 1
+        A count of nodes of a job.
+
+    writers: int   Default: None
+        A count of writer threads compressing images of sample shards, a count of CPU is using if it is None.
+
+    verbose: boolean    Default: False
+        Print a progress of a job.
+
+    Returns
+    -------
+    A manifest of a completed dataset (see read_manifest) or None if a job is not completed
+    (a multi-node job is not completed while any of nodes is working).
+
+    Raises
+    ------
+    An exception if a directory contains a checkpoint of a job with other parameters.
+    """
+    rank, world_size = int(rank), int(world_size)
+    if world_size <= 0 or not 0 <= rank < world_size:
+        raise Exception("rank {} has to be in a range of a world size {}".format(rank, world_size))
+
+    if images is None:
+        images = mnistdata.get_images(data_home=data_home)
+
+    os.makedirs(target_dir, exist_ok=True)
+
+    params = bulk_params(images, count, length=length, spacing_range=spacing_range, image_width=image_width,
+                         image_height=image_height, line_length=line_length, evenly=evenly,
+                         filters_str=filters_str, balanced=balanced, shard_size=shard_size,
+                         resize_mode=resize_mode, shard_format=shard_format)
+    # resume a job using a checkpoint
+    checkpoint_file_name = os.path.join(target_dir, node_file_name(BULK_CHECKPOINT_FILE, rank, world_size))
+    checkpoint = read_json(checkpoint_file_name)
+    if checkpoint is None:
+        if world_size > 1 and (seed is None or isinstance(seed, (np.random.Generator, np.random.SeedSequence))):
+            raise Exception("a multi-node job requires an int seed shared by all of nodes")
+        checkpoint = {'seed': helper.seed_entropy(seed), 'params': params, 'world_size': world_size, 'shards': []}
+    elif checkpoint['params'] != params or checkpoint.get('world_size', 1) != world_size:
+        raise Exception("'{}' contains a checkpoint of a job with other parameters {} of {} nodes".format(
+            target_dir, checkpoint['params'], checkpoint.get('world_size', 1)))
+    elif seed is not None and not isinstance(seed, np.random.Generator) and int(seed) != checkpoint['seed']:
+        raise Exception("'{}' contains a checkpoint of a job with another seed {}".format(
+            target_dir, checkpoint['seed']))
+
+    return run_bulk(target_dir, checkpoint, images, rank=rank, world_size=world_size,
+                    checkpoint_every=checkpoint_every, max_shards=max_shards, fsync=fsync, writers=writers,
+                    verbose=verbose)
+
+
+def append_bulk(target_dir, count,
+                data_home=None,
+                images=None,
+                checkpoint_every=1,
+                max_shards=None,
+                fsync='none',
+                rank=0,
+                world_size=1,
+                writers=None,
+                verbose=False):
+    """
+    Extending a completed dataset by count samples: new shards continue indexes of shards and samples,
+    a shard is a pure function of a seed of a dataset and an index, so parameters and a seed are taking
+    from the manifest. A dataset is the same as generating all of its segments in one job
+    with the same appends.
+
+    New shards are writing to new files, the manifest (shards and statistics) is replacing atomically
+    when all of them are completed, so readers see the previous dataset or the extended one.
+    A job is stopping and resuming as generate_bulk does, a multi-node job runs the same call on each node.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a completed dataset.
+
+    count: int
+        A count of appended samples.
+
+    data_home, images, checkpoint_every, max_shards, fsync, rank, world_size, writers, verbose:
+        The same parameters as generate_bulk has.
+
+    Returns
+    -------
+    A manifest of an extended dataset or None if a job is not completed.
+
+    Raises
+    ------
+    An exception if a directory doesn't contain a completed dataset or contains an unfinished job of another append.
+    """
+    rank, world_size = int(rank), int(world_size)
+    if world_size <= 0 or not 0 <= rank < world_size:
+        raise Exception("rank {} has to be in a range of a world size {}".format(rank, world_size))
+
+    if images is None:
+        images = mnistdata.get_images(data_home=data_home)
+
+    manifest = read_manifest(target_dir)
+    params = append_params(manifest['params'], count)
+
+    checkpoint = read_json(os.path.join(target_dir, node_file_name(BULK_CHECKPOINT_FILE, rank, world_size)))
+    if checkpoint is not None and checkpoint['params'] not in [manifest['params'], params]:
+        raise Exception("'{}' contains an unfinished job with other parameters {}".format(
+            target_dir, checkpoint['params']))
+    # completed shards of a dataset are shards of a new job, the current manifest stays till the end of a job
+    if checkpoint is None or checkpoint['params'] != params or checkpoint.get('world_size', 1) != world_size:
+        shards = set(rank_shards(params, rank, world_size))
+        checkpoint = {'seed': manifest['seed'], 'params': params, 'world_size': world_size,
+                      'shards': [entry for entry in manifest['shards'] if entry['shard'] in shards]}
+
+    return run_bulk(target_dir, checkpoint, images, rank=rank, world_size=world_size,
+                    checkpoint_every=checkpoint_every, max_shards=max_shards, fsync=fsync, writers=writers,
+                    verbose=verbose)
+
+
+def run_bulk(target_dir, checkpoint, images, rank=0, world_size=1, checkpoint_every=1, max_shards=None,
+             fsync='none', writers=None, verbose=False):
+    """
+    Generating pending shards of a checkpoint of a node, see generate_bulk.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a dataset.
+
+    checkpoint: dict
+        A checkpoint of a node: a seed, parameters of a job and entries of completed shards.
+
+    images: object
+        An MNIST image db.
+
+    rank, world_size, checkpoint_every, max_shards, fsync, writers, verbose:
+        The same parameters as generate_bulk has.
+
+    Returns
+    -------
+    A manifest of a completed dataset or None if a job is not completed.
+    """
+    entropy, params = checkpoint['seed'], checkpoint['params']
+    checkpoint_file_name = os.path.join(target_dir, node_file_name(BULK_CHECKPOINT_FILE, rank, world_size))
+
+    shards = rank_shards(params, rank, world_size)
+    completed = set(entry['shard'] for entry in checkpoint['shards'])
+    pending_shards = [shard for shard in shards if shard not in completed][:max_shards]
+    pending = 0
+    # images of sample shards are compressing by a pool of writer threads
+    executor = None
+    if params.get('shard_format', BULK_DEFAULT_SHARD_FORMAT) != BULK_DEFAULT_SHARD_FORMAT and pending_shards:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=writers or os.cpu_count() or 1)
+    try:
+        for shard, imgs, labels, annotations in generate_shards(entropy, params, images, pending_shards,
+                                                                balanced=params['balanced']):
+            checkpoint['shards'].append(write_shard(target_dir, params, shard, imgs, labels, annotations,
+                                                    fsync=fsync, executor=executor))
+            pending += 1
+
+            if verbose:
+                print("Shard {}/{}: {} samples".format(shard + 1, shard_count(params), len(imgs)))
+            # store a checkpoint
+            if pending >= checkpoint_every:
+                write_json(checkpoint_file_name, checkpoint, fsync=fsync)
+                pending = 0
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if pending:
+        write_json(checkpoint_file_name, checkpoint, fsync=fsync)
+
+    if len(checkpoint['shards']) < len(shards):
+        return None
+
+    manifest = {
+        'seed': entropy,
+        'params': params,
+        'shards': sorted(checkpoint['shards'], key=lambda entry: entry['shard']),
+    }
+    if world_size == 1:
+        manifest['stats'] = bulk_stats(target_dir, manifest['shards'])
+        write_json(os.path.join(target_dir, BULK_MANIFEST_FILE), manifest, fsync=fsync)
+
+        return manifest
+
+    manifest.update(rank=rank, world_size=world_size)
+    write_json(os.path.join(target_dir, node_file_name(BULK_MANIFEST_FILE, rank, world_size)), manifest, fsync=fsync)
+    # the last completed node merges a dataset, concurrent merges write the same manifest
+    try:
+        return merge_bulk(target_dir, world_size=world_size, fsync=fsync, params=params)
+    except BulkIncomplete:
+        return None
+
+
+class BulkIncomplete(Exception):
+    """
+    An exception of merging a multi-node dataset while some of nodes are not completed.
+    """
+    pass
+
+
+def merge_bulk(target_dir, world_size=None, fsync='none', params=None):
+    """
+    Merging manifests of nodes of a multi-node job to the manifest of a dataset.
+    Shards are not copying or moving: the manifest refers to files of shards written by nodes.
+
+    Parameters
+    ----------
+    target_dir: str
+        A directory of a dataset.
+
+    world_size: int   Default: None
+        A count of nodes of a job. It is taking from a manifest of the first node if it is None.
+
+    fsync: str     Default: none
+        A policy of flushing data to a storage, see writer.write_file.
+
+    params: dict   Default: None
+        Parameters of a job, manifests of nodes of other jobs (ex. of a dataset before appending) are not completed.
+        Parameters of the first node are using if it is None.
+
+    Returns
+    -------
+    A manifest of a dataset, see read_manifest.
+
+    Raises
+    ------
+    BulkIncomplete if some of nodes are not completed and an exception if manifests of nodes are of different jobs.
+    """
+    if world_size is None:
+        first = read_json(os.path.join(target_dir, helper.indexed_file_name(BULK_MANIFEST_FILE, 0)))
+        if first is None:
+            raise BulkIncomplete("'{}' doesn't contain a manifest of the first node".format(target_dir))
+        world_size = first['world_size']
+
+    nodes = [read_json(os.path.join(target_dir, node_file_name(BULK_MANIFEST_FILE, rank, world_size)))
+             for rank in range(world_size)]
+    incomplete = [rank for rank, node in enumerate(nodes)
+                  if node is None or (params is not None and node['params'] != params)]
+    if incomplete:
+        raise BulkIncomplete("nodes {} of '{}' are not completed".format(incomplete, target_dir))
+
+    for node in nodes:
+        if (node['seed'], node['params'], node['world_size']) != (nodes[0]['seed'], nodes[0]['params'], world_size):
+            raise Exception("a node {} of '{}' belongs to another job".format(node['rank'], target_dir))
+
+    shards = sorted((entry for node in nodes for entry in node['shards']), key=lambda entry: entry['shard'])
+    if [entry['shard'] for entry in shards] != list(range(shard_count(nodes[0]['params']))):
+        raise Exception("shards of nodes of '{}' don't cover a dataset".format(target_dir))
+
+    manifest = {'seed': nodes[0]['seed'], 'params': nodes[0]['params'], 'shards': shards,
+                'stats': bulk_stats(target_dir, shards)}
+    write_json(os.path.join(target_dir, BULK_MANIFEST_FILE), manifest, fsync=fsync)
+
+    return manifest
+
+
+if __name__ == '__main__':
+    """
+    A tool generating a large dataset of random numbers sequences by shards.
+    A stopped job continues from the last checkpoint by running the same command again.
+
+    Example:
+        python bulk.py ./dataset -n 100000 --length 3,8 -w 200 --seed 1
+
+    A node of a multi-node job:
+        python bulk.py ./dataset -n 100000 --length 3,8 -w 200 --seed 1 --rank 2 --world_size 8
+
+    Append samples to a completed dataset:
+        python bulk.py ./dataset -n 50000 --append
+
+    Requirements arguments:
+        target_directory
+            A directory of a dataset.
+
+        -n | --count
+            A count of samples of a dataset.
+
+    Optiononal arguments:
+        See argsparser.bulk_parser.
+    """
+    args = argsparser.bulk_parser().parse_args()
+
+    if args.merge:
+        try:
+            manifest = merge_bulk(args.target_directory, fsync=args.fsync)
+        except Exception as e:
+            print("failed to merge a dataset: ", e)
+            exit(-1)
+
+        print("A dataset of {} samples is merged".format(manifest['params']['count']))
+        exit(0)
+
+    if args.count is None:
+        print("a count of samples is required: set -n")
+        exit(-1)
+
+    rank = args.rank if args.rank is not None else env_rank(BULK_RANK_ENV, 0)
+    world_size = args.world_size if args.world_size is not None else env_rank(BULK_WORLD_SIZE_ENV, 1)
+
+    try:
+        if args.append:
+            manifest = append_bulk(args.target_directory, args.count,
+                                   data_home=args.data_directory,
+                                   checkpoint_every=args.checkpoint_every,
+                                   max_shards=args.max_shards,
+                                   fsync=args.fsync,
+                                   rank=rank,
+                                   world_size=world_size,
+                                   writers=args.writers,
+                                   verbose=True)
+        else:
+            manifest = generate_bulk(args.target_directory, args.count,
+                                     length=args.length,
+                                     spacing_range=args.spacing,
+                                     image_width=args.image_width,
+                                     image_height=args.image_height,
+                                     line_length=args.line_length,
+                                     evenly=args.evenly,
+                                     filters_str=args.filters,
+                                     balanced=args.balanced,
+                                     shard_size=args.shard_size,
+                                     resize_mode=args.resize_mode,
+                                     shard_format=args.shard_format,
+                                     seed=args.seed,
+                                     data_home=args.data_directory,
+                                     checkpoint_every=args.checkpoint_every,
+                                     max_shards=args.max_shards,
+                                     fsync=args.fsync,
+                                     rank=rank,
+                                     world_size=world_size,
+                                     writers=args.writers,
+                                     verbose=True)
+    except Exception as e:
+        print("failed to generate a dataset: ", e)
+        exit(-1)
+
+    if manifest is None and world_size > 1 and os.path.exists(
+            os.path.join(args.target_directory, node_file_name(BULK_MANIFEST_FILE, rank, world_size))):
+        print("A part of a node {} is completed, the last completed node merges a dataset".format(rank))
+    elif manifest is None:
+        print("A dataset is not completed, run the same command to continue")
+    else:
+        print("A dataset of {} samples is completed: pixels mean {:.4f}, std {:.4f}".format(
+            manifest['params']['count'], manifest['stats']['mean'], manifest['stats']['std']))
@@ -0,0 +1,182 @@
+import unittest
+import json
+import os
+import shutil
+import numpy as np
+
+if __name__.find('.')<0:
+    import bulk
+    import datasetstats
+    import mnistdata
+    import sampleshard
+else:
+    from . import bulk
+    from . import datasetstats
+    from . import mnistdata
+    from . import sampleshard
+
+
+class TestBulk(unittest.TestCase):
+    test_data_home_path = "test-data/bulk-home"
+    test_dir = "test-data/bulk"
+
+    def clear_dir(self):
+        for dr in [TestBulk.test_data_home_path, TestBulk.test_dir]:
+            shutil.rmtree(dr, ignore_errors=True)
+
+    def setUp(self):
+        self.clear_dir()
+
+        mnistdata.GenerateTestData(
+            TestBulk.test_data_home_path, 28, 28, 20)
+
+        self.labels_db = mnistdata.MNISTLabelsFile()
+        self.images_db = mnistdata.MNISTImagesFile(self.labels_db)
+        self.labels_db.read(
+            data_home=TestBulk.test_data_home_path)
+        self.images_db.read(
+            data_home=TestBulk.test_data_home_path)
+
+    def tearDown(self):
+        self.images_db.close()
+        self.labels_db.close()
+
+        self.clear_dir()
+
+    def generate(self, target_dir, **kwargs):
+        kwargs.setdefault('shard_size', 4)
+        return bulk.generate_bulk(target_dir, 10, length=(2, 4), spacing_range=(0, 5), image_width=120,
+                                  filters_str="distort", seed=5, images=self.images_db,
+                                  **kwargs)
+
+    def read(self, target_dir):
+        manifest = bulk.read_manifest(target_dir)
+
+        return [np.concatenate(arrays) for arrays in
+                zip(*(bulk.read_shard(target_dir, entry) for entry in manifest['shards']))]
+
+    def test_generate_bulk(self):
+        target_dir = os.path.join(TestBulk.test_dir, "full")
+
+        manifest = self.generate(target_dir)
+        self.assertEqual([entry['count'] for entry in manifest['shards']], [4, 4, 2])
+
+        imgs, labels, annotations = self.read(target_dir)
+        self.assertEqual(imgs.shape, (10, 28, 120))
+        self.assertEqual(imgs.dtype, np.uint8)
+        self.assertTrue(all(2 <= len(label) <= 4 for label in labels))
+        self.assertEqual(len(annotations), sum(len(label) for label in labels))
+        self.assertEqual(annotations['digit'].tolist(), [int(d) for label in labels for d in label])
+        self.assertEqual(np.unique(annotations['sample']).tolist(), list(range(10)))
+        # statistics accumulated by shards are the same as a pass over a dataset
+        expected = datasetstats.DatasetStats().update(imgs, annotations).to_dict()
+        self.assertEqual(manifest['stats']['digits'], expected['digits'])
+        self.assertEqual(manifest['stats']['lengths'], expected['lengths'])
+        self.assertEqual(manifest['stats']['spacings'], expected['spacings'])
+        self.assertAlmostEqual(manifest['stats']['mean'], expected['mean'], places=12)
+        self.assertAlmostEqual(manifest['stats']['std'], expected['std'], places=12)
+
+    def test_shard_format(self):
+        expected_dir = os.path.join(TestBulk.test_dir, "expected")
+        self.generate(expected_dir)
+        expected = self.read(expected_dir)
+
+        for shard_format in sampleshard.SAMPLE_SHARD_CODECS:
+            target_dir = os.path.join(TestBulk.test_dir, shard_format)
+            manifest = self.generate(target_dir, shard_format=shard_format, writers=2)
+
+            self.assertEqual(manifest['params']['shard_format'], shard_format)
+            self.assertTrue(manifest['shards'][0]['images'].endswith(sampleshard.SAMPLE_SHARD_EXTENSION))
+            self.assertEqual(manifest['stats'], bulk.read_manifest(expected_dir)['stats'])
+            for exist, expected_arr in zip(self.read(target_dir), expected):
+                self.assertTrue(np.array_equal(exist, expected_arr))
+
+        with self.assertRaises(Exception):
+            self.generate(os.path.join(TestBulk.test_dir, "unknown"), shard_format='png')
+
+    def test_resume_bulk(self):
+        for balanced in [False, True]:
+            expected_dir = os.path.join(TestBulk.test_dir, "expected")
+            exist_dir = os.path.join(TestBulk.test_dir, "resumed")
+
+            self.generate(expected_dir, balanced=balanced)
+            # stop a job after each shard and continue it
+            self.assertIsNone(self.generate(exist_dir, balanced=balanced, max_shards=1))
+            with open(os.path.join(exist_dir, bulk.BULK_CHECKPOINT_FILE)) as f:
+                self.assertEqual(len(json.load(f)['shards']), 1)
+            self.assertIsNone(self.generate(exist_dir, balanced=balanced, max_shards=1))
+            self.assertIsNotNone(self.generate(exist_dir, balanced=balanced))
+
+            for exist, expected in zip(self.read(exist_dir), self.read(expected_dir)):
+                self.assertTrue(np.array_equal(exist, expected))
+
+            shutil.rmtree(TestBulk.test_dir)
+        # a checkpoint of another job
+        self.generate(exist_dir, max_shards=1)
+        with self.assertRaises(Exception):
+            bulk.generate_bulk(exist_dir, 12, length=(2, 4), shard_size=4, images=self.images_db)
+
+    def test_append_bulk(self):
+        target_dir = os.path.join(TestBulk.test_dir, "appended")
+        nodes_dir = os.path.join(TestBulk.test_dir, "nodes")
+
+        self.generate(target_dir, balanced=True)
+        # a stopped append keeps the previous dataset
+        self.assertIsNone(bulk.append_bulk(target_dir, 5, images=self.images_db, max_shards=1))
+        self.assertEqual(bulk.read_manifest(target_dir)['params']['count'], 10)
+        with self.assertRaises(Exception):
+            bulk.append_bulk(target_dir, 6, images=self.images_db)
+
+        manifest = bulk.append_bulk(target_dir, 5, images=self.images_db)
+        self.assertEqual(manifest, bulk.read_manifest(target_dir))
+        self.assertEqual(manifest['params']['segments'], [10, 5])
+        self.assertEqual([(entry['first'], entry['count']) for entry in manifest['shards']],
+                         [(0, 4), (4, 4), (8, 2), (10, 4), (14, 1)])
+
+        imgs, labels, annotations = self.read(target_dir)
+        self.assertEqual(imgs.shape, (15, 28, 120))
+        self.assertEqual(np.unique(annotations['sample']).tolist(), list(range(15)))
+        self.assertEqual(manifest['stats']['images'], 15)
+        self.assertEqual(manifest['stats']['digits'], np.bincount(annotations['digit'], minlength=10).tolist())
+        # the same appends of a multi-node job
+        for rank in range(2):
+            self.generate(nodes_dir, balanced=True, rank=rank, world_size=2)
+        for rank in range(2):
+            nodes_manifest = bulk.append_bulk(nodes_dir, 5, images=self.images_db, rank=rank, world_size=2)
+
+        self.assertEqual(nodes_manifest['stats'], manifest['stats'])
+        for exist, expected in zip(self.read(nodes_dir), (imgs, labels, annotations)):
+            self.assertTrue(np.array_equal(exist, expected))
+
+    def test_multi_node_bulk(self):
+        for balanced in [False, True]:
+            expected_dir = os.path.join(TestBulk.test_dir, "expected")
+            nodes_dir = os.path.join(TestBulk.test_dir, "nodes")
+
+            self.generate(expected_dir, balanced=balanced, shard_size=2)
+            # 5 shards on 3 nodes, the last completed node merges a dataset
+            self.assertIsNone(self.generate(nodes_dir, balanced=balanced, shard_size=2, rank=0, world_size=3))
+            self.assertIsNone(self.generate(nodes_dir, balanced=balanced, shard_size=2, rank=2, world_size=3))
+            with self.assertRaises(bulk.BulkIncomplete):
+                bulk.merge_bulk(nodes_dir)
+            # a stopped node continues from its checkpoint
+            self.assertIsNone(self.generate(nodes_dir, balanced=balanced, shard_size=2, rank=1, world_size=3,
+                                            max_shards=1))
+            manifest = self.generate(nodes_dir, balanced=balanced, shard_size=2, rank=1, world_size=3)
+
+            self.assertEqual([entry['shard'] for entry in manifest['shards']], list(range(5)))
+            self.assertEqual(bulk.merge_bulk(nodes_dir), manifest)
+            self.assertEqual(manifest['stats'], bulk.read_manifest(expected_dir)['stats'])
+            for exist, expected in zip(self.read(nodes_dir), self.read(expected_dir)):
+                self.assertTrue(np.array_equal(exist, expected))
+
+            shutil.rmtree(TestBulk.test_dir)
+        # a multi-node job requires a shared seed
+        with self.assertRaises(Exception):
+            bulk.generate_bulk(nodes_dir, 10, shard_size=2, images=self.images_db, rank=0, world_size=2)
+        with self.assertRaises(Exception):
+            self.generate(nodes_dir, rank=2, world_size=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
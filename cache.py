@@ -0,0 +1,344 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+if __name__.find('.')<0:
+    import filters
+    import mnistdata
+    import writer
+else:
+    from . import filters
+    from . import mnistdata
+    from . import writer
+
+# a version of generated images, change it to invalidate stored samples after changing a generator
+CACHE_VERSION = 1
+CACHE_DIR_NAME = "sample-cache"
+CACHE_DEFAULT_MEMORY_BYTES = 256 << 20
+
+
+def filters_spec(fltrs):
+    """
+    Getting a string describing filters with parameters to use it as a part of a key of a sample.
+
+    Parameters
+    ----------
+    fltrs: None, str or list of functions
+        Filters: a string (see filters.parse_filters) or filter functions.
+
+    Returns
+    -------
+    A string of filters or None if some of filters are not registered,
+    so a sample can't be identified by parameters.
+    """
+    if fltrs is None:
+        return ""
+    if isinstance(fltrs, str):
+        fltrs = filters.parse_filters(fltrs)
+
+    if not all(getattr(fltr, 'name', None) in filters.FILTERS for fltr in fltrs):
+        return None
+
+    return ",".join(filters.format_filter(fltr.name, fltr.params) for fltr in fltrs)
+
+
+def sample_key(images, digits, spacing_range, image_width, evenly=False, fltrs=None, seed=None,
+               image_height=None, line_length=None, tight=False, resize_mode=filters.RESIZE_DEFAULT_MODE):
+    """
+    Getting a key of a generated sample: a hash of generation parameters and a source db.
+
+    Parameters
+    ----------
+    images: object
+        An MNIST image db.
+
+    digits, spacing_range, image_width, evenly, fltrs, seed, image_height, line_length, tight, resize_mode:
+        The same parameters as generator.generate_numbers_sequence has.
+
+    Returns
+    -------
+    A hex string or None if a sample can't be cached: a seed is not an int or some of filters are not registered.
+    """
+    if seed is None or isinstance(seed, (np.random.Generator, np.random.SeedSequence)):
+        return None
+
+    spec = filters_spec(fltrs)
+    if spec is None:
+        return None
+
+    params = {
+        'version': CACHE_VERSION,
+        'db': [os.path.abspath(images.file_path), int(images.record_count)],
+        'digits': [int(digit) for digit in digits],
+        'spacing': [int(v) for v in spacing_range] if spacing_range else None,
+        'image_width': int(image_width) if image_width else None,
+        'evenly': bool(evenly),
+        'filters': spec,
+        'seed': int(seed),
+        'image_height': int(image_height) if image_height else None,
+        'line_length': int(line_length) if line_length else None,
+    }
+    # keys of images without a tight packing and with a default resizing are the same as before adding them
+    if tight:
+        params['tight'] = True
+    if resize_mode != filters.RESIZE_DEFAULT_MODE:
+        params['resize_mode'] = resize_mode
+
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+class MemoryCache:
+    """
+    An in-memory LRU cache of arrays bounded by a size of arrays in bytes.
+    """
+
+    def __init__(self, max_bytes=CACHE_DEFAULT_MEMORY_BYTES):
+        """
+        Parameters
+        ----------
+        max_bytes: int   Default: CACHE_DEFAULT_MEMORY_BYTES
+            A maximum size of stored arrays. Larger arrays are not storing.
+        """
+        self.max_bytes = int(max_bytes)
+        self.items = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns
+        -------
+        A stored array or None.
+        """
+        arr = self.items.get(key)
+        if arr is None:
+            self.misses += 1
+            return None
+
+        self.items.move_to_end(key)
+        self.hits += 1
+
+        return arr
+
+    def put(self, key, arr):
+        """
+        Storing an array and evicting least recently used ones while a size exceeds a maximum.
+        """
+        if arr.nbytes > self.max_bytes:
+            return
+
+        old = self.items.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+
+        self.items[key] = arr
+        self.nbytes += arr.nbytes
+
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.items.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+
+class DiskCache:
+    """
+    An on-disk content-addressed store of arrays: an array is a .npy file named by a key.
+    A size of files is bounded, least recently used files are removing.
+    """
+
+    def __init__(self, directory, max_bytes):
+        """
+        Parameters
+        ----------
+        directory: str
+            A directory of a store.
+
+        max_bytes: int
+            A maximum size of stored files.
+        """
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # sizes of files ordered by a time of using
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".npy"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        self.files = collections.OrderedDict((key, size) for _, key, size in sorted(files))
+        self.nbytes = sum(self.files.values())
+
+    def file_name(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def get(self, key):
+        """
+        Returns
+        -------
+        A stored array or None.
+        """
+        try:
+            arr = np.load(self.file_name(key))
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        # mark a file as recently used
+        os.utime(self.file_name(key))
+        if key in self.files:
+            self.files.move_to_end(key)
+        else:
+            # a file stored by another process
+            self.files[key] = os.path.getsize(self.file_name(key))
+            self.nbytes += self.files[key]
+        self.hits += 1
+
+        return arr
+
+    def put(self, key, arr):
+        """
+        Storing an array atomically and evicting least recently used files while a size exceeds a maximum.
+        """
+        data = writer.encode_npy(arr)
+        if len(data) > self.max_bytes:
+            return
+
+        writer.write_file(self.file_name(key), data)
+
+        self.nbytes += len(data) - self.files.pop(key, 0)
+        self.files[key] = len(data)
+
+        while self.nbytes > self.max_bytes:
+            evicted, size = self.files.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.file_name(evicted))
+            except FileNotFoundError:
+                pass
+
+
+class SampleCache:
+    """
+    A two-tier cache of generated images keyed by generation parameters:
+    an in-memory LRU cache and an optional on-disk store under a data home directory.
+    Pass an object to generator.generate_numbers_sequence as the cache parameter.
+    Only samples with an int seed and registered filters are caching, another ones are generating as is.
+    Cached images are read-only arrays shared by callers.
+    """
+
+    def __init__(self, memory_bytes=CACHE_DEFAULT_MEMORY_BYTES, disk_bytes=0, directory=None, data_home=None):
+        """
+        Parameters
+        ----------
+        memory_bytes: int   Default: CACHE_DEFAULT_MEMORY_BYTES
+            A maximum size of images in memory. Zero disables the tier.
+
+        disk_bytes: int   Default: 0
+            A maximum size of files of the on-disk store. Zero disables the tier.
+
+        directory: str   Default: None
+            A directory of the on-disk store. A "sample-cache" directory of the data home is using if it is None.
+
+        data_home: str  Default: None
+            A custom path of storing MNIST datafiles, see mnistdata.get_data_file_path.
+        """
+        self.memory = MemoryCache(memory_bytes) if memory_bytes else None
+        self.disk = None
+        if disk_bytes:
+            directory = directory or mnistdata.get_data_file_path(CACHE_DIR_NAME, data_home=data_home)
+            self.disk = DiskCache(directory, disk_bytes)
+
+        # hits of any tier and misses of all of tiers (generated samples)
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.lock = threading.Lock()
+
+    def key(self, images, digits, spacing_range, image_width, evenly=False, fltrs=None, seed=None,
+            image_height=None, line_length=None, tight=False, resize_mode=filters.RESIZE_DEFAULT_MODE):
+        """
+        Getting a key of a generated sample, see sample_key.
+        """
+        return sample_key(images, digits, spacing_range, image_width, evenly=evenly, fltrs=fltrs, seed=seed,
+                          image_height=image_height, line_length=line_length, tight=tight,
+                          resize_mode=resize_mode)
+
+    def fetch(self, key, generate):
+        """
+        Getting an image by a key from tiers of the cache or generating and storing it.
+
+        Parameters
+        ----------
+        key: str
+            A key of a sample, see sample_key. A sample is generating without caching if it is None.
+
+        generate: function
+            A function without parameters generating an image.
+
+        Returns
+        -------
+        An image.
+        """
+        if key is None:
+            with self.lock:
+                self.bypasses += 1
+            return generate()
+
+        with self.lock:
+            img = self.memory.get(key) if self.memory else None
+            if img is None and self.disk:
+                img = self.disk.get(key)
+                if img is not None:
+                    img.flags.writeable = False
+                    if self.memory:
+                        self.memory.put(key, img)
+
+            if img is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if img is not None:
+            return img
+
+        img = generate()
+        img.flags.writeable = False
+
+        with self.lock:
+            if self.memory:
+                self.memory.put(key, img)
+            if self.disk:
+                self.disk.put(key, img)
+
+        return img
+
+    def stats(self):
+        """
+        Getting counters of the cache to choose sizes of tiers.
+
+        Returns
+        -------
+        A dictionary with keys:
+            hits - a count of samples served by any tier;
+            misses - a count of samples missed by all of tiers and generated;
+            bypasses - a count of not cachable samples;
+            memory_hits, memory_misses, memory_evictions, memory_bytes, disk_hits, disk_misses, disk_evictions,
+            disk_bytes - counters of each tier. A tier counts its own lookups independently: a memory miss
+            served by the disk tier is a memory miss and a disk hit, use hits and misses for a hit rate of the cache.
+        """
+        result = {'hits': self.hits, 'misses': self.misses, 'bypasses': self.bypasses}
+        for name, tier in [('memory', self.memory), ('disk', self.disk)]:
+            for counter in ['hits', 'misses', 'evictions', 'nbytes']:
+                result["{}_{}".format(name, counter.replace('nbytes', 'bytes'))] = getattr(tier, counter, 0)
+
+        return result
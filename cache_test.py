@@ -0,0 +1,104 @@
+import unittest
+import os
+import shutil
+import numpy as np
+
+if __name__.find('.')<0:
+    import cache
+    import filters
+    import generator
+    import mnistdata
+else:
+    from . import cache
+    from . import filters
+    from . import generator
+    from . import mnistdata
+
+
+class TestSampleCache(unittest.TestCase):
+    test_data_home_path = "test-data/cache-home"
+
+    def clear_dir(self):
+        shutil.rmtree(TestSampleCache.test_data_home_path, ignore_errors=True)
+
+    def setUp(self):
+        self.clear_dir()
+
+        mnistdata.GenerateTestData(
+            TestSampleCache.test_data_home_path, 28, 28, 20)
+
+        self.labels_db = mnistdata.MNISTLabelsFile()
+        self.images_db = mnistdata.MNISTImagesFile(self.labels_db)
+        self.labels_db.read(
+            data_home=TestSampleCache.test_data_home_path)
+        self.images_db.read(
+            data_home=TestSampleCache.test_data_home_path)
+
+    def tearDown(self):
+        self.images_db.close()
+        self.labels_db.close()
+
+        self.clear_dir()
+
+    def generate(self, sample_cache, digits, seed=1, fltrs=None):
+        return generator.generate_numbers_sequence(digits, (0, 10), 100, images=self.images_db,
+                                                   fltrs=fltrs, seed=seed, cache=sample_cache)
+
+    def test_memory_cache(self):
+        memory = cache.MemoryCache(max_bytes=250)
+
+        for key in ['a', 'b', 'c']:
+            memory.put(key, np.zeros(100, dtype=np.uint8))
+        memory.put('large', np.zeros(300, dtype=np.uint8))
+
+        self.assertIsNone(memory.get('a'))
+        self.assertIsNotNone(memory.get('b'))
+        memory.put('d', np.zeros(100, dtype=np.uint8))
+        # 'c' is the least recently used
+        self.assertIsNone(memory.get('c'))
+        self.assertIsNotNone(memory.get('b'))
+        self.assertEqual((memory.hits, memory.misses, memory.evictions, memory.nbytes), (2, 2, 2, 200))
+
+    def test_sample_cache(self):
+        sample_cache = cache.SampleCache(disk_bytes=1 << 20, data_home=TestSampleCache.test_data_home_path)
+
+        expected = self.generate(None, [1, 2, 3], fltrs=[filters.distort(18)])
+        exist = self.generate(sample_cache, [1, 2, 3], fltrs=[filters.distort(18)])
+        self.assertTrue(np.array_equal(exist, expected))
+        self.assertFalse(exist.flags.writeable)
+
+        self.assertIs(self.generate(sample_cache, [1, 2, 3], fltrs="distort:alpha=18"), exist)
+        self.generate(sample_cache, [1, 2, 3], seed=2)
+        # not cachable samples
+        self.generate(sample_cache, [1, 2, 3], seed=None)
+        self.generate(sample_cache, [1, 2, 3], fltrs=[lambda img: img])
+
+        stats = sample_cache.stats()
+        self.assertEqual((stats['memory_hits'], stats['memory_misses'], stats['bypasses']), (1, 2, 2))
+        self.assertEqual(stats['disk_misses'], 2)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(len(os.listdir(sample_cache.disk.directory)), 2)
+        # another process finds samples on a disk
+        other = cache.SampleCache(disk_bytes=1 << 20, data_home=TestSampleCache.test_data_home_path)
+        self.assertEqual(other.disk.nbytes, sample_cache.disk.nbytes)
+        self.assertTrue(np.array_equal(self.generate(other, [1, 2, 3], fltrs="distort"), expected))
+        # a memory miss served by a disk is a hit of the cache
+        self.assertEqual(other.stats()['disk_hits'], 1)
+        self.assertEqual(other.stats()['memory_misses'], 1)
+        self.assertEqual((other.stats()['hits'], other.stats()['misses']), (1, 0))
+
+    def test_disk_eviction(self):
+        sample_cache = cache.SampleCache(memory_bytes=0, disk_bytes=25000,
+                                         data_home=TestSampleCache.test_data_home_path)
+
+        for seed in range(3):
+            self.generate(sample_cache, [4, 5], seed=seed)
+        # an image is 28x100 float32 (11200 bytes), two of them are fitting
+        stats = sample_cache.stats()
+        self.assertEqual(stats['disk_evictions'], 1)
+        self.assertEqual(len(os.listdir(sample_cache.disk.directory)), 2)
+        self.assertLessEqual(stats['disk_bytes'], 25000)
+
+
+if __name__ == '__main__':
+    unittest.main()
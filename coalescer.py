@@ -0,0 +1,251 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import time
+
+if __name__.find('.')<0:
+    import batchinput
+    import generator
+    import helper
+    import mnistdata
+else:
+    from . import batchinput
+    from . import generator
+    from . import helper
+    from . import mnistdata
+
+COALESCER_MAX_BATCH_SIZE = 256
+# seconds of waiting the next requests after the first one of a batch
+COALESCER_MAX_WAIT = 0.005
+
+
+class CoalescerRequest:
+    """
+    A request of generating one image: parameters of a row (see batchinput.parse_row) and a future of a result.
+    """
+
+    def __init__(self, row, return_annotations=False):
+        self.row = row
+        self.return_annotations = return_annotations
+        self.future = concurrent.futures.Future()
+        self.submitted = time.monotonic()
+
+
+class RequestCoalescer:
+    """
+    A micro-batching layer of generating images requested concurrently, ex. by threads of a server
+    or an async front end. Requests arriving within a short window (or up to a maximum batch size) are gathering
+    to a batch which is generating by one call of generator.generate_rows: requests are grouping by compatible
+    parameters (a length of digits, a width, spacing, a mode, filters, a height and a line length)
+    and each group is generating as one batch. Results are scattering back to futures of callers.
+
+    A window starts at the first request of a batch, so a request waits at most max_wait seconds
+    before generating and a batch is limited by max_batch_size.
+    """
+
+    def __init__(self, images=None, data_home=None, max_batch_size=COALESCER_MAX_BATCH_SIZE,
+                 max_wait=COALESCER_MAX_WAIT, seed=None, sampler=None):
+        """
+        Parameters
+        ----------
+        images: object
+            A custom MNIST image db to prevent using default DB of a mnistdata module.
+
+        data_home: str  Default: None
+            A custom path of storing MNIST datafiles.
+
+        max_batch_size: int   Default: COALESCER_MAX_BATCH_SIZE
+            A maximum count of requests of a batch.
+
+        max_wait: float   Default: COALESCER_MAX_WAIT
+            Seconds of gathering requests of a batch after the first one.
+
+        seed: None, int or numpy.random.Generator   Default: None
+            A seed of random numbers of all of requests. Requests share one stream of random numbers,
+            so an image depends on an order and batching of requests.
+
+        sampler: mnistdata.EpochSampler   Default: None
+            A sampler of source images without replacement.
+        """
+        if int(max_batch_size) <= 0:
+            raise Exception("max batch size {} has to be a positive number".format(max_batch_size))
+
+        self.images = images if images is not None else mnistdata.get_images(data_home=data_home)
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = float(max_wait)
+        self.rng = helper.get_rng(seed)
+        self.sampler = sampler
+
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.requests = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.max_latency = 0.
+
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+    def submit(self, digits, spacing_range=None, image_width=None, evenly=False, filters_str=None,
+               image_height=None, line_length=None, return_annotations=False):
+        """
+        Putting a request of generating an image to a queue of the coalescer.
+
+        Parameters
+        ----------
+        digits: list of ints
+            A list-like containing digits.
+
+        spacing_range, image_width, evenly, image_height, line_length, return_annotations:
+            The same parameters as generator.generate_numbers_sequence has.
+
+        filters_str: str   Default: None
+            A string of filters, see filters.parse_filters.
+
+        Returns
+        -------
+        A concurrent.futures.Future of an image or a tuple of an image and annotations if return_annotations is set.
+
+        Raises
+        ------
+        An exception describing invalid parameters or submitting to a closed coalescer.
+        """
+        row = batchinput.parse_row({
+            'digits': "".join(str(int(digit)) for digit in digits),
+            'spacing': list(spacing_range) if spacing_range else None,
+            'image_width': image_width,
+            'evenly': bool(evenly),
+            'filters': filters_str,
+            'image_height': image_height,
+            'line_length': line_length,
+        })
+        request = CoalescerRequest(row, return_annotations=return_annotations)
+
+        with self.lock:
+            if self.closed:
+                raise Exception("coalescer is closed")
+            self.queue.put(request)
+
+        return request.future
+
+    def generate(self, digits, **kwargs):
+        """
+        Generating an image by the coalescer and waiting a result, see submit.
+        """
+        return self.submit(digits, **kwargs).result()
+
+    async def agenerate(self, digits, **kwargs):
+        """
+        Generating an image by the coalescer in an async code, see submit.
+        """
+        return await asyncio.wrap_future(self.submit(digits, **kwargs))
+
+    def __run(self):
+        """
+        A loop of a thread of the coalescer: gather a batch and generate it till getting a stop marker.
+        """
+        stop = False
+        while not stop:
+            request = self.queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    request = self.queue.get(timeout=max(0., deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+
+            self.process(batch)
+
+    def process(self, batch):
+        """
+        Generating a batch of requests and setting results of futures.
+        If a batch fails, requests are generating one by one, so an invalid request fails alone.
+
+        Parameters
+        ----------
+        batch: list of CoalescerRequest
+            Requests of a batch.
+        """
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            results = self.generate_rows([request.row for request in batch])
+        except Exception:
+            results = []
+            for request in batch:
+                try:
+                    results.append(self.generate_rows([request.row])[0])
+                except Exception as e:
+                    results.append(e)
+
+        now = time.monotonic()
+        with self.lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(batch))
+            self.max_latency = max([self.max_latency] + [now - request.submitted for request in batch])
+
+        for request, result in zip(batch, results):
+            if isinstance(result, Exception):
+                request.future.set_exception(result)
+            elif request.return_annotations:
+                request.future.set_result(result)
+            else:
+                request.future.set_result(result[0])
+
+    def generate_rows(self, rows):
+        """
+        Returns
+        -------
+        A list of tuples of an image and annotations of rows.
+        """
+        return [(img, annotations) for _, _, img, annotations in
+                generator.generate_rows(rows, images=self.images, batch_size=len(rows), seed=self.rng,
+                                        return_annotations=True, sampler=self.sampler)]
+
+    def stats(self):
+        """
+        Getting counters of the coalescer to choose a window and a batch size.
+
+        Returns
+        -------
+        A dictionary with keys: requests, batches, mean_batch, max_batch, max_latency (seconds).
+        """
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch': self.requests / self.batches if self.batches else 0.,
+                'max_batch': self.max_batch,
+                'max_latency': self.max_latency,
+            }
+
+    def close(self):
+        """
+        Generating all of the submitted requests and stopping the thread of the coalescer.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(None)
+
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
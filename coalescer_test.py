@@ -0,0 +1,98 @@
+import unittest
+import asyncio
+import shutil
+import threading
+import numpy as np
+
+if __name__.find('.')<0:
+    import coalescer
+    import mnistdata
+else:
+    from . import coalescer
+    from . import mnistdata
+
+
+class TestCoalescer(unittest.TestCase):
+    test_data_home_path = "test-data/coalescer-home"
+
+    def setUp(self):
+        shutil.rmtree(TestCoalescer.test_data_home_path, ignore_errors=True)
+
+        mnistdata.GenerateTestData(
+            TestCoalescer.test_data_home_path, 28, 28, 20, random_content=True, seed=1)
+
+        self.labels_db = mnistdata.MNISTLabelsFile()
+        self.images_db = mnistdata.MNISTImagesFile(self.labels_db)
+        self.labels_db.read(
+            data_home=TestCoalescer.test_data_home_path)
+        self.images_db.read(
+            data_home=TestCoalescer.test_data_home_path)
+
+    def tearDown(self):
+        self.images_db.close()
+        self.labels_db.close()
+
+        shutil.rmtree(TestCoalescer.test_data_home_path, ignore_errors=True)
+
+    def test_coalesce(self):
+        test_cases = [
+            ([1, 2, 3], (0, 5), 100, False, None),
+            ([4, 5], (0, 5), 100, False, None),
+            ([6, 7, 8, 9], None, 150, True, None),
+            ([0, 1], (2, 2), 80, False, 40),
+        ]
+        results = [None] * 32
+
+        with coalescer.RequestCoalescer(images=self.images_db, max_batch_size=16, max_wait=0.2, seed=3) as c:
+            def request(i):
+                digits, spacing_range, image_width, evenly, image_height = test_cases[i % len(test_cases)]
+                results[i] = c.generate(digits, spacing_range=spacing_range, image_width=image_width,
+                                        evenly=evenly, image_height=image_height, return_annotations=True)
+
+            threads = [threading.Thread(target=request, args=(i,)) for i in range(len(results))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            stats = c.stats()
+
+        for i, (img, annotations) in enumerate(results):
+            digits, _, image_width, _, image_height = test_cases[i % len(test_cases)]
+            self.assertEqual(img.shape, (image_height or 28, image_width))
+            self.assertEqual(img.dtype, np.float32)
+            self.assertEqual(annotations['digit'].tolist(), digits)
+
+        self.assertEqual(stats['requests'], len(results))
+        self.assertLessEqual(stats['max_batch'], 16)
+        self.assertLess(stats['batches'], len(results))
+
+    def test_invalid_request(self):
+        with coalescer.RequestCoalescer(images=self.images_db, max_wait=0.2, seed=3) as c:
+            with self.assertRaises(Exception):
+                c.submit([], spacing_range=(0, 2), image_width=100)
+            # too narrow image fails alone in a batch
+            futures = [c.submit([1, 2, 3], spacing_range=(0, 2), image_width=image_width)
+                       for image_width in [100, 5, 120]]
+
+            self.assertEqual(futures[0].result().shape, (28, 100))
+            with self.assertRaises(Exception):
+                futures[1].result()
+            self.assertEqual(futures[2].result().shape, (28, 120))
+
+        with self.assertRaises(Exception):
+            c.submit([1, 2], spacing_range=(0, 2), image_width=100)
+
+    def test_agenerate(self):
+        async def run(c):
+            return await asyncio.gather(*(c.agenerate([i, 9 - i], spacing_range=(0, 2), image_width=60)
+                                          for i in range(10)))
+
+        with coalescer.RequestCoalescer(images=self.images_db, seed=3) as c:
+            imgs = asyncio.run(run(c))
+
+        self.assertEqual([img.shape for img in imgs], [(28, 60)] * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import numpy as np
+
+if __name__.find('.')<0:
+    import filters
+    import generator
+    import helper
+    import mnistdata
+else:
+    from . import filters
+    from . import generator
+    from . import helper
+    from . import mnistdata
+
+# the first word of spawn keys of samples separates them from other streams of the same seed
+DATASET_SAMPLE_KEY = 2
+
+
+class SequenceDataset:
+    """
+    A map-style dataset of images of random numbers sequences generating on demand.
+    A sample is a pure function of a seed and an index: ds[i] returns the same image and digits
+    in any process and in any order, so a training framework shuffles and shards indexes
+    across workers without storing a dataset.
+    """
+
+    def __init__(self, size, length=(1, 10), spacing_range=None, image_width=None, image_height=None,
+                 line_length=None, evenly=False, fltrs=None, seed=None, data_home=None, images=None):
+        """
+        Parameters
+        ----------
+        size: int
+            A count of samples of a dataset.
+
+        length: tuple   Default: (1, 10)
+            A (minimum, maximum) pair of a count of digits of a sample.
+
+        spacing_range, image_width, image_height, line_length, evenly:
+            The same parameters as generator.generate_numbers_sequence has.
+            All images have the same size, default values are based on the longest sequence.
+
+        fltrs: str or list of functions   Default: None
+            Filters applied on digit images: a string (see filters.parse_filters) or filter functions.
+            Filters are creating once and sharing by all samples.
+
+        seed: None, int, numpy.random.SeedSequence or numpy.random.Generator   Default: None
+            A seed of a dataset, see helper.seed_entropy.
+
+        data_home: str  Default: None
+            A custom path of storing MNIST datafiles.
+
+        images: object
+            A custom MNIST image db to prevent using default DB of a mnistdata module.
+        """
+        if int(size) < 0:
+            raise Exception("size {} is a negative number".format(size))
+
+        minimum, maximum = int(length[0]), int(length[1])
+        if minimum <= 0 or minimum > maximum:
+            raise Exception("length {} has to be an ordered range of positive numbers".format(length))
+
+        self.size = int(size)
+        self.length = (minimum, maximum)
+        self.seed = helper.seed_entropy(seed)
+        self.data_home = data_home
+        self.__images = images
+
+        self.fltrs = filters.parse_filters(fltrs) if isinstance(fltrs, str) else fltrs
+        self.evenly = evenly
+        # the same size of all images
+        images = self.images
+        self.line_length = min(int(line_length or maximum), maximum)
+        self.spacing_range, self.image_width = generator.default_parameters(
+            images.digit_width(), self.line_length, spacing_range, image_width)
+        generator.check_parameters(self.line_length, self.spacing_range, self.image_width)
+        self.image_height = int(image_height or images.digit_height() * -(-maximum // self.line_length))
+
+    @property
+    def images(self):
+        """
+        An MNIST image db. The default db is opening on the first using, ex. in a worker process.
+        """
+        if self.__images is None:
+            self.__images = mnistdata.get_images(data_home=self.data_home)
+
+        return self.__images
+
+    def __len__(self):
+        return self.size
+
+    def rng(self, index):
+        """
+        Creating a source of random numbers of a sample. It depends on a seed and an index only.
+
+        Parameters
+        ----------
+        index: int
+            An index of a sample.
+
+        Returns
+        -------
+        An object of numpy.random.Generator.
+        """
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(DATASET_SAMPLE_KEY, index)))
+
+    def __getitem__(self, index):
+        """
+        Generating a sample.
+
+        Parameters
+        ----------
+        index: int
+            An index of a sample. Negative indexes are counting from the end.
+
+        Returns
+        -------
+        A tuple of a float32 image with a shape (image_height, image_width) and an int array of digits.
+
+        Raises
+        ------
+        IndexError if an index is out of a dataset.
+        """
+        index = int(index)
+        if index < 0:
+            index += self.size
+        if index < 0 or index >= self.size:
+            raise IndexError("index {} is out of a dataset of {} samples".format(index, self.size))
+
+        rng = self.rng(index)
+        digits = rng.integers(10, size=int(rng.integers(self.length[0], self.length[1], endpoint=True)))
+
+        img = generator.generate_numbers_sequence(digits, self.spacing_range, self.image_width,
+                                                  images=self.images,
+                                                  evenly=self.evenly,
+                                                  fltrs=self.fltrs,
+                                                  seed=rng,
+                                                  image_height=self.image_height,
+                                                  line_length=self.line_length)
+
+        return img, digits
+
+    def __getstate__(self):
+        """
+        A pickled dataset doesn't contain an image db, a worker process opens it by itself.
+        Filter functions are closures, so registered filters are pickling as a string of filters.
+        """
+        state = self.__dict__.copy()
+        state['_SequenceDataset__images'] = None
+
+        if self.fltrs and all(getattr(fltr, 'name', None) in filters.FILTERS for fltr in self.fltrs):
+            state['fltrs'] = ",".join(filters.format_filter(fltr.name, fltr.params) for fltr in self.fltrs)
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        if isinstance(self.fltrs, str):
+            self.fltrs = filters.parse_filters(self.fltrs)
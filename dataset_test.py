@@ -0,0 +1,73 @@
+import unittest
+import pickle
+import shutil
+import numpy as np
+
+if __name__.find('.')<0:
+    import dataset
+    import mnistdata
+else:
+    from . import dataset
+    from . import mnistdata
+
+
+class TestSequenceDataset(unittest.TestCase):
+    test_data_home_path = "test-data/dataset-home"
+
+    def clear_dir(self):
+        shutil.rmtree(TestSequenceDataset.test_data_home_path, ignore_errors=True)
+
+    def setUp(self):
+        self.clear_dir()
+
+        mnistdata.GenerateTestData(
+            TestSequenceDataset.test_data_home_path, 28, 28, 20)
+
+        self.labels_db = mnistdata.MNISTLabelsFile()
+        self.images_db = mnistdata.MNISTImagesFile(self.labels_db)
+        self.labels_db.read(
+            data_home=TestSequenceDataset.test_data_home_path)
+        self.images_db.read(
+            data_home=TestSequenceDataset.test_data_home_path)
+
+    def tearDown(self):
+        self.images_db.close()
+        self.labels_db.close()
+
+        self.clear_dir()
+
+    def test_get_item(self):
+        ds = dataset.SequenceDataset(50, length=(2, 5), spacing_range=(0, 10), fltrs="distort,noise",
+                                     seed=3, images=self.images_db)
+
+        self.assertEqual(len(ds), 50)
+        self.assertEqual((ds.image_height, ds.image_width), (28, 140))
+
+        img, digits = ds[7]
+        self.assertEqual(img.shape, (28, 140))
+        self.assertTrue(2 <= len(digits) <= 5)
+        # the same sample in any order and by another object with the same seed
+        ds[3]
+        other = dataset.SequenceDataset(50, length=(2, 5), spacing_range=(0, 10), fltrs="distort,noise",
+                                        seed=3, images=self.images_db)
+        for exist_img, exist_digits in [ds[7], other[7], ds[-43]]:
+            self.assertTrue(np.array_equal(exist_img, img))
+            self.assertTrue(np.array_equal(exist_digits, digits))
+
+        self.assertFalse(np.array_equal(ds[8][0], img))
+
+        with self.assertRaises(IndexError):
+            ds[50]
+
+    def test_pickle(self):
+        ds = dataset.SequenceDataset(10, length=(3, 3), fltrs="blur:sigma=1.5,affine", seed=1,
+                                     data_home=TestSequenceDataset.test_data_home_path)
+
+        restored = pickle.loads(pickle.dumps(ds))
+
+        self.assertEqual([fltr.params for fltr in restored.fltrs], [fltr.params for fltr in ds.fltrs])
+        self.assertTrue(np.array_equal(restored[4][0], ds[4][0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import numpy as np
+
+# images of a batch are accumulating by chunks to bound a memory of float copies
+STATS_CHUNK_SIZE = 256
+# histograms of statistics: widths of digits, spacing between digits of a line and counts of digits of images
+STATS_HISTOGRAMS = ['widths', 'spacings', 'lengths']
+
+
+class DatasetStats:
+    """
+    Mergeable statistics of a generated dataset: a mean and a standard deviation of pixels,
+    frequencies of digits and histograms of widths of digits, spacing and lengths of sequences.
+
+    Pixel moments are accumulating by Welford's algorithm with the parallel merge of Chan et al.,
+    so statistics of batches, shards and nodes are combining by merge without a second pass over images.
+    Histograms and frequencies are exact counts.
+    """
+
+    def __init__(self):
+        self.images = 0
+        self.pixels = 0
+        self.mean = 0.
+        self.m2 = 0.
+        self.digits = np.zeros(10, dtype=np.int64)
+        self.histograms = {name: np.zeros(0, dtype=np.int64) for name in STATS_HISTOGRAMS}
+
+    def add_moments(self, count, mean, m2):
+        """
+        Merging moments of a part of pixels: a count, a mean and a sum of squared deviations from a mean.
+        """
+        if count == 0:
+            return
+
+        total = self.pixels + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.pixels * count / total
+        self.pixels = total
+
+    def add_histogram(self, name, counts):
+        """
+        Adding counts of values from 0 to a histogram, a histogram is extending to a length of counts.
+        """
+        hist = self.histograms[name]
+        if len(counts) > len(hist):
+            hist = np.concatenate([hist, np.zeros(len(counts) - len(hist), dtype=np.int64)])
+        hist[:len(counts)] += counts
+        self.histograms[name] = hist
+
+    def update(self, imgs, annotations, max_value=255):
+        """
+        Accumulating statistics of a batch of images.
+
+        Parameters
+        ----------
+        imgs: ndarray
+            An array of images with a shape (count, height, width).
+
+        annotations: ndarray
+            An array of generator.ANNOTATION_DTYPE of all digits of images in the order of digits of each image.
+
+        max_value: float   Default: 255
+            A maximum value of pixels, pixels are scaling to [0, 1].
+
+        Returns
+        -------
+        The object.
+        """
+        for start in range(0, len(imgs), STATS_CHUNK_SIZE):
+            chunk = np.asarray(imgs[start:start+STATS_CHUNK_SIZE], dtype=np.float64) / max_value
+            mean = chunk.mean()
+            self.add_moments(chunk.size, mean, float(np.square(chunk - mean).sum()))
+        self.images += len(imgs)
+
+        annotations = np.asarray(annotations).ravel()
+        self.digits += np.bincount(annotations['digit'], minlength=10)[:10]
+
+        self.add_histogram('widths', np.bincount(np.maximum(annotations['x1'] - annotations['x0'], 0)))
+        # spacing between neighbour digits of the same line of an image
+        neighbours = ((annotations['sample'][1:] == annotations['sample'][:-1]) &
+                      (annotations['y0'][1:] == annotations['y0'][:-1]))
+        spacings = (annotations['x0'][1:] - annotations['x1'][:-1])[neighbours]
+        self.add_histogram('spacings', np.bincount(np.maximum(spacings, 0)))
+        _, lengths = np.unique(annotations['sample'], return_counts=True)
+        self.add_histogram('lengths', np.bincount(lengths))
+
+        return self
+
+    def merge(self, other):
+        """
+        Merging statistics of another part of a dataset.
+
+        Returns
+        -------
+        The object.
+        """
+        self.images += other.images
+        self.add_moments(other.pixels, other.mean, other.m2)
+        self.digits += other.digits
+        for name in STATS_HISTOGRAMS:
+            self.add_histogram(name, other.histograms[name])
+
+        return self
+
+    def std(self):
+        """
+        Returns
+        -------
+        A standard deviation of pixels.
+        """
+        return float(np.sqrt(self.m2 / self.pixels)) if self.pixels else 0.
+
+    def to_dict(self):
+        """
+        Returns
+        -------
+        A JSON serializable dictionary with keys: images, pixels, mean, std, m2 (a sum of squared deviations),
+        digits (counts of digits from 0 to 9) and histograms widths, spacings, lengths
+        (a count of each value from 0).
+        """
+        result = {
+            'images': int(self.images),
+            'pixels': int(self.pixels),
+            'mean': float(self.mean),
+            'std': self.std(),
+            'm2': float(self.m2),
+            'digits': self.digits.tolist(),
+        }
+        result.update((name, self.histograms[name].tolist()) for name in STATS_HISTOGRAMS)
+
+        return result
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Restoring statistics stored by to_dict.
+        """
+        stats = cls()
+        stats.images = int(values['images'])
+        stats.pixels = int(values['pixels'])
+        stats.mean = float(values['mean'])
+        stats.m2 = float(values['m2'])
+        stats.digits = np.array(values['digits'], dtype=np.int64)
+        for name in STATS_HISTOGRAMS:
+            stats.histograms[name] = np.array(values[name], dtype=np.int64)
+
+        return stats
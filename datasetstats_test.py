@@ -0,0 +1,73 @@
+import unittest
+import json
+import numpy as np
+
+if __name__.find('.')<0:
+    import datasetstats
+    import generator
+else:
+    from . import datasetstats
+    from . import generator
+
+
+class TestDatasetStats(unittest.TestCase):
+    def annotations(self, lengths, rng):
+        annotations = np.zeros(int(sum(lengths)), dtype=generator.ANNOTATION_DTYPE)
+        annotations['sample'] = np.repeat(np.arange(len(lengths)), lengths)
+        annotations['digit'] = rng.integers(10, size=len(annotations))
+        # digits of 10 pixels with a spacing of 2 pixels, 3 digits per line
+        position = np.concatenate([np.arange(length) for length in lengths])
+        annotations['x0'] = position % 3 * 12
+        annotations['x1'] = annotations['x0'] + 10
+        annotations['y0'] = position // 3 * 28
+
+        return annotations
+
+    def test_update(self):
+        rng = np.random.default_rng(1)
+        imgs = rng.integers(256, size=(600, 28, 40), dtype=np.uint8)
+        lengths = rng.integers(1, 7, size=len(imgs))
+        annotations = self.annotations(lengths, rng)
+
+        stats = datasetstats.DatasetStats().update(imgs, annotations).to_dict()
+
+        self.assertEqual(stats['images'], 600)
+        self.assertEqual(stats['pixels'], imgs.size)
+        self.assertAlmostEqual(stats['mean'], (imgs / 255.).mean(), places=12)
+        self.assertAlmostEqual(stats['std'], (imgs / 255.).std(), places=12)
+        self.assertEqual(stats['digits'], np.bincount(annotations['digit'], minlength=10).tolist())
+        self.assertEqual(stats['widths'], [0] * 10 + [len(annotations)])
+        # neighbour digits of a line: a length minus a count of lines
+        self.assertEqual(stats['spacings'], [0, 0, int((lengths - -(-lengths // 3)).sum())])
+        self.assertEqual(stats['lengths'], np.bincount(lengths).tolist())
+
+    def test_merge(self):
+        rng = np.random.default_rng(2)
+        parts = []
+        for count, value in [(10, 0), (200, 100), (1, 255), (57, 30)]:
+            imgs = np.clip(rng.normal(value, 20, size=(count, 28, 30)), 0, 255).astype(np.uint8)
+            lengths = rng.integers(1, 9, size=count)
+            parts.append((imgs, self.annotations(lengths, rng)))
+
+        expected = datasetstats.DatasetStats()
+        for imgs, annotations in parts:
+            expected.update(imgs, annotations)
+
+        merged = datasetstats.DatasetStats()
+        for imgs, annotations in parts:
+            part = datasetstats.DatasetStats().update(imgs, annotations)
+            # statistics pass through JSON like stored ones
+            merged.merge(datasetstats.DatasetStats.from_dict(json.loads(json.dumps(part.to_dict()))))
+
+        all_imgs = np.concatenate([imgs for imgs, _ in parts]) / 255.
+        self.assertAlmostEqual(merged.mean, all_imgs.mean(), places=12)
+        self.assertAlmostEqual(merged.std(), all_imgs.std(), places=12)
+        for key, value in expected.to_dict().items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(merged.to_dict()[key], value, delta=1e-9 * abs(value))
+            else:
+                self.assertEqual(merged.to_dict()[key], value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,274 @@
+import functools
+import inspect
+import warnings
 import numpy as np
-import random
 from skimage.transform import resize as rz
 from scipy.ndimage.filters import gaussian_filter
+from scipy.ndimage import gaussian_filter1d, map_coordinates
+
+if __name__.find('.')<0:
+    import helper
+else:
+    from . import helper
+
+# registered filters by names, see register_filter
+FILTERS = {}
+# the same truncating of a gaussian kernel as scipy.ndimage has
+RESIZE_GAUSSIAN_TRUNCATE = 4.0
+# modes of resizing from the fastest to the best quality, see resize_axis
+RESIZE_MODES = ['nearest', 'area', 'linear', 'cubic']
+RESIZE_DEFAULT_MODE = 'linear'
+# modes of resizing a window of an axis, a cubic spline of a window depends on a whole axis
+RESIZE_WINDOW_MODES = ['nearest', 'area', 'linear']
+
+
+class FilterInfo:
+    """
+    A declaration of a registered filter: a factory of filter functions, parameters with default values
+    and properties of filter functions.
+    """
+
+    def __init__(self, name, factory, params, batched=False, inplace=False, random=False, out=False,
+                 description=''):
+        """
+        Parameters
+        ----------
+        name: str
+            A name of a filter using in a filters string, ex. "blur".
+
+        factory: function
+            A function creating a filter function.
+
+        params: dict
+            Parameters of a factory with default values using by the console tool.
+            A type of a default value defines a type of a parameter.
+
+        batched: bool   Default: False
+            A filter function accepts a stack of images with a shape (N, height, width).
+
+        inplace: bool   Default: False
+            A filter function changes a passed array and returns it instead of allocating a new one.
+
+        random: bool   Default: False
+            A filter function accepts a keyword parameter rng - a source of random numbers.
+
+        out: bool   Default: False
+            A filter function accepts a keyword parameter out - an array to write a result to.
+
+        description: str   Default: ''
+            A short description of a filter.
+        """
+        self.name = name
+        self.factory = factory
+        self.params = params
+        self.batched = batched
+        self.inplace = inplace
+        self.random = random
+        self.out = out
+        self.description = description
+
+    def create(self, **params):
+        """
+        Creating a filter function with default parameters of a declaration replaced by passed ones.
+
+        Returns
+        -------
+        A filter function.
+        """
+        unknown = [key for key in params if key not in self.params]
+        if unknown:
+            raise Exception("filter '{}': unknown parameters {}, supported are {}".format(
+                self.name, unknown, list(self.params)))
+
+        values = dict(self.params)
+        values.update(params)
+
+        return self.factory(**values)
+
+    def describe(self):
+        """
+        Returns
+        -------
+        A line describing a filter: a format with default parameters, properties and a description.
+        """
+        properties = [prop for prop in ['batched', 'inplace', 'random', 'out'] if getattr(self, prop)]
+
+        return "{} [{}] {}".format(format_filter(self.name, self.params), ",".join(properties), self.description)
+
+
+def register_filter(name, batched=False, inplace=False, random=False, out=False, deprecated=None, **params):
+    """
+    A decorator registering a factory of filter functions with a name.
+    Each created filter function gets attributes: name, params (values of parameters of a factory),
+    batched, inplace, random and out, so a pipeline chooses a way of applying a filter by them.
+
+    Parameters
+    ----------
+    name: str
+        A name of a filter using in a filters string, ex. "blur".
+
+    batched, inplace, random, out:
+        Properties of filter functions, see FilterInfo.
+
+    deprecated: dict   Default: None
+        Deprecated names of keyword parameters of a factory mapped to current ones, ex. {'v': 'sigma'}.
+        A deprecated name is accepting with a DeprecationWarning.
+
+    params:
+        Parameters of a factory with default values using by the console tool.
+
+    Returns
+    -------
+    A decorator.
+    """
+    def register(factory):
+        signature = inspect.signature(factory)
+
+        @functools.wraps(factory)
+        def create(*args, **kwargs):
+            for old, new in (deprecated or {}).items():
+                if old in kwargs:
+                    warnings.warn("parameter '{}' of a filter '{}' is deprecated, use '{}'".format(old, name, new),
+                                  DeprecationWarning, stacklevel=2)
+                    kwargs[new] = kwargs.pop(old)
+
+            fltr = factory(*args, **kwargs)
+
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+
+            fltr.name = name
+            fltr.params = {key: value for key, value in arguments.arguments.items() if key != 'rng'}
+            fltr.batched = batched
+            fltr.inplace = inplace
+            fltr.random = random
+            fltr.out = out
+
+            return fltr
+
+        description = (inspect.getdoc(factory) or '').split("\n")[0]
+        FILTERS[name] = FilterInfo(name, create, params,
+                                   batched=batched, inplace=inplace, random=random, out=out,
+                                   description=description)
+
+        return create
+
+    return register
+
+
+def parse_param(default, value):
+    """
+    Converting a string value of a parameter to a type of a default value of the parameter.
+    A tuple is written as values separated by a slash, ex. "0.8/1.2".
+
+    Parameters
+    ----------
+    default: object
+        A default value of a parameter.
+
+    value: str
+        A string value.
+
+    Returns
+    -------
+    A converted value.
+    """
+    if isinstance(default, tuple):
+        return tuple(float(part) for part in value.split("/"))
+    if isinstance(default, bool):
+        return value.lower() in ['1', 'true', 'yes', 'on', 'y']
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+
+    return value
+
+
+def format_filter(name, params):
+    """
+    Formatting a filter to a string which parse_filters accepts, ex. "blur:sigma=1.5".
+
+    Parameters
+    ----------
+    name: str
+        A name of a filter.
+
+    params: dict
+        Values of parameters.
+
+    Returns
+    -------
+    A string of a filter.
+    """
+    parts = [name]
+    for key, value in params.items():
+        if isinstance(value, tuple):
+            value = "/".join(str(v) for v in value)
+        parts.append("{}={}".format(key, value))
+
+    return ":".join(parts)
+
+
+def parse_filters(filters_str):
+    """
+    Parsing a string to a list of filter functions using registered filters.
+    Filters are separated by comma, parameters of a filter are following a name and separated by colon,
+    ex. "blur:sigma=1.5,distort:alpha=10". Missed parameters get default values of a declaration.
+
+    Parameters
+    ----------
+    filters_str: str
+        A string of filters.
+
+    Returns
+    -------
+    A list of filter functions.
+
+    Raises
+    ------
+    An exception describing an unknown filter or parameter.
+    """
+    fltrs = []
+    for part in str(filters_str or '').split(","):
+        part = part.strip()
+        if not part:
+            continue
+
+        name, *params = part.split(":")
+        name = name.strip().lower()
+        if name not in FILTERS:
+            raise Exception("unknown filter '{}', supported are {}".format(name, list(FILTERS)))
+
+        info = FILTERS[name]
+        values = {}
+        for param in params:
+            key, separator, value = param.partition("=")
+            key = key.strip()
+            if not separator or key not in info.params:
+                raise Exception("filter '{}': invalid parameter '{}', supported are {}".format(
+                    name, param, list(info.params)))
+
+            values[key] = parse_param(info.params[key], value.strip())
+
+        fltrs.append(info.create(**values))
+
+    return fltrs
+
+
+def describe_filters():
+    """
+    Returns
+    -------
+    A list of lines describing registered filters, see FilterInfo.describe.
+    """
+    return [info.describe() for info in FILTERS.values()]
 
 
 def invert(max_v):
     """
     A filter is inverting each pixel on an interval [0, max_v]
+    A result might be written to a passed array: invert(max_v)(img, out=buffer).
 
     Parameters
     ----------
@@ -17,12 +279,23 @@ def invert(max_v):
     --------
     A function will apply on ndarray.
     """
-    return np.vectorize(lambda x: np.uint8(max_v-x))
+    def invert_image(img, out=None):
+        img = np.asarray(img)
+        if out is None:
+            out = np.empty(img.shape, dtype=np.uint8)
+
+        return np.subtract(max_v, img, out=out, casting='unsafe')
+
+    invert_image.batched = True
+    invert_image.out = True
+
+    return invert_image
 
 
 def normalize(max_v):
     """
     A filter is normalize each float value on an interval [0.0, 1.0]
+    A result might be written to a passed array: normalize(max_v)(img, out=buffer).
 
     Parameters
     ----------
@@ -33,10 +306,50 @@ def normalize(max_v):
     --------
     A function will apply on ndarray.
     """
-    return np.vectorize(lambda x: x/np.float32(max_v))
+    def normalize_image(img, out=None):
+        img = np.asarray(img)
+        if out is None:
+            out = np.empty(img.shape, dtype=np.float32)
+
+        return np.divide(img, np.float32(max_v), out=out, casting='unsafe')
+
+    normalize_image.batched = True
+    normalize_image.out = True
+
+    return normalize_image
+
+
+def invert_normalize(max_v):
+    """
+    A filter is inverting and normalizing each pixel on an interval [0.0, 1.0] by one pass: (max_v - x) / max_v.
+    It is the same as invert and normalize one by one without an intermediate array.
+    A result might be written to a passed array: invert_normalize(max_v)(img, out=buffer).
+
+    Parameters
+    ----------
+    max_v: int
+        A maximum value of an array.
+
+    Returns
+    --------
+    A function will apply on ndarray.
+    """
+    def invert_normalize_image(img, out=None):
+        img = np.asarray(img)
+        if out is None:
+            out = np.empty(img.shape, dtype=np.float32)
 
+        np.subtract(np.float32(max_v), img, out=out, casting='unsafe')
 
-def resize_seq(digit_width_seq, default=0):
+        return np.divide(out, np.float32(max_v), out=out)
+
+    invert_normalize_image.batched = True
+    invert_normalize_image.out = True
+
+    return invert_normalize_image
+
+
+def resize_seq(digit_width_seq, default=0, mode=RESIZE_DEFAULT_MODE):
     """
     A filter is resizing ndarray on X-axis.
     A new width to resize array will get from a sequence to getting evenly sized images.
@@ -52,6 +365,9 @@ def resize_seq(digit_width_seq, default=0):
     default: int   Default: 0
         A default value of a finished sequence.
 
+    mode: str   Default: RESIZE_DEFAULT_MODE
+        A mode of resizing, see resize_axis.
+
     Returns
     --------
     A function will apply on ndarray.
@@ -59,27 +375,260 @@ def resize_seq(digit_width_seq, default=0):
     def resize_image(img):
         digit_width = next(digit_width_seq, default)
         if digit_width and digit_width != default:
-            return rz(img, (img.shape[0], digit_width),  mode='wrap')
+            return resize_axis(img, digit_width, mode=mode)
         else:
             return img
 
     return resize_image
 
-def resize(width):
+def resize_axis(img, size, axis=-1, mode=RESIZE_DEFAULT_MODE):
+    """
+    Resizing an axis of ndarray.
+
+    Modes:
+        nearest - the nearest source element, an integer upscale repeats elements,
+            an integer downscale takes each n-th element;
+        area - an average of source elements covered by a result element, an integer upscale repeats elements,
+            an integer downscale averages groups of elements by a reshape;
+        linear - a linear interpolation with anti-aliasing of downsampling (skimage.transform.resize, order 1);
+        cubic - a bicubic interpolation with anti-aliasing of downsampling (skimage.transform.resize, order 3),
+            the best quality and the slowest one.
+    A linear and a cubic mode wrap borders of an axis.
+
+    Parameters
+    ----------
+    img: ndarray
+        A float array.
+
+    size: int
+        A new length of an axis.
+
+    axis: int   Default: -1
+        An axis of resizing.
+
+    mode: str   Default: RESIZE_DEFAULT_MODE
+        A mode of resizing, one of RESIZE_MODES.
+
+    Returns
+    -------
+    A float32 array.
+    """
+    if mode not in RESIZE_MODES:
+        raise Exception("unknown resize mode '{}', supported are {}".format(mode, RESIZE_MODES))
+
+    axis = axis % img.ndim
+    old_size = img.shape[axis]
+    if mode in ['linear', 'cubic']:
+        shape = img.shape[:axis] + (size,) + img.shape[axis + 1:]
+        return rz(img, shape, order=1 if mode == 'linear' else 3, mode='wrap').astype(np.float32, copy=False)
+
+    img = img.astype(np.float32, copy=False)
+    # integer ratios are repeating or reshaping without resampling
+    if size % old_size == 0:
+        return np.repeat(img, size // old_size, axis=axis)
+    if old_size % size == 0:
+        factor = old_size // size
+        if mode == 'nearest':
+            return img[(slice(None),) * axis + (slice(factor // 2, None, factor),)].copy()
+        return img.reshape(img.shape[:axis] + (size, factor) + img.shape[axis + 1:]).mean(axis=axis + 1)
+
+    scale = old_size / size
+    if mode == 'nearest':
+        indexes = np.minimum(((np.arange(size) + 0.5) * scale).astype(np.int64), old_size - 1)
+        return np.take(img, indexes, axis=axis)
+    # an area of a source axis in [0, x) is interpolating linearly by a cumulative sum
+    cumsum = np.cumsum(img, axis=axis, dtype=np.float64)
+    cumsum = np.concatenate([np.zeros_like(np.take(cumsum, [0], axis=axis)), cumsum], axis=axis)
+    bounds = np.arange(size + 1) * scale
+    left = np.minimum(bounds.astype(np.int64), old_size - 1)
+    shape = [1] * img.ndim
+    shape[axis] = size + 1
+    weights = (bounds - left).reshape(shape)
+    area = np.take(cumsum, left, axis=axis) + np.take(np.diff(cumsum, axis=axis), left, axis=axis) * weights
+
+    return (np.diff(area, axis=axis) / scale).astype(np.float32)
+
+def resize(width, mode=RESIZE_DEFAULT_MODE):
     """
     A filter is resizing ndarray on X-axis.
+    A stack of images with a shape (N, height, width) is resizing at once.
 
     Parameters
     ----------
     width: int
         A target width of the image
 
+    mode: str   Default: RESIZE_DEFAULT_MODE
+        A mode of resizing, see resize_axis.
+
     Returns
     -------
     A function will apply on ndarray.
     """
+    if mode not in RESIZE_MODES:
+        raise Exception("unknown resize mode '{}', supported are {}".format(mode, RESIZE_MODES))
+
     def resize_image(img):
-        return rz(img, (img.shape[0], width),  mode='wrap')
+        return resize_axis(img, width, mode=mode)
+
+    resize_image.batched = True
+
+    return resize_image
+
+def resize_window(size, new_size, start, stop, mode=RESIZE_DEFAULT_MODE):
+    """
+    Planning a resizing of an axis of a length size to new_size for a window [start, stop) of a result.
+    It is the same resizing as resize has, but a window needs just a part of a source axis.
+
+    Parameters
+    ----------
+    size: int
+        A length of a source axis.
+
+    new_size: int
+        A length of a result axis.
+
+    start, stop: int
+        A window of a result axis.
+
+    mode: str   Default: RESIZE_DEFAULT_MODE
+        A mode of resizing, one of RESIZE_WINDOW_MODES.
+
+    Returns
+    -------
+    A tuple of source indexes required by a window (an int array, indexes are wrapped into [0, size)),
+    a sigma of an anti-aliasing gaussian filter and float positions of result elements in an array of source indexes:
+    positions of source elements (nearest), bounds of covered areas (area, stop - start + 1 bounds)
+    or positions of interpolated elements (linear). A sigma is zero for nearest and area modes.
+    """
+    if mode not in RESIZE_WINDOW_MODES:
+        raise Exception("resize mode '{}' is not supported by a window, supported are {}".format(
+            mode, RESIZE_WINDOW_MODES))
+
+    scale = size / new_size
+    if mode == 'nearest':
+        positions = np.minimum(((np.arange(start, stop) + 0.5) * scale).astype(np.int64), size - 1)
+        return np.arange(positions[0], positions[-1] + 1), 0., positions - positions[0]
+    if mode == 'area':
+        bounds = np.arange(start, stop + 1) * scale
+        first = min(int(bounds[0]), size - 1)
+        last = min(int(bounds[-1]), size - 1)
+        return np.arange(first, last + 1), 0., bounds - first
+
+    sigma = max(0., (scale - 1) / 2)
+    # a margin of a gaussian kernel: source elements around a window affecting it
+    radius = int(RESIZE_GAUSSIAN_TRUNCATE * sigma + 0.5)
+
+    positions = (np.arange(start, stop) + 0.5) * scale - 0.5
+    first = int(np.floor(positions[0])) - radius
+    last = int(np.floor(positions[-1])) + 1 + radius
+
+    return np.arange(first, last + 1) % size, sigma, positions - first
+
+def resize_columns(src, sigma, positions, mode=RESIZE_DEFAULT_MODE):
+    """
+    Resizing a window of columns planned by resize_window.
+
+    Parameters
+    ----------
+    src: ndarray
+        A float array with columns of source indexes of a window in the last axis.
+
+    sigma, positions:
+        A plan of a window, see resize_window.
+
+    mode: str   Default: RESIZE_DEFAULT_MODE
+        A mode of resizing of a plan.
+
+    Returns
+    -------
+    A float32 array of result columns of a window.
+    """
+    if mode == 'nearest':
+        return src[..., positions].astype(np.float32, copy=False)
+    if mode == 'area':
+        # the same interpolation of a cumulative sum as resize_axis has, but from the first column of a window
+        cumsum = np.cumsum(src, axis=-1, dtype=np.float64)
+        cumsum = np.concatenate([np.zeros(src.shape[:-1] + (1,)), cumsum], axis=-1)
+        left = np.minimum(positions.astype(np.int64), src.shape[-1] - 1)
+        area = cumsum[..., left] + src[..., left] * (positions - left)
+
+        return (np.diff(area, axis=-1) / np.diff(positions)).astype(np.float32)
+
+    if sigma > 0:
+        src = gaussian_filter1d(src, sigma, axis=-1, mode='wrap', truncate=RESIZE_GAUSSIAN_TRUNCATE)
+
+    left = np.floor(positions).astype(np.int64)
+    weights = (positions - left).astype(np.float32)
+    left_columns, right_columns = src[..., left], src[..., left + 1]
+
+    return left_columns + (right_columns - left_columns) * weights
+
+def resize_lines(lines, widths, width):
+    """
+    Resizing a batch of lines of different widths to the same width at once.
+    It is the same linear interpolation with anti-aliasing of downsampling and a wrap mode of borders
+    as resize has (up to rounding errors), but interpolating all of lines by one pass
+    instead of resizing each width separately.
+
+    Parameters
+    ----------
+    lines: ndarray
+        A float array with a shape (count, height, maximum width), a line i takes the first widths[i] columns.
+
+    widths: ndarray
+        An int array of widths of lines.
+
+    width: int
+        A width of result lines.
+
+    Returns
+    -------
+    A float32 array with a shape (count, height, width).
+    """
+    widths = np.asarray(widths, dtype=np.int64)
+    scales = widths / width
+    # anti-aliasing of downsampled lines, lines of the same width are filtering at once
+    for line_width in np.unique(widths[scales > 1]):
+        rows = np.flatnonzero(widths == line_width)
+        lines[rows, :, :line_width] = gaussian_filter1d(lines[rows, :, :line_width], (line_width / width - 1) / 2,
+                                                        axis=-1, mode='wrap', truncate=RESIZE_GAUSSIAN_TRUNCATE)
+
+    positions = (np.arange(width) + 0.5) * scales[:, None] - 0.5
+    left = np.floor(positions).astype(np.int64)
+    weights = (positions - left).astype(np.float32)[:, None, :]
+
+    rows = np.arange(len(lines))[:, None, None]
+    ys = np.arange(lines.shape[1])[None, :, None]
+    left_columns = lines[rows, ys, (left % widths[:, None])[:, None, :]]
+    right_columns = lines[rows, ys, ((left + 1) % widths[:, None])[:, None, :]]
+
+    return left_columns + (right_columns - left_columns) * weights
+
+def resize_height(height, mode=RESIZE_DEFAULT_MODE):
+    """
+    A filter is resizing ndarray on Y-axis.
+    A stack of images with a shape (N, height, width) is resizing at once.
+
+    Parameters
+    ----------
+    height: int
+        A target height of the image
+
+    mode: str   Default: RESIZE_DEFAULT_MODE
+        A mode of resizing, see resize_axis.
+
+    Returns
+    -------
+    A function will apply on ndarray.
+    """
+    if mode not in RESIZE_MODES:
+        raise Exception("unknown resize mode '{}', supported are {}".format(mode, RESIZE_MODES))
+
+    def resize_image(img):
+        return resize_axis(img, height, axis=-2, mode=mode)
+
+    resize_image.batched = True
 
     return resize_image
     
@@ -111,7 +660,7 @@ def spacing_seq(spacing_width_seq, max_v, default=None):
     def add_spacing(img):
         space_width = next(spacing_width_seq, default)
         if space_width:
-            space = np.zeros(shape=(28, space_width), dtype=np.float32)
+            space = np.zeros(shape=(img.shape[0], space_width), dtype=np.float32)
             space.fill(1.0)
             return np.concatenate((img, space), axis=1)
         else:
@@ -120,28 +669,35 @@ def spacing_seq(spacing_width_seq, max_v, default=None):
     return add_spacing
 
 
-def blur(v=2):
+@register_filter('blur', batched=True, out=True, deprecated={'v': 'sigma'}, sigma=1.0)
+def blur(sigma=2):
     """
     A filter is blurring an image.
+    It is a batched filter: a stack of images with a shape (N, height, width) is blurring at once.
+    A result might be written to a passed array, see apply_filter.
 
     Parameters
     ----------
-    v: int   Default: 2
-        A coefficient of blurring. Use larger value to increase a blurring.
+    sigma: float   Default: 2
+        A standard deviation of a gaussian kernel. Use larger value to increase a blurring.
+        A filters string (ex. "blur") uses 1.0 as the console tool always did.
+        The former name v is accepting with a DeprecationWarning.
 
     Returns
     --------
     A function will apply on ndarray.
     """
-    def blur_image(img):
-        return gaussian_filter(img, sigma=v)
+    def blur_image(img, out=None):
+        return gaussian_filter(img, sigma=(0,) * (np.ndim(img) - 2) + (sigma, sigma), output=out)
 
     return blur_image
 
 
-def distort(alpha):
+@register_filter('distort', batched=True, inplace=True, random=True, alpha=18)
+def distort(alpha, rng=None):
     """
     A filter is distorting an image using random horizontal rolling each line.
+    It is a random filter: a source of random numbers might be passed on each call, see apply_filter.
 
     Parameters
     ----------
@@ -150,18 +706,374 @@ def distort(alpha):
         each X-axis row of ndarray represented an image.
         Recommended value from 5 to 20.
 
+    rng: numpy.random.Generator   Default: None
+        A default source of random numbers using if a call doesn't pass another one.
+
     Returns
     --------
     A function will apply on ndarray.
     """
-    def distort_image(img):
-        A = img.shape[0] / 1.5
+    default_rng = rng
+
+    def distort_image(img, rng=None):
+        rng = helper.get_rng(rng if rng is not None else default_rng)
 
-        def shift(x): return A * (random.randrange(0, alpha)/100)
+        A = img.shape[-2] / 1.5
 
-        for i in range(img.shape[0]):
-            img[i, :] = np.roll(img[i, :], int(shift(i)))
+        shifts = (A * (rng.integers(0, alpha, size=img.shape[:-1])/100)).astype(int)
+        # roll each line at once
+        columns = (np.arange(img.shape[-1]) - shifts[..., None]) % img.shape[-1]
+        img[...] = np.take_along_axis(img, columns, axis=-1)
 
         return img
 
     return distort_image
+
+
+@register_filter('elastic', batched=True, random=True, out=True, alpha=34.0, sigma=4.0)
+def elastic(alpha=34, sigma=4, rng=None):
+    """
+    A filter is deforming an image using a random smoothed displacement field (elastic deformation).
+    It is a random and batched filter: displacement fields of all images of a stack with a shape (N, height, width)
+    are smoothing by one call of gaussian_filter and all images are sampling by one call of map_coordinates.
+    A result might be written to a passed array, see apply_filter.
+
+    Parameters
+    ----------
+    alpha: float    Default: 34
+        A scale of displacement in pixels.
+
+    sigma: float    Default: 4
+        A smoothing of a displacement field. Use smaller value to get more local deformation.
+
+    rng: numpy.random.Generator   Default: None
+        A default source of random numbers using if a call doesn't pass another one.
+
+    Returns
+    --------
+    A function will apply on ndarray.
+    """
+    default_rng = rng
+
+    def elastic_image(img, rng=None, out=None):
+        rng = helper.get_rng(rng if rng is not None else default_rng)
+
+        stack = np.asarray(img, dtype=np.float32)
+        stack = stack.reshape((-1,) + stack.shape[-2:])
+
+        displacement = rng.uniform(-1, 1, size=(2,) + stack.shape).astype(np.float32)
+        displacement = gaussian_filter(displacement, sigma=(0, 0, sigma, sigma), mode='constant') * alpha
+
+        coordinates = np.indices(stack.shape, dtype=np.float32)
+        coordinates[1:] += displacement
+
+        output = np.float32 if out is None else out.reshape(stack.shape)
+        result = map_coordinates(stack, coordinates, order=1, mode='nearest', output=output)
+
+        return result.reshape(np.shape(img))
+
+    return elastic_image
+
+
+@register_filter('affine', batched=True, random=True, out=True,
+                 rotation=10.0, shear=0.2, scale=(0.9, 1.1), cval=1.0)
+def affine(rotation=10, shear=0.2, scale=(0.9, 1.1), cval=1.0, rng=None):
+    """
+    A filter is transforming an image by a random affine transformation: rotation, shear and scale
+    around a center of an image.
+    It is a random and batched filter: coordinates of all images of a stack with a shape (N, height, width)
+    are transforming by one matrix product and all images are sampling by one call of map_coordinates.
+    A result might be written to a passed array, see apply_filter.
+
+    Parameters
+    ----------
+    rotation: float    Default: 10
+        A maximum angle of rotation in degrees. An angle is choosing in [-rotation, rotation].
+
+    shear: float    Default: 0.2
+        A maximum shear coefficient. A coefficient is choosing in [-shear, shear].
+
+    scale: tuple    Default: (0.9, 1.1)
+        A (minimum, maximum) pair of a scale coefficient.
+
+    cval: float    Default: 1.0
+        A value of pixels outside of a source image. It is white for a generated image.
+
+    rng: numpy.random.Generator   Default: None
+        A default source of random numbers using if a call doesn't pass another one.
+
+    Returns
+    --------
+    A function will apply on ndarray.
+    """
+    default_rng = rng
+
+    def affine_image(img, rng=None, out=None):
+        rng = helper.get_rng(rng if rng is not None else default_rng)
+
+        stack = np.asarray(img, dtype=np.float32)
+        stack = stack.reshape((-1,) + stack.shape[-2:])
+        count, height, width = stack.shape
+
+        angle = np.deg2rad(rng.uniform(-rotation, rotation, size=count))
+        shr = rng.uniform(-shear, shear, size=count)
+        zoom = rng.uniform(scale[0], scale[1], size=count)
+        # an inverse transformation: a pixel of the result image -> a point of a source image
+        cos, sin = np.cos(angle), np.sin(angle)
+        matrix = np.empty((count, 2, 2), dtype=np.float32)
+        matrix[:, 0, 0] = cos / zoom
+        matrix[:, 0, 1] = (cos * shr - sin) / zoom
+        matrix[:, 1, 0] = sin / zoom
+        matrix[:, 1, 1] = (sin * shr + cos) / zoom
+
+        center = np.array([(height - 1) / 2, (width - 1) / 2], dtype=np.float32)
+        grid = np.indices((height, width), dtype=np.float32).reshape(2, -1) - center[:, None]
+
+        coordinates = np.empty((3, count, height * width), dtype=np.float32)
+        coordinates[0] = np.arange(count)[:, None]
+        coordinates[1:] = np.einsum('nij,jk->ink', matrix, grid) + center[:, None, None]
+
+        output = np.float32 if out is None else out.reshape(stack.shape)
+        result = map_coordinates(stack, coordinates.reshape((3,) + stack.shape),
+                                 order=1, mode='constant', cval=cval, output=output)
+
+        return result.reshape(np.shape(img))
+
+    return affine_image
+
+
+@register_filter('noise', batched=True, random=True, out=True, sigma=0.1)
+def noise(sigma=0.1, rng=None):
+    """
+    A filter is adding a gaussian noise to an image and clipping values to [0.0, 1.0].
+    It is a random and batched filter. A noise is generating right into a result array,
+    which might be passed, see apply_filter.
+
+    Parameters
+    ----------
+    sigma: float    Default: 0.1
+        A standard deviation of a noise.
+
+    rng: numpy.random.Generator   Default: None
+        A default source of random numbers using if a call doesn't pass another one.
+
+    Returns
+    --------
+    A function will apply on ndarray.
+    """
+    default_rng = rng
+
+    def noise_image(img, rng=None, out=None):
+        rng = helper.get_rng(rng if rng is not None else default_rng)
+
+        img = np.asarray(img, dtype=np.float32)
+        if out is None:
+            out = np.empty(img.shape, dtype=np.float32)
+
+        rng.standard_normal(dtype=np.float32, out=out)
+        out *= np.float32(sigma)
+        out += img
+
+        return np.clip(out, 0., 1., out=out)
+
+    return noise_image
+
+
+def filter_name(fltr):
+    """
+    Getting a short name of a filter function, ex. "blur" for a function created by blur().
+
+    Parameters
+    ----------
+    fltr: function
+        A filter function.
+
+    Returns
+    --------
+    A name of a filter.
+    """
+    if hasattr(fltr, 'name'):
+        return fltr.name
+
+    name = getattr(fltr, '__qualname__', None) or type(fltr).__name__
+
+    return name.split('.')[0]
+
+
+def apply_filter(fltr, img, rng=None, out=None):
+    """
+    Applying a filter on an image.
+    A random filter (a filter function has an attribute "random") is getting a source of random numbers,
+    so a result of it is reproducible.
+    A filter writing to a passed array (a filter function has an attribute "out") is getting an array of a result,
+    so a pipeline reuses buffers instead of allocating a new array on each stage.
+
+    Parameters
+    ----------
+    fltr: function
+        A filter function.
+
+    img: ndarray
+        An image.
+
+    rng: numpy.random.Generator   Default: None
+        A source of random numbers for random filters.
+
+    out: ndarray   Default: None
+        A C-contiguous float32 array with a shape of a result. It has not to share memory with an image.
+        A filter without the attribute "out" ignores it and returns a new array.
+
+    Returns
+    --------
+    A filtered image.
+    """
+    kwargs = {}
+    if getattr(fltr, 'random', False):
+        kwargs['rng'] = rng
+    if out is not None and getattr(fltr, 'out', False):
+        kwargs['out'] = out
+
+    return fltr(img, **kwargs)
+
+
+def apply_filters(fltrs, img, rng=None):
+    """
+    Applying filters on an image or a stack of images one by one.
+
+    Parameters
+    ----------
+    fltrs: list of functions
+        Filter functions.
+
+    img: ndarray
+        An image or a stack of images if all of filters are batched, see is_batched.
+
+    rng: numpy.random.Generator   Default: None
+        A source of random numbers for random filters.
+
+    Returns
+    --------
+    A filtered image.
+    """
+    for fltr in fltrs:
+        img = apply_filter(fltr, img, rng=rng)
+
+    return img
+
+
+def is_batched(fltrs):
+    """
+    Checking filters might apply on a stack of images with a shape (N, height, width) at once.
+    A batched filter function has an attribute "batched".
+
+    Parameters
+    ----------
+    fltrs: list of functions
+        Filter functions.
+
+    Returns
+    --------
+    True if all of filters are batched.
+    """
+    return all(getattr(fltr, 'batched', False) for fltr in fltrs)
+
+
+def apply_filters_stack(fltrs, stack, rng=None, pool=None):
+    """
+    Applying filters on a stack of images with a shape (N, height, width) one by one.
+    A batched filter is applying on the whole stack by one call,
+    another one is applying on each image of the stack and has to keep a shape of an image.
+    If a pool is passed, filters writing to a passed array are alternating two buffers of the pool
+    (ping-pong buffers), so a chain of filters doesn't allocate arrays of results.
+
+    Parameters
+    ----------
+    fltrs: list of functions
+        Filter functions.
+
+    stack: ndarray
+        A stack of images.
+
+    rng: numpy.random.Generator   Default: None
+        A source of random numbers for random filters.
+
+    pool: BufferPool   Default: None
+        A pool of buffers. A result might be a buffer of the pool which is valid till the next using of the pool.
+
+    Returns
+    --------
+    A filtered stack of images.
+    """
+    slots = ['ping', 'pong']
+    for fltr in fltrs:
+        if getattr(fltr, 'batched', False):
+            out = None
+            if pool is not None and getattr(fltr, 'out', False):
+                out = pool.get(stack.shape, slot=slots[0])
+                if np.shares_memory(out, stack):
+                    slots.reverse()
+                    out = pool.get(stack.shape, slot=slots[0])
+
+            stack = apply_filter(fltr, stack, rng=rng, out=out)
+        else:
+            for index in range(len(stack)):
+                stack[index] = apply_filter(fltr, stack[index], rng=rng)
+
+    return stack
+
+
+class BufferPool:
+    """
+    A pool of scratch arrays reusing between stages and batches of a pipeline.
+    A buffer is a flat array of a slot growing to the largest requested size,
+    an array of a requested shape is a view of it, so varying shapes don't allocate new memory.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+        self.allocations = 0
+
+    def get(self, shape, dtype=np.float32, slot=0):
+        """
+        Getting an array of a shape from a buffer of a slot.
+        A content of an array is undefined and it is valid till the next getting of the slot.
+
+        Parameters
+        ----------
+        shape: tuple
+            A shape of an array.
+
+        dtype: numpy.dtype   Default: float32
+            A type of elements.
+
+        slot: object   Default: 0
+            A name of a buffer. Arrays using at the same time have to get different slots.
+
+        Returns
+        -------
+        A C-contiguous array.
+        """
+        shape = tuple(int(v) for v in shape)
+        size = int(np.prod(shape))
+        key = (slot, np.dtype(dtype).str)
+
+        buffer = self.buffers.get(key)
+        if buffer is None or buffer.size < size:
+            buffer = self.buffers[key] = np.empty(max(size, 1), dtype=dtype)
+            self.allocations += 1
+
+        return buffer[:size].reshape(shape)
+
+    def nbytes(self):
+        """
+        Returns
+        -------
+        A size of all of buffers in bytes.
+        """
+        return sum(buffer.nbytes for buffer in self.buffers.values())
+
+    def clear(self):
+        """
+        Releasing all of buffers.
+        """
+        self.buffers = {}
@@ -25,10 +25,22 @@ class TestMnistDataFetch(unittest.TestCase):
     def test_normalize(self):
         mormalizer = filters.normalize(10)
 
-        expected = np.array([.0, .1, .2, .3, .4, .5, .6, .7, .8, .9])
+        expected = np.array([.0, .1, .2, .3, .4, .5, .6, .7, .8, .9], dtype=np.float32)
         exist = mormalizer([i for i in range(10)])
 
         self.assertTrue(np.array_equal(exist, expected))
+        self.assertEqual(exist.dtype, np.float32)
+
+    def test_invert_normalize(self):
+        img = np.arange(256, dtype=np.uint8).reshape(2, 8, 16)
+
+        expected = filters.normalize(255)(filters.invert(255)(img))
+
+        out = np.empty(img.shape, dtype=np.float32)
+        exist = filters.invert_normalize(255)(img, out=out)
+
+        self.assertIs(exist, out)
+        self.assertTrue(np.array_equal(exist, expected))
 
     def test_resize_seq(self):
         resizer = filters.resize_seq((1+i*2 for i in range(10)), 0)
@@ -59,6 +71,192 @@ class TestMnistDataFetch(unittest.TestCase):
 
         self.assertEqual((28, 250), img.shape)
 
+    def test_resize_height(self):
+        resizer = filters.resize_height(40)
+
+        self.assertEqual(resizer(np.zeros(shape=(28, 10), dtype=np.float32)).shape, (40, 10))
+        self.assertEqual(resizer(np.zeros(shape=(3, 28, 10), dtype=np.float32)).shape, (3, 40, 10))
+
+    def test_resize_window(self):
+        rng = np.random.default_rng(1)
+        for mode in filters.RESIZE_WINDOW_MODES:
+            for size, new_size in [(1000, 230), (300, 300), (100, 250), (5000, 333), (90, 30)]:
+                img = rng.random((28, size)).astype(np.float32)
+                expected = filters.resize(new_size, mode=mode)(img)
+
+                tiles = []
+                for start in range(0, new_size, 37):
+                    indexes, sigma, positions = filters.resize_window(size, new_size, start,
+                                                                      min(start + 37, new_size), mode=mode)
+                    tiles.append(filters.resize_columns(img[:, indexes], sigma, positions, mode=mode))
+
+                np.testing.assert_allclose(np.concatenate(tiles, axis=1), expected, atol=1e-5)
+
+        with self.assertRaises(Exception):
+            filters.resize_window(1000, 230, 0, 37, mode='cubic')
+
+    def test_resize_lines(self):
+        rng = np.random.default_rng(2)
+        widths = np.array([1000, 230, 57, 300, 120, 57])
+        lines = rng.random((len(widths), 28, widths.max())).astype(np.float32)
+
+        expected = np.stack([filters.resize(300)(line[:, :width]) for line, width in zip(lines, widths)])
+
+        np.testing.assert_allclose(filters.resize_lines(lines, widths, 300), expected, atol=1e-5)
+
+    def test_resize_modes(self):
+        img = np.random.default_rng(3).random((2, 5, 28)).astype(np.float32)
+
+        for width in [7, 10, 14, 28, 40, 56]:
+            scale = 28 / width
+            # a nearest mode takes a source pixel of a center of a result pixel
+            indexes = np.minimum(((np.arange(width) + 0.5) * scale).astype(np.int64), 27)
+            self.assertTrue(np.array_equal(filters.resize(width, mode='nearest')(img), img[..., indexes]))
+            # an area mode averages covered pixels
+            expected = np.zeros((2, 5, width))
+            for j in range(width):
+                for i in range(28):
+                    expected[..., j] += img[..., i] * max(0., min((j + 1) * scale, i + 1) - max(j * scale, i))
+            np.testing.assert_allclose(filters.resize(width, mode='area')(img), expected / scale, atol=1e-6)
+
+            for mode in filters.RESIZE_MODES:
+                self.assertEqual(filters.resize(width, mode=mode)(img).shape, (2, 5, width))
+                self.assertEqual(filters.resize_height(width, mode=mode)(img).shape, (2, width, 28))
+
+        self.assertTrue(np.array_equal(filters.resize(56, mode='area')(img), np.repeat(img, 2, axis=-1)))
+        with self.assertRaises(Exception):
+            filters.resize(10, mode='bad')
+
+    def test_distort(self):
+        img = np.tile(np.arange(28, dtype=np.float32), (28, 1))
+
+        exist = filters.apply_filter(filters.distort(18), img.copy(), rng=np.random.default_rng(3))
+        expected = filters.distort(18, rng=np.random.default_rng(3))(img.copy())
+
+        self.assertTrue(np.array_equal(exist, expected))
+        self.assertEqual(exist.shape, img.shape)
+
+    def test_batched_filters(self):
+        stack = np.random.default_rng(0).random((4, 28, 30)).astype(np.float32)
+
+        test_cases = [
+            filters.blur(1),
+            filters.distort(18),
+            filters.elastic(alpha=20, sigma=3),
+            filters.affine(),
+            filters.noise(0.2),
+        ]
+
+        for fltr in test_cases:
+            self.assertTrue(filters.is_batched([fltr]))
+
+            exist = filters.apply_filter(fltr, stack.copy(), rng=np.random.default_rng(1))
+            self.assertEqual(exist.shape, stack.shape)
+            self.assertEqual(exist.dtype, np.float32)
+
+            exist = filters.apply_filter(fltr, stack[0].copy(), rng=np.random.default_rng(1))
+            self.assertEqual(exist.shape, stack[0].shape)
+
+        # a stack is processing as independent images
+        exist = filters.blur(1)(stack)
+        expected = np.stack([filters.blur(1)(img) for img in stack])
+        self.assertTrue(np.allclose(exist, expected))
+
+        # no deformation with zero parameters
+        test_cases = [
+            filters.elastic(alpha=0),
+            filters.affine(rotation=0, shear=0, scale=(1, 1)),
+            filters.noise(0),
+        ]
+
+        for fltr in test_cases:
+            exist = filters.apply_filter(fltr, stack, rng=np.random.default_rng(1))
+            self.assertTrue(np.allclose(exist, stack, atol=1e-5))
+
+        self.assertFalse(filters.is_batched([filters.blur(1), lambda img: img]))
+
+    def test_parse_filters(self):
+        fltrs = filters.parse_filters("blur:sigma=1.5, distort:alpha=10,affine:scale=0.8/1.2,noise")
+
+        self.assertEqual([filters.filter_name(fltr) for fltr in fltrs], ['blur', 'distort', 'affine', 'noise'])
+        self.assertEqual(fltrs[0].params, {'sigma': 1.5})
+        self.assertEqual(fltrs[1].params, {'alpha': 10})
+        self.assertEqual(fltrs[2].params['scale'], (0.8, 1.2))
+        self.assertEqual(fltrs[3].params, {'sigma': 0.1})
+        self.assertTrue(fltrs[1].random and fltrs[1].batched and fltrs[1].inplace)
+        # a factory keeps its default, a filters string has the default of the console tool
+        self.assertEqual(filters.blur().params, {'sigma': 2})
+        self.assertEqual(filters.parse_filters("blur")[0].params, {'sigma': 1.0})
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(filters.blur(v=2).params, {'sigma': 2})
+        self.assertFalse(fltrs[0].random)
+
+        self.assertEqual(filters.format_filter(fltrs[2].name, fltrs[2].params),
+                         "affine:rotation=10.0:shear=0.2:scale=0.8/1.2:cval=1.0")
+        self.assertEqual(filters.parse_filters(""), [])
+        self.assertEqual(len(filters.describe_filters()), len(filters.FILTERS))
+
+        test_cases = ["unknown", "blur:v=1", "blur:sigma", "distort:alpha=x"]
+        for test_case in test_cases:
+            with self.assertRaises(Exception, msg=test_case):
+                filters.parse_filters(test_case)
+
+    def test_out_filters(self):
+        stack = np.random.default_rng(0).random((4, 28, 30)).astype(np.float32)
+
+        test_cases = [
+            filters.blur(1),
+            filters.elastic(),
+            filters.affine(),
+            filters.noise(),
+        ]
+
+        for fltr in test_cases:
+            out = np.empty_like(stack)
+
+            exist = filters.apply_filter(fltr, stack, rng=np.random.default_rng(1), out=out)
+            expected = filters.apply_filter(fltr, stack, rng=np.random.default_rng(1))
+
+            self.assertTrue(np.shares_memory(exist, out), msg=filters.filter_name(fltr))
+            self.assertTrue(np.array_equal(exist, expected), msg=filters.filter_name(fltr))
+
+    def test_buffer_pool(self):
+        pool = filters.BufferPool()
+
+        a = pool.get((4, 28, 30))
+        b = pool.get((2, 28, 10))
+        self.assertEqual(b.shape, (2, 28, 10))
+        self.assertTrue(np.shares_memory(a, b))
+        self.assertEqual(pool.allocations, 1)
+
+        c = pool.get((4, 28, 30), dtype=np.uint8)
+        d = pool.get((4, 28, 30), slot='other')
+        self.assertFalse(np.shares_memory(a, d))
+        self.assertEqual(c.dtype, np.uint8)
+        self.assertEqual(pool.allocations, 3)
+        # a chain of filters is alternating two buffers
+        stack = np.random.default_rng(0).random((4, 28, 30)).astype(np.float32)
+        fltrs = [filters.blur(1), filters.noise(0), filters.blur(1)]
+
+        exist = filters.apply_filters_stack(fltrs, stack.copy(), pool=pool)
+        expected = filters.apply_filters_stack(fltrs, stack.copy())
+        self.assertTrue(np.allclose(exist, expected))
+
+        allocations = pool.allocations
+        filters.apply_filters_stack(fltrs, stack.copy(), pool=pool)
+        self.assertEqual(pool.allocations, allocations)
+
+    def test_apply_filters_stack(self):
+        stack = np.random.default_rng(0).random((4, 28, 30)).astype(np.float32)
+
+        def flip(img):
+            return img[:, ::-1]
+
+        exist = filters.apply_filters_stack([filters.blur(1), flip], stack.copy())
+        expected = np.stack([flip(filters.blur(1)(img)) for img in stack])
+
+        self.assertTrue(np.allclose(exist, expected))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,19 +1,38 @@
-import imageio
+import os
 import re
 import numpy as np
 
 if __name__.find('.')<0:
     import filters
     import argsparser
+    import batchinput
     import helper
     import mnistdata
+    import writer
 else:
     from . import filters
     from . import argsparser
+    from . import batchinput
     from . import mnistdata
     from . import helper
+    from . import writer
 
 GENERATOR_MINIMUM_IMAGE_WIDTH = 10
+GENERATOR_BATCH_SIZE = 256
+
+# an annotation of one digit of a generated image:
+# a sample index in a batch, a digit, an index of a source MNIST image,
+# a bounding box in pixels of the result image (x1, y1 are excluded) and names of applied filters
+ANNOTATION_DTYPE = np.dtype([
+    ('sample', np.int64),
+    ('digit', np.uint8),
+    ('index', np.int64),
+    ('x0', np.int32),
+    ('x1', np.int32),
+    ('y0', np.int32),
+    ('y1', np.int32),
+    ('filters', 'U64'),
+])
 
 def default_parameters(digit_width, digits_len, spacing_range, image_width):
     """
@@ -111,7 +130,7 @@ def check_parameters(digits_len, spacing_range, image_width):
         raise Exception("; ".join(errors))
 
 def get_filters(digit_width, digit_max_value, digits_len, spacing_range, image_width,
-                evenly=False, fltrs=None):
+                evenly=False, fltrs=None, resize_mode=filters.RESIZE_DEFAULT_MODE):
     """
     Getting complete list of filters to process a digit images: resizing, spacing, etc.
 
@@ -139,6 +158,9 @@ def get_filters(digit_width, digit_max_value, digits_len, spacing_range, image_w
         A list-like containing functions. Each of them will apply on a digit image and modify it
         before adding to sequence.
 
+    resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing digits and sequences, see filters.resize_axis.
+
     Return
     ------
     A list-like containing filter functions.
@@ -163,7 +185,7 @@ def get_filters(digit_width, digit_max_value, digits_len, spacing_range, image_w
         spacing=spacing_range)
     # add default post process filters
     processing_filters.append(filters.resize_seq(
-        digit_width_seq, default=digit_width))
+        digit_width_seq, default=digit_width, mode=resize_mode))
     processing_filters.append(filters.spacing_seq(
         spacing_width_seq, digit_max_value))
 
@@ -171,7 +193,7 @@ def get_filters(digit_width, digit_max_value, digits_len, spacing_range, image_w
     if not evenly:
         if fltrs:
             postprocessing_filters += fltrs
-        postprocessing_filters.append(filters.resize(image_width))
+        postprocessing_filters.append(filters.resize(image_width, mode=resize_mode))
 
     return processing_filters, postprocessing_filters
 
@@ -179,10 +201,18 @@ def generate_numbers_sequence(digits, spacing_range, image_width,
                               data_home=None,
                               images=None,
                               evenly=False,
-                              fltrs=None):
+                              fltrs=None,
+                              seed=None,
+                              image_height=None,
+                              line_length=None,
+                              return_annotations=False,
+                              cache=None,
+                              tight=False,
+                              resize_mode=filters.RESIZE_DEFAULT_MODE):
     """
     Generate an image that contains the sequence of given numbers, spaced evenly or
     randomly using a uniform distribution.
+    A long sequence might wrap into lines of a page.
 
     Parameters
     ----------
@@ -213,40 +243,527 @@ def generate_numbers_sequence(digits, spacing_range, image_width,
         A list-like containing functions. Each of them will apply on a digit image and modify it
         before adding to sequence.
 
+    seed: None, int or numpy.random.Generator   Default: None
+        A seed of random numbers: choosing digit images, spacing and random filters.
+        The same seed and parameters produce the same image. See helper.get_rng.
+
+    image_height: int    Default: None
+        A height of the image in pixels. A height of a digit image multiplied by a count of lines is using if it is None.
+        A page is resizing to the height once after assembling all of lines.
+
+    line_length: int    Default: None
+        A maximum count of digits in one line. A sequence is placing in one line if it is None.
+        Each line has the image_width, the last line might be shorter.
+
+    return_annotations: boolean    Default: False
+        A flag to return annotations of digits with the image.
+
+    cache: cache.SampleCache    Default: None
+        A cache of generated images keyed by generation parameters.
+        Images with an int seed and registered filters are taking from a cache, a cached image is read-only.
+        Annotations are not caching, a call returning them generates an image.
+
+    tight: boolean    Default: False
+        A flag to crop digit images to ink columns (see mnistdata.MNISTImagesFile.ink) before placing them,
+        so a spacing is between ink of digits instead of blank margins of source images.
+        It is supported by a random layout only.
+
+    resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing digits, lines and a height of a page: nearest, area, linear or cubic,
+        see filters.resize_axis. Fast modes trade a quality for a speed.
+
     Returns
     -------
     The image containing the sequence of numbers. The image is representing
     as floating point 32bits numpy arrays with a scale ranging from 0 (black) to 1 (white).
+    If return_annotations is set, a tuple of the image and an array of ANNOTATION_DTYPE
+    with an annotation of each digit: a digit, an index of a source image, a bounding box and filters.
+    """
+    if cache is not None and not return_annotations:
+        if images is None:
+            images = mnistdata.get_images(data_home=data_home)
+
+        key = cache.key(images, digits, spacing_range, image_width, evenly=evenly, fltrs=fltrs, seed=seed,
+                        image_height=image_height, line_length=line_length, tight=tight,
+                        resize_mode=resize_mode)
+
+        return cache.fetch(key, lambda: generate_numbers_sequence(digits, spacing_range, image_width,
+                                                                  images=images,
+                                                                  evenly=evenly,
+                                                                  fltrs=fltrs,
+                                                                  seed=seed,
+                                                                  image_height=image_height,
+                                                                  line_length=line_length,
+                                                                  tight=tight,
+                                                                  resize_mode=resize_mode))
+
+    result = generate_numbers_batch([digits], spacing_range, image_width,
+                                    data_home=data_home,
+                                    images=images,
+                                    evenly=evenly,
+                                    fltrs=fltrs,
+                                    seed=seed,
+                                    image_height=image_height,
+                                    line_length=line_length,
+                                    return_annotations=return_annotations,
+                                    tight=tight,
+                                    resize_mode=resize_mode)
+    if return_annotations:
+        return result[0][0], result[1][0]
+
+    return result[0]
+
+def generate_numbers_batch(digits_batch, spacing_range, image_width,
+                           data_home=None,
+                           images=None,
+                           evenly=False,
+                           fltrs=None,
+                           seed=None,
+                           image_height=None,
+                           line_length=None,
+                           return_annotations=False,
+                           pool=None,
+                           sampler=None,
+                           tight=False,
+                           resize_mode=filters.RESIZE_DEFAULT_MODE):
+    """
+    Generate a batch of images of numbers sequences of the same length at once.
+    Each line of sequences is assembling for all of the batch at once (see assemble_line),
+    lines are stacking vertically to a page and a height of a page is resizing once.
+
+    Parameters
+    ----------
+    digits_batch: 2D list-like of ints
+        A list-like containing sequences of digits with the same length.
+
+    spacing_range, image_width, data_home, images, evenly, fltrs, seed, image_height, line_length,
+    return_annotations:
+        The same parameters as generate_numbers_sequence has.
+
+    pool: filters.BufferPool   Default: None
+        A pool of scratch buffers of assembling lines. Pass the same pool to reuse buffers between batches.
+
+    sampler: mnistdata.EpochSampler   Default: None
+        A sampler of source images without replacement per digit.
+        Images are choosing randomly with replacement if it is None.
+
+    tight: boolean    Default: False
+        A flag to crop digit images to ink, see generate_numbers_sequence.
+
+    resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing, see generate_numbers_sequence.
+
+    Returns
+    -------
+    An array with a shape (count of sequences, image_height, image_width) containing images of sequences.
+    The image is representing as floating point 32bits numpy arrays with a scale ranging from 0 (black) to 1 (white).
+    If return_annotations is set, a tuple of images and an array of ANNOTATION_DTYPE
+    with a shape (count of sequences, count of digits).
     """
     # get MNIST images db
     if images is None:
         images = mnistdata.get_images(data_home=data_home)
+
+    digits_batch = np.asarray(digits_batch, dtype=np.int64) % 10
+    if digits_batch.ndim != 2:
+        raise Exception("a batch has to contain sequences of the same length")
+
+    count, digits_len = digits_batch.shape
+    digit_width, digit_height = images.digit_width(), images.digit_height()
+    if tight and evenly:
+        raise Exception("tight packing of digits is supported by a random layout only")
+    if resize_mode not in filters.RESIZE_MODES:
+        raise Exception("unknown resize mode '{}', supported are {}".format(resize_mode, filters.RESIZE_MODES))
+    # split a sequence to lines
+    line_length = min(int(line_length or digits_len), digits_len)
+    if line_length <= 0:
+        raise Exception("line length {} is negative numbers or zero".format(line_length))
+    line_count = -(-digits_len // line_length)
     # set default values
-    spacing_range, image_width = default_parameters(images.digit_width(), len(digits), spacing_range, image_width)
+    spacing_range, image_width = default_parameters(digit_width, line_length, spacing_range, image_width)
+
+    check_parameters(line_length, spacing_range, image_width)
+
+    image_height = int(image_height) if image_height else digit_height * line_count
+    if image_height <= 0:
+        raise Exception("image height {} is negative numbers or zero".format(image_height))
+
+    rng = helper.get_rng(seed)
+    if pool is None:
+        pool = filters.BufferPool()
+    # assemble lines of all sequences, the last line might be shorter and keeps a width of digits
+    result_img = np.ones(shape=(count, digit_height * line_count, image_width), dtype=np.float32)
+    annotations = np.zeros(shape=(count, digits_len), dtype=ANNOTATION_DTYPE)
+    for line_index, start in enumerate(range(0, digits_len, line_length)):
+        line = digits_batch[:, start:start+line_length]
+        line_width = image_width
+        if line.shape[1] < line_length:
+            line_width = max(1, int(round(image_width * line.shape[1] / line_length)))
+
+        y = line_index * digit_height
+        result_img[:, y:y+digit_height, :line_width], line_annotations = assemble_line(
+            line, spacing_range, line_width, images,
+            evenly=evenly,
+            fltrs=fltrs,
+            rng=rng,
+            pool=pool,
+            sampler=sampler,
+            tight=tight,
+            resize_mode=resize_mode)
+
+        line_annotations['y0'] = y
+        line_annotations['y1'] = y + digit_height
+        annotations[:, start:start+line_length] = line_annotations
+    # resize a height of a page once
+    if image_height != result_img.shape[1]:
+        scale = image_height / result_img.shape[1]
+        for field in ['y0', 'y1']:
+            annotations[field] = np.round(annotations[field] * scale)
+
+        result_img = filters.resize_height(image_height, mode=resize_mode)(result_img)
+
+    if not return_annotations:
+        return result_img
+
+    annotations['sample'] = np.arange(count)[:, None]
+    annotations['filters'] = ",".join(filters.filter_name(fltr) for fltr in fltrs or [])
+
+    return result_img, annotations
+
+def assemble_line(digits_batch, spacing_range, image_width, images,
+                  evenly=False,
+                  fltrs=None,
+                  rng=None,
+                  pool=None,
+                  sampler=None,
+                  tight=False,
+                  resize_mode=filters.RESIZE_DEFAULT_MODE):
+    """
+    Assemble one line of a batch of sequences of the same length.
+    A layout (widths of digits and spacing) is planning for all of the batch by one call,
+    source images are taking from MNIST db by one call and all of digits are placing
+    to a canvas using offsets calculated by a cumulative sum of a layout.
+
+    Parameters
+    ----------
+    digits_batch: ndarray
+        An int array of digits from 0 to 9 with a shape (count of sequences, count of digits).
 
-    check_parameters(len(digits), spacing_range, image_width)
-    # get image filters
-    processing_filters, postprocessing_filters = get_filters(
-        images.digit_width(), images.max_value(),
-        len(digits), spacing_range, image_width,
-        evenly=evenly,
-        fltrs=fltrs)
-    # prepare init array
-    result_img = np.zeros(shape=(28, 0), dtype=np.float32)
-    # add all digits into image, but slicing it to get a on digit numbers
-    for digit in [d%10 for d in digits]:
-        img = images[digit]
+    spacing_range: tuple
+        A (minimum, maximum) pair (tuple), representing the min and max spacing between digits.
+
+    image_width: int
+        A width of a line in pixels.
+
+    images: object
+        An MNIST image db.
+
+    evenly, fltrs:
+        The same parameters as generate_numbers_sequence has.
+
+    rng: numpy.random.Generator   Default: None
+        A source of random numbers.
+
+    pool: filters.BufferPool   Default: None
+        A pool of scratch buffers: source images, digits, a canvas and results of filters are written to
+        buffers of the pool instead of allocating new arrays.
+
+    sampler: mnistdata.EpochSampler   Default: None
+        A sampler of source images. The labels db is sampling with replacement if it is None.
+
+    tight: boolean    Default: False
+        A flag to crop digit images to ink columns. Widths of digits of a layout are widths of ink,
+        so source images are choosing before planning a layout.
+
+    resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing digits and lines, see filters.resize_axis.
+
+    Returns
+    -------
+    A tuple of an array with a shape (count of sequences, digit height, image_width) containing images of lines
+    (it is a buffer of the pool valid till the next using of the pool)
+    and an array of ANNOTATION_DTYPE with a shape (count of sequences, count of digits)
+    containing digits, indexes of source images and X-axis bounds of digits.
+    """
+    count, digits_len = digits_batch.shape
+    digit_width, digit_height = images.digit_width(), images.digit_height()
+    max_v = images.max_value()
+    if tight:
+        indexes = (sampler or images.labels).sample(digits_batch, rng=rng)
+        ink = images.ink()[indexes]
+    # plan a layout of all of sequences
+    if evenly:
+        widths, spacings = helper.evenly_layout(count, digit_width=digit_width, digit_count=digits_len,
+                                                image_width=image_width, spacing=spacing_range)
+    else:
+        widths, spacings = helper.randomly_layout(count, digit_width=digit_width, digit_count=digits_len,
+                                                  image_width=image_width, spacing=spacing_range, rng=rng)
+    if tight:
+        widths = (ink['x1'] - ink['x0']).astype(np.int64)
+    offsets, total_widths = helper.layout_offsets(widths, spacings)
+    if pool is None:
+        pool = filters.BufferPool()
+    # get all digit images: invert and normalize them by one pass
+    if not tight:
+        indexes = (sampler or images.labels).sample(digits_batch, rng=rng)
+    shape = indexes.shape + (digit_height, digit_width)
+    digit_imgs = images.take(indexes, out=pool.get(shape, dtype=np.uint8, slot='source'))
+    digit_imgs = filters.invert_normalize(max_v)(digit_imgs, out=pool.get(shape, slot='digits'))
+
+    # apply batched filters on all digits at once, another ones on each digit
+    if evenly and fltrs:
+        stack = digit_imgs.reshape((-1,) + digit_imgs.shape[2:])
+        digit_imgs = filters.apply_filters_stack(fltrs, stack, rng=rng, pool=pool).reshape(digit_imgs.shape)
+    # place digits of the same width into a canvas at once
+    result_img = pool.get((count, digit_height, int(total_widths.max())), slot='canvas')
+    result_img.fill(1.)
+    for width in np.unique(widths):
+        rows, columns = np.nonzero(widths == width)
+
+        stack = digit_imgs[rows, columns]
+        if tight:
+            # crop ink columns of each digit
+            x = ink['x0'][rows, columns][:, None] + np.arange(width)
+            stack = stack[np.arange(len(stack))[:, None, None], np.arange(digit_height)[None, :, None], x[:, None, :]]
+        elif width != digit_width:
+            stack = filters.resize(int(width), mode=resize_mode)(stack)
+
+        x = offsets[rows, columns][:, None] + np.arange(width)
+        result_img[rows[:, None, None], np.arange(digit_height)[None, :, None], x[:, None, :]] = stack
+    # annotate digits, a randomly layout will be resized to the image width
+    annotations = np.zeros(shape=(count, digits_len), dtype=ANNOTATION_DTYPE)
+    annotations['digit'] = digits_batch
+    annotations['index'] = indexes
+
+    scale = 1. if evenly else image_width / total_widths[:, None]
+    annotations['x0'] = np.round(offsets * scale)
+    annotations['x1'] = np.round((offsets + widths) * scale)
+    # an evenly layout has a width of the image, another one needs post processing
+    if evenly:
+        return result_img, annotations
+
+    images_batch = pool.get((count, digit_height, image_width), slot='line')
+    # lines of any widths are resizing at once without filters
+    if not fltrs and resize_mode == 'linear':
+        images_batch[:] = filters.resize_lines(result_img, total_widths, image_width)
+        return images_batch, annotations
+
+    postprocessing_filters = list(fltrs or []) + [filters.resize(image_width, mode=resize_mode)]
+    # sequences of the same width are processing at once if filters are supporting it
+    if filters.is_batched(postprocessing_filters):
+        for total_width in np.unique(total_widths):
+            rows = np.flatnonzero(total_widths == total_width)
+            images_batch[rows] = filters.apply_filters_stack(postprocessing_filters,
+                                                             result_img[rows, :, :total_width], rng=rng, pool=pool)
+    else:
+        for index in range(count):
+            images_batch[index] = filters.apply_filters(postprocessing_filters,
+                                                        result_img[index, :, :total_widths[index]], rng=rng)
+
+    return images_batch, annotations
+
+def generate_numbers_sequences(digits_seqs, spacing_range, image_width,
+                               data_home=None,
+                               images=None,
+                               evenly=False,
+                               fltrs=None,
+                               seed=None,
+                               image_height=None,
+                               line_length=None,
+                               return_annotations=False,
+                               sampler=None,
+                               tight=False,
+                               resize_mode=filters.RESIZE_DEFAULT_MODE):
+    """
+    Generate a batch of images of numbers sequences sharing the same generation parameters.
+    Sequences are grouping by a length and each group is generating by one call of generate_numbers_batch.
 
-        for fltr in processing_filters:
-            img = fltr(img)
+    Parameters
+    ----------
+    digits_seqs: list of lists of ints
+        A list-like containing sequences of digits. Each of them will be generated as a separate image.
 
-        result_img = np.concatenate((result_img, img), axis=1)
+    spacing_range, image_width, data_home, images, evenly, fltrs, seed, image_height, line_length,
+    return_annotations:
+        The same parameters as generate_numbers_sequence has.
 
-    # apply post processing filters
-    for fltr in postprocessing_filters:
-        result_img = fltr(result_img)
+    sampler: mnistdata.EpochSampler   Default: None
+        A sampler of source images without replacement, see generate_numbers_batch.
 
-    return result_img
+    tight: boolean    Default: False
+        A flag to crop digit images to ink, see generate_numbers_sequence.
+
+    resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing, see generate_numbers_sequence.
+
+    Returns
+    -------
+    A list of images in the same order as sequences.
+    If return_annotations is set, a tuple of a list of images and a list of arrays of annotations,
+    the "sample" field of annotations is an index of a sequence.
+    """
+    if images is None:
+        images = mnistdata.get_images(data_home=data_home)
+
+    rng = helper.get_rng(seed)
+    pool = filters.BufferPool()
+
+    groups = {}
+    for index, digits in enumerate(digits_seqs):
+        groups.setdefault(len(digits), []).append(index)
+
+    result = [None] * len(digits_seqs)
+    result_annotations = [None] * len(digits_seqs)
+    for indexes in groups.values():
+        imgs, annotations = generate_numbers_batch([digits_seqs[i] for i in indexes], spacing_range, image_width,
+                                                   images=images,
+                                                   evenly=evenly,
+                                                   fltrs=fltrs,
+                                                   seed=rng,
+                                                   image_height=image_height,
+                                                   line_length=line_length,
+                                                   return_annotations=True,
+                                                   pool=pool,
+                                                   sampler=sampler,
+                                                   tight=tight,
+                                                   resize_mode=resize_mode)
+        annotations['sample'] = np.array(indexes)[:, None]
+
+        for index, img, annotation in zip(indexes, imgs, annotations):
+            result[index] = img
+            result_annotations[index] = annotation
+
+    if return_annotations:
+        return result, result_annotations
+
+    return result
+
+def parse_filters(filters_str):
+    """
+    Parsing a string to a list-like which contains filter functions to modify digit image.
+
+    Parameters
+    ----------
+    filters_str: str
+        A string containing registered filters separated comma with optional parameters,
+        ex. "blur:sigma=1.5,distort:alpha=10", see filters.parse_filters.
+
+    Returns
+    -------
+    A list-like containing filter functions.
+    """
+    return filters.parse_filters(filters_str)
+
+def generate_rows(rows, spacing_range=None, image_width=None,
+                  data_home=None,
+                  images=None,
+                  evenly=False,
+                  filters_str=None,
+                  batch_size=GENERATOR_BATCH_SIZE,
+                  seed=None,
+                  image_height=None,
+                  line_length=None,
+                  return_annotations=False,
+                  sampler=None,
+                  tight=False,
+                  resize_mode=filters.RESIZE_DEFAULT_MODE):
+    """
+    Generate images of rows of a manifest (see batchinput module) in one process.
+    Rows are processing by batches. Rows of a batch are grouping by compatible generation parameters
+    and each group is generating by one call of generate_numbers_batch.
+    Empty parameters of a row are replacing by the default parameters of the function.
+
+    Parameters
+    ----------
+    rows: list of dicts
+        Rows of a manifest containing generation parameters.
+
+    spacing_range, image_width, evenly, image_height, line_length:
+        Default generation parameters, see generate_numbers_sequence.
+
+    data_home: str  Default: None
+        A custom path of storing MNIST datafiles.
+
+    images: object
+        A custom MNIST image db to prevent using default DB of a mnistdata module.
+
+    filters_str: str   Default: None
+        A default list of names of filters separated comma.
+
+    batch_size: int    Default: GENERATOR_BATCH_SIZE
+        A count of rows processing at once.
+
+    seed: None, int or numpy.random.Generator   Default: None
+        A seed of random numbers of all rows. Rows are using one stream of random numbers,
+        so the same manifest, seed and batch size produce the same images.
+
+    return_annotations: boolean    Default: False
+        A flag to return annotations of digits with each image.
+
+    sampler: mnistdata.EpochSampler   Default: None
+        A sampler of source images without replacement, see generate_numbers_batch.
+
+    tight: boolean    Default: False
+        A flag to crop digit images to ink, see generate_numbers_sequence.
+
+    resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing, see generate_numbers_sequence.
+
+    Returns
+    -------
+    A generator of tuples (row index, row, image) in the order of rows.
+    If return_annotations is set, tuples are (row index, row, image, annotations),
+    the "sample" field of annotations is a row index.
+    """
+    if images is None:
+        images = mnistdata.get_images(data_home=data_home)
+
+    rng = helper.get_rng(seed)
+    # scratch buffers are reusing by all of batches
+    pool = filters.BufferPool()
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start+batch_size]
+        # group rows of a batch by generation parameters
+        groups = {}
+        for index, row in enumerate(batch, start):
+            # a value of a row overrides a default one even if it is false (ex. evenly: false)
+            def value(name, default):
+                return row[name] if row.get(name) is not None else default
+
+            params = (len(row['digits']),
+                      value('spacing', spacing_range),
+                      value('image_width', image_width),
+                      value('evenly', evenly),
+                      value('filters', filters_str),
+                      value('image_height', image_height),
+                      value('line_length', line_length))
+            groups.setdefault(params, []).append(index)
+
+        results = {}
+        for (_, spacing, width, even, fltrs_str, height, length), indexes in groups.items():
+            imgs, annotations = generate_numbers_batch([rows[i]['digits'] for i in indexes], spacing, width,
+                                                       images=images,
+                                                       evenly=even,
+                                                       fltrs=parse_filters(fltrs_str) if fltrs_str else None,
+                                                       seed=rng,
+                                                       image_height=height,
+                                                       line_length=length,
+                                                       return_annotations=True,
+                                                       pool=pool,
+                                                       sampler=sampler,
+                                                       tight=tight,
+                                                       resize_mode=resize_mode)
+            annotations['sample'] = np.array(indexes)[:, None]
+
+            results.update(zip(indexes, zip(imgs, annotations)))
+
+        for index, row in enumerate(batch, start):
+            img, annotations = results.pop(index)
+            if return_annotations:
+                yield index, row, img, annotations
+            else:
+                yield index, row, img
 
 
 if __name__ == '__main__':
@@ -259,6 +776,7 @@ if __name__ == '__main__':
     Requirements arguments:
         digits
         A string each digit characters which sequenced transformed to an image using MNIST images.
+        It might be skipped if a manifest is set using --input.
 
     Optiononal arguments:
         -o | --output   Default: mnist_numbers_sequence.png
@@ -270,6 +788,12 @@ if __name__ == '__main__':
         -w | --image_width
             A width of a result image.
 
+        --image_height
+            A height of a result image.
+
+        -l | --line_length
+            A maximum count of digits in one line of an image. Longer sequences wrap into lines.
+
         -s | --spacing   Default: 0,0
             A range of spacing between digit images separated a comma.
             Format: minimum,maximum
@@ -285,38 +809,113 @@ if __name__ == '__main__':
             Supported filters:
                 "blur" - a little bit blurring an image
                 "distort" - make a random horizontal moving each line of an image.
+                "elastic" - a random elastic deformation of an image.
+                "affine" - a random rotation, shear and scale of an image.
+                "noise" - add a gaussian noise to an image.
             Filter applied by order of value.
-            Format: filter1,filter2
+            Parameters of a filter follow a name separated by colon, missed ones get defaults.
+            Format: filter1[:param=value[:param=value]],filter2
             Example:
                 blur
                 distort,blur
-                blur,distort
-    """
+                blur:sigma=1.5,distort:alpha=10
+                affine:rotation=15:scale=0.8/1.2
+
+        --list_filters
+            Print supported filters with parameters and exit.
+
+        -i | --input
+            A manifest (CSV, JSONL or one sequence per line) to generate many images at once.
+            Use "-" to read a standard input.
+
+        --input_format   Default: auto
+            A format of a manifest: auto, csv, jsonl, lines.
+
+        -b | --batch_size   Default: 256
+            A count of rows of a manifest processed at once.
 
-    def parse_filters(filters_str):
-        """
-        Parsing a string to a list-like which contains filter functions to modify digit image.
+        --writers   Default: count of CPU
+            A count of threads compressing and writing images of a manifest.
 
-        Parameters
-        ----------
-        filters_str: str
-            A string constaing list of name of filters separated comma.
+        --compress_level   Default: 6
+            A PNG (zlib) compression level from 0 to 9.
 
-        Returns
-        -------
-        A list-like containing filter functions.
-        """
-        fltrs = []
-        for part in str(filters_str).lower().split(","):
-            if part=="blur":
-                fltrs.append(filters.blur(1))
-            elif part=="distort":
-                fltrs.append(filters.distort(18))
+        --fsync   Default: none
+            A policy of flushing images to a storage: none, file, full.
 
-        return fltrs
+        --seed
+            A seed of random numbers to reproduce images.
+
+        -a | --annotations
+            Store annotations of digits of a manifest images by batches next to images.
+
+        --balanced
+            Choose source images of a manifest without replacement per digit: each image of a digit
+            is using once per epoch before shuffling the next one.
+
+        --tight
+            Crop digit images to ink columns, so a spacing is between ink of digits.
+
+        --resize_mode   Default: linear
+            A mode of resizing: nearest, area, linear, cubic.
+    """
 
     # parse arguments
     args = argsparser.parser().parse_args()
+    # print supported filters
+    if args.list_filters:
+        print("\n".join(filters.describe_filters()))
+        exit(0)
+    # generate a batch of images based a manifest
+    if args.input:
+        try:
+            rows = batchinput.read_rows(args.input, fmt=args.input_format)
+        except Exception as e:
+            print("failed to read a manifest: ", e)
+            exit(-1)
+
+        print("Generate {} images".format(len(rows)))
+        try:
+            images = mnistdata.get_images(data_home=args.data_directory)
+            sampler = mnistdata.EpochSampler(images.labels, seed=args.seed) if args.balanced else None
+
+            annotations_file_name = "{}_annotations.npy".format(os.path.splitext(args.output)[0])
+            annotations = []
+
+            with writer.ImageWriter(workers=args.writers,
+                                    compress_level=args.compress_level,
+                                    fsync=args.fsync) as image_writer:
+                for index, row, img, annotation in generate_rows(rows,
+                                                                 spacing_range=args.spacing,
+                                                                 image_width=args.image_width,
+                                                                 images=images,
+                                                                 evenly=args.evenly,
+                                                                 filters_str=args.filters,
+                                                                 batch_size=args.batch_size,
+                                                                 seed=args.seed,
+                                                                 image_height=args.image_height,
+                                                                 line_length=args.line_length,
+                                                                 return_annotations=True,
+                                                                 sampler=sampler,
+                                                                 tight=args.tight,
+                                                                 resize_mode=args.resize_mode):
+                    image_writer.submit(row['output'] or helper.indexed_file_name(args.output, index), img)
+                    # store annotations of a batch by one file
+                    if args.annotations:
+                        annotations.append(annotation)
+                        if (index + 1) % args.batch_size == 0 or index + 1 == len(rows):
+                            np.save(helper.indexed_file_name(annotations_file_name, index // args.batch_size),
+                                    np.concatenate(annotations))
+                            annotations = []
+        except Exception as e:
+            print("failed to generate a batch of images: ", e)
+            exit(-1)
+
+        exit(0)
+
+    if not args.digits:
+        print("nothing to generate: set digits or a manifest using --input")
+        exit(-1)
     # generate a dataset based numbers sequence of digits
     # try:
     print("Generate an image")
@@ -326,7 +925,12 @@ if __name__ == '__main__':
         args.image_width,
         data_home=args.data_directory,
         evenly=args.evenly,
-        fltrs=parse_filters(args.filters))
+        fltrs=parse_filters(args.filters),
+        seed=args.seed,
+        image_height=args.image_height,
+        line_length=args.line_length,
+        tight=args.tight,
+        resize_mode=args.resize_mode)
     # except Exception as e:
     #     print("failed to generate an image array: ", e)
     #     exit(-1)
@@ -336,8 +940,9 @@ if __name__ == '__main__':
 
         print("Store an image into '{}'".format(image_file_name))
 
-        imageio.imwrite(image_file_name,
-            np.vectorize(lambda x: np.uint8(255 * x))(dataset))
+        writer.write_image(image_file_name, dataset,
+                           compress_level=args.compress_level,
+                           fsync=args.fsync)
     except Exception as e:
         print("failed to store an image based a generated array", e)
         exit(-1)
@@ -44,6 +44,179 @@ class TestGenerator(unittest.TestCase):
 
         self.assertEqual(img.shape, (28, 160))
 
+    def test_generate_numbers_batch(self):
+        test_cases = [
+            (([[0, 2, 4], [1, 3, 5]], (3, 15), 120, False), (2, 28, 120)),
+            (([[0, 2, 4], [1, 3, 5]], (3, 15), 120, True), (2, 28, 120)),
+            (([[7]], None, None, False), (1, 28, 28)),
+        ]
+
+        for (digits, spacing, width, evenly), expected in test_cases:
+            imgs = generator.generate_numbers_batch(digits, spacing, width,
+                                                    images=self.images_db, evenly=evenly)
+            self.assertEqual(imgs.shape, expected)
+            self.assertEqual(imgs.dtype, np.float32)
+
+        imgs = generator.generate_numbers_sequences([[1, 2], [3, 4, 5], [6, 7]], None, None,
+                                                    images=self.images_db)
+        self.assertEqual([img.shape for img in imgs], [(28, 56), (28, 84), (28, 56)])
+
+    def test_generate_lines(self):
+        test_cases = [
+            (([0, 2, 4, 6, 8], (3, 15), 160, False, None, None), (28, 160)),
+            (([0, 2, 4, 6, 8], (3, 15), 160, False, 64, None), (64, 160)),
+            (([0, 2, 4, 6, 8, 1, 3], (3, 15), 160, False, None, 3), (84, 160)),
+            (([0, 2, 4, 6, 8, 1, 3], (3, 15), 160, True, 100, 3), (100, 160)),
+            (([0, 2, 4, 6, 8, 1], (0, 0), None, True, None, 2), (84, 56)),
+        ]
+
+        for (digits, spacing, width, evenly, height, length), expected in test_cases:
+            img = generator.generate_numbers_sequence(digits, spacing, width,
+                                                      images=self.images_db,
+                                                      evenly=evenly,
+                                                      image_height=height,
+                                                      line_length=length)
+            self.assertEqual(img.shape, expected)
+
+        # the last short line keeps a width of digits and is padded by white
+        img = generator.generate_numbers_sequence([1, 2, 3], (0, 0), 56,
+                                                  images=self.images_db, evenly=True, line_length=2)
+        self.assertTrue((img[28:, 28:] == 1.).all())
+
+        with self.assertRaises(Exception):
+            generator.generate_numbers_sequence([1, 2, 3], (0, 0), 56,
+                                                images=self.images_db, image_height=-1)
+
+    def test_generate_annotations(self):
+        img, annotations = generator.generate_numbers_sequence([1, 2, 3, 4], (2, 2), 118,
+                                                               images=self.images_db,
+                                                               evenly=True,
+                                                               fltrs=[filters.blur(1)],
+                                                               return_annotations=True)
+
+        self.assertEqual(img.shape, (28, 118))
+        self.assertEqual(annotations.dtype, generator.ANNOTATION_DTYPE)
+        self.assertEqual(annotations['digit'].tolist(), [1, 2, 3, 4])
+        self.assertEqual((annotations['index'] % 10).tolist(), [1, 2, 3, 4])
+        self.assertEqual(annotations['x0'].tolist(), [0, 30, 60, 90])
+        self.assertEqual(annotations['x1'].tolist(), [28, 58, 88, 118])
+        self.assertEqual(annotations['filters'].tolist(), ['blur'] * 4)
+
+        imgs, annotations = generator.generate_numbers_batch([[1, 2, 3], [4, 5, 6]], (0, 20), 100,
+                                                             images=self.images_db,
+                                                             image_height=112,
+                                                             line_length=2,
+                                                             return_annotations=True)
+
+        self.assertEqual(annotations.shape, (2, 3))
+        self.assertEqual(annotations['sample'].tolist(), [[0, 0, 0], [1, 1, 1]])
+        self.assertEqual(annotations['y0'].tolist(), [[0, 0, 56]] * 2)
+        self.assertEqual(annotations['y1'].tolist(), [[56, 56, 112]] * 2)
+        self.assertTrue((annotations['x0'] < annotations['x1']).all())
+        self.assertTrue((annotations['x1'] <= 100).all())
+        self.assertEqual(annotations['x1'][:, 1].tolist(), [100, 100])
+
+        imgs, annotations = generator.generate_numbers_sequences([[1, 2], [3, 4, 5]], None, None,
+                                                                 images=self.images_db,
+                                                                 return_annotations=True)
+        self.assertEqual([a['sample'].tolist() for a in annotations], [[0, 0], [1, 1, 1]])
+
+    def test_generate_augmented(self):
+        fltrs = [filters.elastic(), filters.affine(), filters.noise(), filters.distort(18)]
+
+        for evenly, spacing in [(False, (0, 0)), (False, (0, 20)), (True, (3, 10))]:
+            imgs = generator.generate_numbers_batch([[1, 2, 3], [4, 5, 6], [7, 8, 9]], spacing, 120,
+                                                    images=self.images_db, evenly=evenly, fltrs=fltrs)
+
+            self.assertEqual(imgs.shape, (3, 28, 120))
+            self.assertTrue(((imgs >= 0) & (imgs <= 1)).all())
+
+    def test_generate_seed(self):
+        fltrs = [filters.distort(18)]
+
+        exist = generator.generate_numbers_sequence([0, 2, 4, 6, 8], (0, 20), 160,
+                                                    images=self.images_db, fltrs=fltrs, seed=11)
+        expected = generator.generate_numbers_sequence([0, 2, 4, 6, 8], (0, 20), 160,
+                                                       images=self.images_db, fltrs=fltrs, seed=11)
+
+        self.assertTrue(np.array_equal(exist, expected))
+
+        exist = generator.generate_numbers_sequences([[1, 2], [3, 4, 5]], (0, 20), 100,
+                                                     images=self.images_db, seed=3)
+        expected = generator.generate_numbers_sequences([[1, 2], [3, 4, 5]], (0, 20), 100,
+                                                        images=self.images_db, seed=3)
+
+        for e, t in zip(exist, expected):
+            self.assertTrue(np.array_equal(e, t))
+
+    def test_generate_balanced(self):
+        sampler = mnistdata.EpochSampler(self.labels_db, seed=1)
+
+        _, annotations = generator.generate_numbers_sequences([[1, 1], [1, 1, 2, 2]], (0, 0), None,
+                                                              images=self.images_db,
+                                                              return_annotations=True,
+                                                              sampler=sampler)
+        indexes = np.concatenate([annotation['index'] for annotation in annotations])
+        # 20 test images: 2 images of each digit are using once per epoch
+        self.assertEqual(sorted(indexes[indexes % 10 == 1].tolist()), [1, 1, 11, 11])
+        self.assertEqual(sorted(indexes[indexes % 10 == 2].tolist()), [2, 12])
+
+    def test_generate_tight(self):
+        # a test image of a digit contains ink in the first pixel only
+        img, annotations = generator.generate_numbers_sequence([1, 2, 3], (0, 0), 30, images=self.images_db,
+                                                               seed=1, return_annotations=True, tight=True)
+        self.assertEqual(img.shape, (28, 30))
+        self.assertEqual(annotations['x0'].tolist(), [0, 10, 20])
+        self.assertEqual(annotations['x1'].tolist(), [10, 20, 30])
+
+        with self.assertRaises(Exception):
+            generator.generate_numbers_sequence([1, 2, 3], (0, 0), 300, images=self.images_db, evenly=True,
+                                                tight=True)
+
+    def test_generate_resize_mode(self):
+        for mode in filters.RESIZE_MODES:
+            for evenly, image_height in [(False, None), (True, 56)]:
+                img = generator.generate_numbers_sequence([1, 2, 3], (0, 5), 100, images=self.images_db,
+                                                          evenly=evenly, seed=1, image_height=image_height,
+                                                          resize_mode=mode)
+                self.assertEqual(img.shape, (image_height or 28, 100))
+                self.assertEqual(img.dtype, np.float32)
+        # a digit doubled by an integer ratio repeats pixels
+        img = generator.generate_numbers_sequence([1], (0, 0), 56, images=self.images_db, evenly=True,
+                                                  seed=1, image_height=56, resize_mode='nearest')
+        expected = generator.generate_numbers_sequence([1], (0, 0), 28, images=self.images_db, evenly=True, seed=1)
+        self.assertTrue(np.array_equal(img, np.repeat(np.repeat(expected, 2, axis=0), 2, axis=1)))
+
+        with self.assertRaises(Exception):
+            generator.generate_numbers_sequence([1, 2, 3], (0, 5), 100, images=self.images_db, resize_mode='bad')
+
+    def test_generate_rows(self):
+        rows = [
+            {'digits': [1, 2, 3], 'image_width': None, 'spacing': None,
+                'evenly': False, 'filters': None, 'output': None},
+            {'digits': [4, 5], 'image_width': 100, 'spacing': (2, 5),
+                'evenly': True, 'filters': 'blur', 'output': None},
+            {'digits': [6, 7, 8], 'image_width': None, 'spacing': None,
+                'evenly': False, 'filters': None, 'output': None},
+        ]
+
+        exist = list(generator.generate_rows(rows, image_width=120,
+                                             images=self.images_db, batch_size=2))
+
+        self.assertEqual([index for index, _, _ in exist], [0, 1, 2])
+        self.assertEqual([img.shape for _, _, img in exist],
+                         [(28, 120), (28, 100), (28, 120)])
+        # false values of a row override true defaults, empty ones use defaults
+        rows = [
+            {'digits': [1, 2], 'spacing': (0, 0), 'evenly': False},
+            {'digits': [1, 2], 'spacing': None, 'evenly': None},
+        ]
+        exist = [annotations for _, _, _, annotations in
+                 generator.generate_rows(rows, spacing_range=(10, 10), image_width=120, evenly=True,
+                                         images=self.images_db, return_annotations=True)]
+        self.assertEqual(exist[0]['x0'][1] - exist[0]['x1'][0], 0)
+        self.assertEqual(exist[1]['x0'][1] - exist[1]['x1'][0], 10)
+
 
 class TestParameter(unittest.TestCase):
     def setUp(self):
@@ -86,8 +259,8 @@ class TestParameter(unittest.TestCase):
         test_cases = [
             ((28, 255, 10, (3, 10), 230, True, None),
                 ([
-                    "numpy.lib.function_base.vectorize",
-                    "numpy.lib.function_base.vectorize",
+                    "function invert.<locals>.invert_image",
+                    "function normalize.<locals>.normalize_image",
                     "function resize_seq.<locals>.resize_image",
                     "function spacing_seq.<locals>.add_spacing",
                 ],
@@ -97,8 +270,8 @@ class TestParameter(unittest.TestCase):
                 filters.blur(),
                 filters.distort(20),
             ]), ([
-                "numpy.lib.function_base.vectorize",
-                "numpy.lib.function_base.vectorize",
+                "function invert.<locals>.invert_image",
+                "function normalize.<locals>.normalize_image",
                 "function blur.<locals>.blur_image",
                 "function distort.<locals>.distort_image",
                 "function resize_seq.<locals>.resize_image",
@@ -108,8 +281,8 @@ class TestParameter(unittest.TestCase):
             ),
             ((28, 255, 10, (3, 10), 230, False, None), 
                 ([
-                "numpy.lib.function_base.vectorize",
-                "numpy.lib.function_base.vectorize",
+                "function invert.<locals>.invert_image",
+                "function normalize.<locals>.normalize_image",
                 "function resize_seq.<locals>.resize_image",
                 "function spacing_seq.<locals>.add_spacing",
                 ],
@@ -121,8 +294,8 @@ class TestParameter(unittest.TestCase):
                 filters.blur(),
                 filters.distort(20),
             ]), ([
-                "numpy.lib.function_base.vectorize",
-                "numpy.lib.function_base.vectorize",
+                "function invert.<locals>.invert_image",
+                "function normalize.<locals>.normalize_image",
                 "function resize_seq.<locals>.resize_image",
                 "function spacing_seq.<locals>.add_spacing",
                 ],
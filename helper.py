@@ -1,6 +1,6 @@
 import os
 import time
-import random
+import numpy as np
 from math import log2
 
 _suffixes = ['bytes', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB', 'EiB', 'ZiB', 'YiB']
@@ -23,7 +23,76 @@ def file_size(size):
 
     return '{:.4g} {}'.format(size / (1 << (order * 10)), _suffixes[order])
 
-def randomly_image_interval(digit_width=28, digit_count=1, image_width=28, spacing=(0, 0)):
+def get_rng(seed=None):
+    """
+    Creating a source of random numbers from a seed.
+    All of random operations of the library are using numpy.random.Generator created by the function,
+    so a result is reproducible if a seed is set.
+
+    Parameters
+    ----------
+    seed: None, int, numpy.random.SeedSequence or numpy.random.Generator   Default: None
+        A seed of random numbers. A generator is returning as is.
+        A not seeded generator is creating if it is None.
+
+    Returns
+    -------
+    An object of numpy.random.Generator.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+
+    return np.random.default_rng(seed)
+
+
+def seed_entropy(seed=None):
+    """
+    Getting an int entropy of a seed, so a seed might be stored (ex. in a checkpoint) and restored later.
+
+    Parameters
+    ----------
+    seed: None, int, numpy.random.SeedSequence or numpy.random.Generator   Default: None
+        A seed of random numbers. A fresh entropy is creating if it is None,
+        a value is drawing from a generator.
+
+    Returns
+    -------
+    A not negative int.
+    """
+    if isinstance(seed, np.random.Generator):
+        return int(seed.integers(1 << 63))
+    if isinstance(seed, np.random.SeedSequence):
+        return int(seed.entropy)
+    if seed is None:
+        return int(np.random.SeedSequence().entropy)
+
+    return int(seed)
+
+
+def spawn_rngs(seed, count):
+    """
+    Creating independent sources of random numbers with disjoint streams,
+    ex. for parallel workers or shards of a dataset.
+
+    Parameters
+    ----------
+    seed: None, int or numpy.random.SeedSequence
+        A root seed. The same seed produces the same streams.
+
+    count: int
+        A count of sources.
+
+    Returns
+    -------
+    A list of numpy.random.Generator objects.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    return [np.random.default_rng(child) for child in seed.spawn(count)]
+
+
+def randomly_image_interval(digit_width=28, digit_count=1, image_width=28, spacing=(0, 0), rng=None):
     """
     Creating two generators of widths of image and spacing.
     A sequence of an image has a constant numbers
@@ -44,12 +113,15 @@ def randomly_image_interval(digit_width=28, digit_count=1, image_width=28, spaci
         A (minimum, maximum) pair (tuple), representing the min and max spacing between digits.
         A unit should be a pixel.
 
+    rng: numpy.random.Generator   Default: None
+        A source of random numbers, see get_rng.
+
     Returns
     -------
     A tuple of two sequences.
     First of them is a sequences of widths to resize a digit image, second is a sequence of widths of spacing.
     """
-    return evenly_interval(digit_count, digit_width), random_interval(digit_count-1, spacing)
+    return evenly_interval(digit_count, digit_width), random_interval(digit_count-1, spacing, rng=rng)
 
 
 def evenly_image_interval(digit_width=28, digit_count=1, image_width=28, spacing=(0, 0)):
@@ -133,6 +205,7 @@ def most_evenly_interval(total_count, width, interval_rest):
     Creating a generator of evenly equal values.
     A result width (interval_rest) might have a rest value from dividing total width and an image of digit width.
     Generator increases a value on 1 or staying it the same to fill all width.
+    It is a legacy wrapper of "most_evenly_values".
 
     Parameters
     ----------
@@ -149,19 +222,9 @@ def most_evenly_interval(total_count, width, interval_rest):
     -------
     A generator of a evenly placed values maximum differents is 1 for generated values.
     """
-    def reduce_rest(rest, interval_rest=[interval_rest]):
-        diff = interval_rest[0]-(rest*width)
-
-        if diff > 0 and rest/diff % 2:
-            interval_rest[0] -= width + 1
-            return width + 1
-        else:
-            interval_rest[0] -= width
-            return width
+    return (int(value) for value in most_evenly_values(total_count, width, interval_rest))
 
-    return (reduce_rest(total_count-i) for i in range(total_count))
-
-def random_interval(total_count, rng):
+def random_interval(total_count, value_range, rng=None):
     """
     Creating a generator of a random number in the range.
 
@@ -170,14 +233,186 @@ def random_interval(total_count, rng):
     total_count: int
         Count of times of repeating.
 
-    range: tuple
-        A value repeated in the result generator
+    value_range: tuple
+        A (minimum, maximum) pair (tuple) of generated values, both are included.
+
+    rng: numpy.random.Generator   Default: None
+        A source of random numbers, see get_rng.
 
     Returns
     -------
     A generator of a random number in the range.
     """
-    return (random.randint(*rng) for _ in range(total_count))
+    rng = get_rng(rng)
+    minimum, maximum = value_range
+
+    return (int(value) for value in rng.integers(minimum, maximum, size=total_count, endpoint=True))
+
+def randomly_layout(count, digit_width=28, digit_count=1, image_width=28, spacing=(0, 0), rng=None):
+    """
+    Creating a layout of a batch of sequences: widths of digit images and spacing between them.
+    The same as "randomly_image_interval", but for all sequences of a batch at once.
+
+    Parameters
+    ----------
+    count: int
+        A count of sequences in a batch.
+
+    digit_width: int      Default: 28
+        A width of one digit image.
+
+    digit_count: int      Default: 1
+        A count of digits in a sequences.
+
+    image_width: int      Default: 28
+        A width of the result sequence image. Using just for compatibility with "evenly_layout"
+
+    spacing: tuple  Default: (0, 0)
+        A (minimum, maximum) pair (tuple), representing the min and max spacing between digits.
+
+    rng: numpy.random.Generator   Default: None
+        A source of random numbers, see get_rng.
+
+    Returns
+    -------
+    A tuple of two int arrays: widths of digit images with a shape (count, digit_count)
+    and widths of spacing with a shape (count, digit_count-1).
+    """
+    rng = get_rng(rng)
+
+    minimum, maximum = spacing
+
+    widths = np.full((count, digit_count), digit_width, dtype=np.int64)
+    spacings = rng.integers(minimum, maximum, size=(count, max(digit_count-1, 0)),
+                            endpoint=True, dtype=np.int64)
+
+    return widths, spacings
+
+
+def evenly_layout(count, digit_width=28, digit_count=1, image_width=28, spacing=(0, 0)):
+    """
+    Creating a layout of a batch of sequences: widths of digit images and spacing between them.
+    The same as "evenly_image_interval", but for all sequences of a batch at once.
+    An evenly layout doesn't depend on random numbers, so all rows of the result are equal.
+
+    Parameters
+    ----------
+    count: int
+        A count of sequences in a batch.
+
+    digit_width, digit_count, image_width, spacing:
+        The same parameters as "evenly_image_interval" has.
+
+    Returns
+    -------
+    A tuple of two int arrays: widths of digit images with a shape (count, digit_count)
+    and widths of spacing with a shape (count, digit_count-1).
+    """
+    spacing_count = digit_count-1
+
+    min_spacing, max_spacing = spacing
+    # special case - can't changing spacing, change an image width
+    if min_spacing == max_spacing:
+        image_width_rest = image_width - spacing_count * min_spacing
+        result_width = int(image_width_rest/digit_count)
+
+        widths = most_evenly_values(digit_count, result_width, image_width_rest)
+        spacings = np.full(spacing_count, min_spacing, dtype=np.int64)
+    else:
+        min_image_width = int((image_width - spacing_count * min_spacing)/digit_count)
+        max_image_width = int((image_width - spacing_count * (max_spacing-1))/digit_count)
+
+        result_width = digit_width
+
+        if min_image_width < digit_width:
+            result_width = min_image_width
+        elif max_image_width > digit_width:
+            result_width = max_image_width
+
+        spacing_rest = image_width - result_width * digit_count
+        spacing_width = int(spacing_rest/spacing_count) if spacing_count > 0 else 0
+
+        widths = np.full(digit_count, result_width, dtype=np.int64)
+        spacings = most_evenly_values(spacing_count, spacing_width, spacing_rest)
+
+    return np.tile(widths, (count, 1)), np.tile(spacings, (count, 1))
+
+
+def most_evenly_values(total_count, width, interval_rest):
+    """
+    Creating an array of evenly equal values. The same values as "most_evenly_interval" generates:
+    a value of a position with a rest count of values r and a rest of extra width e (over width of each value)
+    is increasing on 1 if r/e is not an even number. Runs of increased values between not increased ones
+    are filling by slices, a tail with r = 2e alternates, so a loop is over breaks of runs only.
+
+    Parameters
+    ----------
+    total_count: int
+        Count of values.
+
+    width: int
+        A minimum value of an array.
+
+    interval_rest: int
+        A rest of width to place an image with minimum width.
+
+    Returns
+    -------
+    An int array of a evenly placed values maximum differents is 1.
+    """
+    values = np.full(total_count, width, dtype=np.int64)
+    position, extra = 0, interval_rest - total_count * width
+
+    while position < total_count and extra > 0:
+        rest = total_count - position
+        # a difference of a rest count and a rest extra width is constant while values are increasing
+        diff = rest - extra
+        if diff <= 0:
+            values[position:] += 1
+            break
+        # the next not increased value is at the largest extra dividing diff with an odd quotient
+        extras = np.arange(extra, 0, -1)
+        breaks = extras[(diff % extras == 0) & (diff // extras % 2 == 1)]
+        if len(breaks) == 0:
+            values[position:position+extra] += 1
+            break
+
+        run = extra - int(breaks[0])
+        values[position:position+run] += 1
+        position, extra = position + run, int(breaks[0])
+        if diff == extra:
+            # rest = 2 * extra: not increased and increased values alternate till the end
+            values[position+1::2] += 1
+            break
+        position += 1
+
+    return values
+
+
+def layout_offsets(widths, spacings):
+    """
+    Calculating X-axis offsets of digit images of a batch layout.
+
+    Parameters
+    ----------
+    widths: ndarray
+        An int array of widths of digit images with a shape (count, digit_count).
+
+    spacings: ndarray
+        An int array of widths of spacing with a shape (count, digit_count-1).
+
+    Returns
+    -------
+    A tuple of an int array of offsets of digit images with a shape (count, digit_count)
+    and an int array of total widths of sequences with a shape (count,).
+    """
+    steps = widths[:, :-1] + spacings
+
+    offsets = np.zeros(widths.shape, dtype=np.int64)
+    np.cumsum(steps, axis=1, out=offsets[:, 1:])
+
+    return offsets, offsets[:, -1] + widths[:, -1]
+
 
 def not_exists_file_name(file_name):
     """
@@ -204,3 +439,27 @@ def not_exists_file_name(file_name):
         counter += 1
 
     return new_file_name
+
+def indexed_file_name(file_name, index, digits=6):
+    """
+    Creating a file name of an element of a batch using a zero padded index.
+    A name is deterministic and doesn't depend on exists files, so a batch rerun overwrites the same files.
+
+    Parameters
+    ----------
+    file_name: string
+        A template name of the file. An index is inserting before an extension.
+
+    index: int
+        An index of a batch element.
+
+    digits: int     Default: 6
+        A minimum count of digits of an index.
+
+    Returns
+    -------
+    A file name like "name_000042.png".
+    """
+    name, ext = os.path.splitext(file_name)
+
+    return "{}_{:0{}d}{}".format(name, index, digits, ext)
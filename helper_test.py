@@ -1,6 +1,7 @@
 import unittest
 import os
 import shutil
+import numpy as np
 
 if __name__.find('.')<0:
     import helper
@@ -55,6 +56,7 @@ class TestInterval(unittest.TestCase):
         for test, expected in test_cases:
             exist = list(helper.most_evenly_interval(*test))
             self.assertEqual(exist, expected)
+            self.assertEqual(helper.most_evenly_values(*test).tolist(), expected)
 
     def test_random_interval(self):
         test_cases = [
@@ -70,6 +72,34 @@ class TestInterval(unittest.TestCase):
             
             self.assertTrue(all([v>=minimum and v<=maximum for v in exist]))
 
+    def test_random_interval_seed(self):
+        exist = list(helper.random_interval(20, (0, 100), rng=helper.get_rng(7)))
+        expected = list(helper.random_interval(20, (0, 100), rng=helper.get_rng(7)))
+
+        self.assertEqual(exist, expected)
+
+
+class TestRng(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_get_rng(self):
+        rng = helper.get_rng(1)
+
+        self.assertIs(helper.get_rng(rng), rng)
+        self.assertEqual(helper.get_rng(1).integers(1000, size=10).tolist(),
+                         rng.integers(1000, size=10).tolist())
+
+    def test_spawn_rngs(self):
+        exist = [rng.integers(1 << 30, size=4).tolist() for rng in helper.spawn_rngs(5, 3)]
+        expected = [rng.integers(1 << 30, size=4).tolist() for rng in helper.spawn_rngs(5, 3)]
+
+        self.assertEqual(exist, expected)
+        self.assertEqual(len(set(tuple(v) for v in exist)), 3)
+
 class TestIntervalCalc(unittest.TestCase):
     def setUp(self):
         pass
@@ -166,6 +196,46 @@ class TestIntervalCalc(unittest.TestCase):
                              sum(exist_spacing), test['image_width'])
 
 
+class TestLayout(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_randomly_layout(self):
+        widths, spacings = helper.randomly_layout(5, digit_width=28, digit_count=10,
+                                                  image_width=200, spacing=(10, 20))
+
+        self.assertEqual(widths.shape, (5, 10))
+        self.assertEqual(spacings.shape, (5, 9))
+        self.assertTrue((widths == 28).all())
+        self.assertTrue(((spacings >= 10) & (spacings <= 20)).all())
+
+    def test_evenly_layout(self):
+        test_cases = [
+            {'digit_width': 28, 'digit_count': 10, 'image_width': 310, 'spacing': (3, 10)},
+            {'digit_width': 28, 'digit_count': 10, 'image_width': 563, 'spacing': (3, 3)},
+            {'digit_width': 28, 'digit_count': 1, 'image_width': 40, 'spacing': (0, 5)},
+        ]
+
+        for test in test_cases:
+            width_seq, spacing_seq = helper.evenly_image_interval(**test)
+            widths, spacings = helper.evenly_layout(3, **test)
+
+            self.assertEqual(widths.tolist(), [list(width_seq)] * 3)
+            self.assertEqual(spacings.tolist(), [list(spacing_seq)] * 3)
+
+    def test_layout_offsets(self):
+        widths = np.array([[28, 28, 28], [10, 20, 30]])
+        spacings = np.array([[1, 2], [0, 0]])
+
+        offsets, total = helper.layout_offsets(widths, spacings)
+
+        self.assertEqual(offsets.tolist(), [[0, 29, 59], [0, 10, 30]])
+        self.assertEqual(total.tolist(), [87, 60])
+
+
 class TestNotExistsFileName(unittest.TestCase):
     test_dir = "test-data/exists-file-name"
 
@@ -196,5 +266,15 @@ class TestNotExistsFileName(unittest.TestCase):
 
         self.assertNotEqual(exist, expected)
 
+    def test_indexed_file_name(self):
+        test_cases = [
+            (("image.png", 42), "image_000042.png"),
+            (("dir/image.png", 1234567), "dir/image_1234567.png"),
+            (("image", 3, 2), "image_03"),
+        ]
+
+        for test, expected in test_cases:
+            self.assertEqual(helper.indexed_file_name(*test), expected)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,15 +1,18 @@
 import io
 import os
 import struct
-import sys
-import random
 import numpy as np
-from collections import defaultdict
 
 if __name__.find('.')<0:
+    import argsparser
+    import helper
     import mnistdownloader
+    import writer
 else:
+    from . import argsparser
+    from . import helper
     from . import mnistdownloader
+    from . import writer
 
 DATAHOME_ENV_NAME = 'GENERATOR_NUMBERS_SEQ_MNIST_DIR'
 DATAHOME_DEFAULT_PATH = 'generator_numbers_seq_mnist'
@@ -19,8 +22,22 @@ MNIST_READ_SIZE = 64 * 1024
 MNIST_DEFAULT_IMAGE_WIDTH = 28
 MNIST_DEFAULT_IMAGE_HEIGHT = 28
 
+# an ink extent of a source image: a bounding box of ink pixels (x1, y1 are excluded) and a sum of ink values
+INK_DTYPE = np.dtype([
+    ('x0', np.int16),
+    ('x1', np.int16),
+    ('y0', np.int16),
+    ('y1', np.int16),
+    ('mass', np.int32),
+])
+# a count of images processing at once while computing ink extents
+INK_CHUNK_SIZE = 8192
+# a suffix of a copy of an images datafile sorted by labels, see MNISTImagesFile.sort_by_label
+SORTED_LAYOUT_SUFFIX = ".sorted.npy"
+
 mnist_labeles = None
 mnist_images = None
+mnist_data_home = None
 
 
 def get_data_file_path(file_name, data_home=None):
@@ -207,13 +224,16 @@ class MNISTLabelsFile(MNISTDataFile):
     A class of labels DB implementing a specific operations on a labels datafile.
     """
 
-    def __init__(self, downloader=mnistdownloader.HttpDownloader):
+    def __init__(self, downloader=mnistdownloader.HttpDownloader, seed=None):
         """
         Parameters
         ----------
         downloader: object   Default: mnistdownloader.HttpDownloader
             An object is implementing of getting a datafile from another (remote or local)
             resource.
+
+        seed: None, int or numpy.random.Generator   Default: None
+            A seed of a default source of random numbers, see helper.get_rng.
         """
         super().__init__(
             title="labels",
@@ -221,9 +241,9 @@ class MNISTLabelsFile(MNISTDataFile):
             downloader=downloader,
             header_magic_numer=2049)
 
-        self.indexes = defaultdict(lambda: [])
+        self.indexes = {}
 
-        random.seed()
+        self.rng = helper.get_rng(seed)
 
     def read(self, data_home=None):
         """
@@ -242,22 +262,16 @@ class MNISTLabelsFile(MNISTDataFile):
         super().read(data_home=data_home)
         super().check_content(8+self.record_count)
         # read labels
-        index = 0
-        buffer = self.reader.read(MNIST_READ_SIZE)
-        record_count = 0
-        while buffer:
-            record_count+=len(buffer)
-
-            for ch in buffer:
-                self.indexes[ch].append(index)
-                index += 1
-
-            buffer = self.reader.read(MNIST_READ_SIZE)
+        labels = np.frombuffer(self.reader.read(), dtype=np.uint8)
         # close a file
         self.close()
         # check read records count
-        if record_count!=self.record_count:
-            raise Exception("read {} records, but expected is {}".format(record_count, self.record_count))
+        if len(labels)!=self.record_count:
+            raise Exception("read {} records, but expected is {}".format(len(labels), self.record_count))
+        # group indexes of records by a label
+        order = np.argsort(labels, kind='stable')
+        digits, starts = np.unique(labels[order], return_index=True)
+        self.indexes = {int(digit): indexes for digit, indexes in zip(digits, np.split(order, starts[1:]))}
 
     def __getitem__(self, key):
         """
@@ -276,10 +290,269 @@ class MNISTLabelsFile(MNISTDataFile):
         if not key in self.indexes:
             return -1
 
-        index = random.randrange(len(self.indexes[key]))
+        index = self.rng.integers(len(self.indexes[key]))
 
         return self.indexes[key][index]
 
+    def sample(self, digits, rng=None):
+        """
+        Getting indexes of handwritten images for a batch of digits at once.
+        Each index will select randomly from a list of all stored image of a requested digit.
+
+        Parameters
+        ----------
+        digits: ndarray
+            An int array of digits from 0 to 9 of any shape.
+
+        rng: numpy.random.Generator   Default: None
+            A source of random numbers. A default source of the db is using if it is None.
+
+        Returns
+        -------
+        An int array of indexes of handwritten images with the same shape as digits.
+
+        Raises
+        ------
+        An exception of getting unknown digits.
+        """
+        return sample_indexes(self.indexes, digits, rng if rng is not None else self.rng)
+
+
+def sample_indexes(indexes, digits, rng):
+    """
+    Choosing indexes of images of digits randomly with replacement.
+
+    Parameters
+    ----------
+    indexes: dict
+        Int arrays of indexes of images of each digit.
+
+    digits: ndarray
+        An int array of digits from 0 to 9 of any shape.
+
+    rng: numpy.random.Generator
+        A source of random numbers.
+
+    Returns
+    -------
+    An int array of indexes of images with the same shape as digits.
+
+    Raises
+    ------
+    An exception of getting unknown digits.
+    """
+    digits = np.asarray(digits)
+    result = np.empty(digits.shape, dtype=np.int64)
+
+    for digit in np.unique(digits):
+        if not int(digit) in indexes or len(indexes[int(digit)]) == 0:
+            # TODO: normal exceptions
+            raise Exception("Unknown key")
+
+        mask = digits == digit
+        digit_indexes = indexes[int(digit)]
+        result[mask] = digit_indexes[rng.integers(len(digit_indexes), size=int(mask.sum()))]
+
+    return result
+
+
+class SubsetSampler:
+    """
+    A sampler of indexes of handwritten images with replacement from a subset of images of each digit,
+    ex. images with a narrow ink (see MNISTImagesFile.ink). A subset is selecting by a mask once,
+    so sampling doesn't reject images. It has the same interface as MNISTLabelsFile has,
+    so it might be a source of an EpochSampler too.
+    """
+
+    def __init__(self, labels, mask, seed=None):
+        """
+        Parameters
+        ----------
+        labels: MNISTLabelsFile
+            A read labels db.
+
+        mask: ndarray
+            A boolean array with an element per image of a db: True to keep an image.
+
+        seed: None, int or numpy.random.Generator   Default: None
+            A seed of a default source of random numbers, see helper.get_rng.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        self.indexes = {digit: indexes[mask[indexes]] for digit, indexes in labels.indexes.items()}
+        self.rng = helper.get_rng(seed)
+
+    def sample(self, digits, rng=None):
+        """
+        Getting indexes of handwritten images of a subset for a batch of digits at once.
+        See MNISTLabelsFile.sample.
+        """
+        return sample_indexes(self.indexes, digits, rng if rng is not None else self.rng)
+
+
+class EpochSampler:
+    """
+    A sampler of indexes of handwritten images without replacement per digit.
+    Each digit has a shuffled permutation of all of stored images of the digit (an epoch),
+    indexes are handing out by slices of a permutation and the next permutation is shuffling
+    when a digit is exhausted. So each image of a digit is using once per epoch.
+
+    A permutation is a pure function of (seed, digit, epoch), so a state of a sampler is just
+    a seed and cursors of digits, see state and load_state.
+    """
+
+    def __init__(self, labels, seed=None):
+        """
+        Parameters
+        ----------
+        labels: MNISTLabelsFile
+            A read labels db.
+
+        seed: None, int, numpy.random.SeedSequence or numpy.random.Generator   Default: None
+            A seed of permutations, see helper.seed_entropy.
+        """
+        self.indexes = labels.indexes
+        self.seed = helper.seed_entropy(seed)
+
+        self.epochs = {digit: 0 for digit in self.indexes}
+        self.cursors = {digit: 0 for digit in self.indexes}
+        self.permutations = {}
+
+    def permutation(self, digit):
+        """
+        Getting a permutation of indexes of images of a digit for a current epoch of the digit.
+
+        Parameters
+        ----------
+        digit: int
+            A digit from 0 to 9.
+
+        Returns
+        -------
+        An int array of indexes of images.
+        """
+        epoch = self.epochs[digit]
+
+        cached = self.permutations.get(digit)
+        if cached is not None and cached[0] == epoch:
+            return cached[1]
+
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(digit, epoch)))
+        permutation = rng.permutation(self.indexes[digit])
+        self.permutations[digit] = (epoch, permutation)
+
+        return permutation
+
+    def take(self, digit, count):
+        """
+        Getting next indexes of images of a digit.
+
+        Parameters
+        ----------
+        digit: int
+            A digit from 0 to 9.
+
+        count: int
+            A count of indexes.
+
+        Returns
+        -------
+        An int array of indexes of images.
+
+        Raises
+        ------
+        An exception of getting unknown digits.
+        """
+        if not digit in self.indexes or len(self.indexes[digit]) == 0:
+            raise Exception("Unknown key")
+
+        result = np.empty(count, dtype=np.int64)
+        filled = 0
+        while filled < count:
+            permutation = self.permutation(digit)
+            cursor = self.cursors[digit]
+
+            size = min(len(permutation) - cursor, count - filled)
+            result[filled:filled+size] = permutation[cursor:cursor+size]
+            filled += size
+            # shuffle the next epoch of an exhausted digit
+            self.cursors[digit] = cursor + size
+            if self.cursors[digit] == len(permutation):
+                self.epochs[digit] += 1
+                self.cursors[digit] = 0
+
+        return result
+
+    def sample(self, digits, rng=None):
+        """
+        Getting indexes of handwritten images for a batch of digits at once.
+        It is the same interface as MNISTLabelsFile.sample has.
+
+        Parameters
+        ----------
+        digits: ndarray
+            An int array of digits from 0 to 9 of any shape.
+
+        rng: numpy.random.Generator   Default: None
+            It is not using, permutations are defining by a seed of a sampler.
+
+        Returns
+        -------
+        An int array of indexes of handwritten images with the same shape as digits.
+        """
+        digits = np.asarray(digits)
+        result = np.empty(digits.shape, dtype=np.int64)
+
+        for digit in np.unique(digits):
+            mask = digits == digit
+            result[mask] = self.take(int(digit), int(mask.sum()))
+
+        return result
+
+    def state(self):
+        """
+        Getting a state of a sampler to resume sampling later, see load_state.
+
+        Returns
+        -------
+        A JSON serializable dictionary with keys: seed, epochs, cursors.
+        """
+        return {
+            'seed': self.seed,
+            'epochs': {str(digit): epoch for digit, epoch in self.epochs.items()},
+            'cursors': {str(digit): cursor for digit, cursor in self.cursors.items()},
+        }
+
+    def load_state(self, state):
+        """
+        Restoring a state of a sampler, the next indexes are the same as a saved sampler would hand out.
+
+        Parameters
+        ----------
+        state: dict
+            A state returned by the state method.
+        """
+        self.seed = int(state['seed'])
+        self.epochs = {digit: int(state['epochs'].get(str(digit), 0)) for digit in self.indexes}
+        self.cursors = {digit: int(state['cursors'].get(str(digit), 0)) for digit in self.indexes}
+        self.permutations = {}
+
+    def seek(self, counts):
+        """
+        Moving a sampler to a position after handing out a count of indexes of each digit from the beginning.
+        A state depends on counts only, so a process sampling a part of a stream (ex. a shard of a dataset)
+        seeks to the beginning of a part without sampling previous ones.
+
+        Parameters
+        ----------
+        counts: dict or list-like
+            A count of handed out indexes of each digit, ex. a numpy.bincount of all of previous digits.
+        """
+        if not isinstance(counts, dict):
+            counts = dict(enumerate(counts))
+
+        for digit in self.indexes:
+            self.epochs[digit], self.cursors[digit] = divmod(int(counts.get(digit, 0)), len(self.indexes[digit]) or 1)
+
 
 class MNISTImagesFile(MNISTDataFile):
     """
@@ -308,6 +581,11 @@ class MNISTImagesFile(MNISTDataFile):
         self.image_header_format = ">II"
         self.start_offset = 0
         self.labels = labels
+        self.data = None
+        self.ink_extents = {}
+        # positions of records in a sorted by labels layout and ranges of positions of each digit
+        self.positions = None
+        self.class_ranges = {}
 
         self.__calc_record_offset()
 
@@ -325,6 +603,14 @@ class MNISTImagesFile(MNISTDataFile):
         """
         return self.image_width
 
+    def digit_height(self):
+        """
+        Returns
+        -------
+        A height of one image of digit.
+        """
+        return self.image_height
+
     def max_value(self):
         """
         Returns
@@ -333,7 +619,7 @@ class MNISTImagesFile(MNISTDataFile):
         """
         return 255
 
-    def read(self, data_home=None):
+    def read(self, data_home=None, sorted_layout=False):
         """
         Opening an images datafile and reading just a header.
         A datafile will opened to get an image data through all working time.
@@ -343,10 +629,16 @@ class MNISTImagesFile(MNISTDataFile):
         data_home: str      Default: None
             Custom path storing DB files.
 
+        sorted_layout: boolean   Default: False
+            A flag to map images sorted by labels, see sort_by_label. A labels DB has to be read before.
+
         Raises
         ------
         An exception related unexpected count of records different than a header parameter.
         """
+        # reopen a file to read a header again
+        self.close()
+        self.ink_extents = {}
         # open a file and read a general header
         super().read(data_home=data_home)
         # read image specific header
@@ -355,6 +647,53 @@ class MNISTImagesFile(MNISTDataFile):
         # store start index
         self.__calc_record_offset()
         self.start_offset = self.reader.tell()
+        # map all images to get a batch of them without reading each one
+        self.data = np.memmap(self.file_path, dtype=np.uint8, mode='r', offset=self.start_offset,
+                              shape=(self.record_count, self.image_height, self.image_width))
+
+        if sorted_layout:
+            self.sort_by_label()
+
+    def sort_by_label(self):
+        """
+        Mapping images in the physical order of labels: images of each digit are a contiguous range of positions
+        (see class_ranges), so sampling a digit touches a contiguous part of memory and pages of a mapped file
+        instead of records scattered over the whole datafile.
+        A sorted copy is storing next to the datafile once (ex. train-images-idx3-ubyte.sorted.npy),
+        next reads map it. Indexes of records are not changing: take, ink and __getitem__ map them to positions,
+        so images and generated datasets are the same as without sorting.
+
+        Raises
+        ------
+        An exception if labels don't match images.
+        """
+        if self.positions is not None:
+            return
+
+        digits = sorted(self.labels.indexes)
+        order = np.concatenate([self.labels.indexes[digit] for digit in digits]).astype(np.int64)
+        if len(order) != self.record_count:
+            raise Exception("labels of {} records don't match {} images".format(len(order), self.record_count))
+
+        file_name = self.file_path + SORTED_LAYOUT_SUFFIX
+        data = None
+        # a stored copy is valid for the same datafiles
+        if os.path.exists(file_name) and os.path.getmtime(file_name) >= max(
+                os.path.getmtime(self.file_path), os.path.getmtime(self.labels.file_path)):
+            data = np.load(file_name, mmap_mode='r')
+            if data.dtype != np.uint8 or data.shape != self.data.shape:
+                data = None
+
+        if data is None:
+            writer.write_file(file_name, writer.encode_npy(np.take(self.data, order, axis=0)))
+            data = np.load(file_name, mmap_mode='r')
+
+        self.positions = np.empty(len(order), dtype=np.int64)
+        self.positions[order] = np.arange(len(order))
+        stops = np.cumsum([len(self.labels.indexes[digit]) for digit in digits])
+        self.class_ranges = {digit: (int(stop) - len(self.labels.indexes[digit]), int(stop))
+                             for digit, stop in zip(digits, stops)}
+        self.data = data
 
     def read_image_header(self):
         """
@@ -366,6 +705,73 @@ class MNISTImagesFile(MNISTDataFile):
         """
         return struct.unpack(self.image_header_format, self.reader.read(8))
 
+    def take(self, indexes, out=None):
+        """
+        Getting a batch of images data by indexes of records at once.
+
+        Parameters
+        ----------
+        indexes: ndarray
+            An int array of indexes of records of any shape, ex. returned by MNISTLabelsFile.sample.
+
+        out: ndarray   Default: None
+            An uint8 array with a shape indexes.shape + (height, width) to copy images to.
+
+        Returns
+        -------
+        A numpy array containing uint8 elements with a shape indexes.shape + (height, width).
+        """
+        indexes = np.asarray(indexes)
+        if self.positions is not None:
+            indexes = self.positions[indexes]
+
+        return np.take(self.data, indexes, axis=0, out=out)
+
+    def ink(self, threshold=0):
+        """
+        Getting ink extents of all of images. Extents are computing once by a vectorized pass over the db
+        and storing next to the datafile (ex. train-images-idx3-ubyte.ink0.npy), next reads load them.
+
+        Parameters
+        ----------
+        threshold: int   Default: 0
+            Pixels with greater values are ink.
+
+        Returns
+        -------
+        An array of INK_DTYPE with an element per image.
+        """
+        if threshold in self.ink_extents:
+            return self.ink_extents[threshold]
+
+        file_name = "{}.ink{}.npy".format(self.file_path, threshold)
+        ink = None
+        # stored extents are valid for the same datafile
+        if os.path.exists(file_name) and os.path.getmtime(file_name) >= os.path.getmtime(self.file_path):
+            ink = np.load(file_name)
+            if ink.dtype != INK_DTYPE or len(ink) != self.record_count:
+                ink = None
+
+        if ink is None:
+            ink = compute_ink(self.data, threshold=threshold)
+            # extents of a sorted layout are in the order of records
+            if self.positions is not None:
+                ink = ink[self.positions]
+            writer.write_file(file_name, writer.encode_npy(ink))
+
+        self.ink_extents[threshold] = ink
+
+        return ink
+
+    def close(self):
+        """
+        Closing all opened resources including a mapped images data.
+        """
+        super().close()
+        self.data = None
+        self.positions = None
+        self.class_ranges = {}
+
     def __getitem__(self, key):
         """
         Getting an image data.
@@ -389,6 +795,9 @@ class MNISTImagesFile(MNISTDataFile):
         if index < 0:
             # TODO: normal exceptions
             raise Exception("Unknown key")
+        # a sorted layout is mapped already
+        if self.positions is not None:
+            return np.array(self.data[self.positions[index]])
         # find an image position and read it
         self.reader.seek(self.start_offset + index * self.image_offset)
         data = self.reader.read(self.image_offset)
@@ -401,21 +810,68 @@ class MNISTImagesFile(MNISTDataFile):
         return np.reshape(data, (-1, self.image_width))
 
 
-def get_images(data_home=None):
+def compute_ink(data, threshold=0):
+    """
+    Computing ink extents of images by chunks: bounding boxes of ink pixels and a sum of ink values.
+    An image without ink has a box of the whole image.
+
+    Parameters
+    ----------
+    data: ndarray
+        An uint8 array of images with a shape (count, height, width).
+
+    threshold: int   Default: 0
+        Pixels with greater values are ink.
+
+    Returns
+    -------
+    An array of INK_DTYPE with an element per image.
+    """
+    count, height, width = data.shape
+    result = np.zeros(count, dtype=INK_DTYPE)
+
+    for start in range(0, count, INK_CHUNK_SIZE):
+        chunk = np.asarray(data[start:start+INK_CHUNK_SIZE])
+        ink = chunk > threshold
+        part = result[start:start+len(chunk)]
+
+        for axis, (first, last), size in [(1, ('x0', 'x1'), width), (2, ('y0', 'y1'), height)]:
+            # columns (rows) containing ink
+            lines = ink.any(axis=axis)
+            empty = ~lines.any(axis=1)
+            part[first] = np.where(empty, 0, lines.argmax(axis=1))
+            part[last] = np.where(empty, size, size - lines[:, ::-1].argmax(axis=1))
+
+        part['mass'] = np.where(ink, chunk, 0).sum(axis=(1, 2))
+
+    return result
+
+
+def get_images(data_home=None, sorted_layout=False):
     """
     Initializing images and labels DB and storing in a module variable.
-    It is like as a singleton.
+    It is like as a singleton. A db is reading once for a data home, next calls return it.
 
     Parameters
     ----------
     data_home: str      Default: None
         A custom path was storing DB files.
 
+    sorted_layout: boolean   Default: False
+        A flag to map images sorted by labels, see MNISTImagesFile.sort_by_label.
+        A db read before is sorting by a call with the flag.
+
     Returns
     -------
     An DB objects containing handwritten images of digit.
     """
-    global mnist_labeles, mnist_images
+    global mnist_labeles, mnist_images, mnist_data_home
+    # the db is read already
+    if mnist_images is not None and mnist_images.data is not None and mnist_data_home == data_home:
+        if sorted_layout:
+            mnist_images.sort_by_label()
+
+        return mnist_images
 
     if mnist_labeles is None:
         mnist_labeles = MNISTLabelsFile()
@@ -427,15 +883,23 @@ def get_images(data_home=None):
         o.fetch(data_home=data_home)
         o.read(data_home=data_home)
 
+    if sorted_layout:
+        mnist_images.sort_by_label()
+
+    mnist_data_home = data_home
+
     return mnist_images
 
 
-def GenerateTestData(target_dir, width, height, count, without_content=False):
+def GenerateTestData(target_dir, width, height, count, without_content=False,
+                     label_distribution=None, random_content=False, seed=None):
     """
     Generating two datafiles and storing them into a target directory.
     Generated files are including valid headers.
     Contents of the files are just zero values elements excepts the first is equals a value of the generated digit.
     It is useful to check loaded images just sum of all array elements and comparing it with a requested digit.
+    Labels and images are building as whole arrays and writing by one call, so a fixture
+    of a realistic size (ex. 60000 records) is generating fast.
 
     Parameters
     ----------
@@ -455,6 +919,17 @@ def GenerateTestData(target_dir, width, height, count, without_content=False):
     without_content: boolean
         A flag using to skip wrtiting a images content, just writing headers.
         It useful for testing DB classes in invalid data cases.
+
+    label_distribution: list of floats   Default: None
+        Weights of digits from 0 to 9. Labels are choosing randomly by weights if it is set,
+        otherwise labels are cycling digits: 0, 1, ..., 9, 0, 1, ...
+
+    random_content: boolean   Default: False
+        A flag to fill images by random strokes (about 20% of not zero pixels like as MNIST images)
+        instead of a digit value in the first element.
+
+    seed: None or int   Default: None
+        A seed of random labels and content.
     """
     labels_db = MNISTLabelsFile()
     images_db = MNISTImagesFile(labels_db)
@@ -464,6 +939,23 @@ def GenerateTestData(target_dir, width, height, count, without_content=False):
     images_test_file = get_data_file_path(
         images_db.file_name, data_home=target_dir)
 
+    rng = helper.get_rng(seed)
+    # build contents
+    if label_distribution is None:
+        labels_data = (np.arange(count) % 10).astype(np.uint8)
+    else:
+        weights = np.asarray(label_distribution, dtype=np.float64)
+        if weights.shape != (10,) or (weights < 0).any() or weights.sum() <= 0:
+            raise Exception("label distribution {} has to contain 10 not negative weights".format(label_distribution))
+        labels_data = rng.choice(10, size=count, p=weights / weights.sum()).astype(np.uint8)
+
+    if random_content:
+        images_data = rng.integers(1, 256, size=(count, width*height), dtype=np.uint8)
+        images_data[rng.integers(0, 5, size=images_data.shape, dtype=np.uint8) != 0] = 0
+    else:
+        images_data = np.zeros(shape=(count, width*height), dtype=np.uint8)
+        images_data[:, 0] = labels_data
+
     with open(labels_test_file, 'wb') as labels:
         print("Write test labels data to '{}'".format(labels_test_file))
         with open(images_test_file, 'wb') as images:
@@ -479,15 +971,11 @@ def GenerateTestData(target_dir, width, height, count, without_content=False):
             images.write(struct.pack(
                 images_db.image_header_format, width, height))
             # write content
-            sz = width*height
-
             if not without_content:
-                for i in range(count):
-                    labels.write(struct.pack("B", i % 10))
-
-                    data = np.zeros(sz, dtype=np.uint8)
-                    data[0] = i % 10
-                    images.write(data)
+                labels.flush()
+                labels_data.tofile(labels)
+                images.flush()
+                images_data.tofile(images)
 
     print("Complete")
 
@@ -498,19 +986,22 @@ if __name__ == '__main__':
 
     Example:
         python mnistdata.py ./test-data
+        python mnistdata.py ./test-data -n 60000 --random_content --seed 1
 
     Requirements arguments:
         target dir
         A target directory to store testing datafiles.
-    """
-    if len(sys.argv) != 2:
-        print("Expected a target dirname, but got more or less arguments\n")
-        print("Using: python minstdata.py target_test_path\n")
-        exit
 
-    target_dir = sys.argv[1]
-
-    width, height = 28, 28
-    count = 20
-
-    GenerateTestData(target_dir, width, height, count)
+    Optiononal arguments:
+        See argsparser.test_data_parser.
+    """
+    args = argsparser.test_data_parser().parse_args()
+
+    try:
+        GenerateTestData(args.target_directory, args.width, args.height, args.count,
+                         label_distribution=args.label_distribution,
+                         random_content=args.random_content,
+                         seed=args.seed)
+    except Exception as e:
+        print("failed to generate test datafiles: ", e)
+        exit(-1)
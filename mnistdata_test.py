@@ -1,6 +1,8 @@
 import unittest
+import json
 import os
 import shutil
+import numpy as np
 
 if __name__.find('.')<0:
     import mnistdata
@@ -107,6 +109,144 @@ class TestMnistDataFetch(unittest.TestCase):
             exist = sum(sum(self.images_db[i]))
             self.assertEqual(exist, expected[i])
     
+    def test_data_sample(self):
+        mnistdata.GenerateTestData(
+            TestMnistDataFetch.test_data_home_path, 28, 28, 20)
+
+        self.labels_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+        self.images_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+
+        digits = np.array([[1, 2, 3], [9, 0, 1]])
+
+        indexes = self.labels_db.sample(digits)
+        self.assertEqual(indexes.shape, (2, 3))
+        self.assertTrue(np.array_equal(indexes % 10, digits))
+
+        imgs = self.images_db.take(indexes)
+        self.assertEqual(imgs.shape, (2, 3, 28, 28))
+        self.assertTrue(np.array_equal(imgs.sum(axis=(2, 3)), digits))
+
+        with self.assertRaises(Exception):
+            self.labels_db.sample([10])
+
+    def test_epoch_sampler(self):
+        mnistdata.GenerateTestData(
+            TestMnistDataFetch.test_data_home_path, 28, 28, 20)
+
+        self.labels_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+        # 2 images of each digit
+        sampler = mnistdata.EpochSampler(self.labels_db, seed=7)
+
+        indexes = sampler.sample(np.array([[1, 1], [2, 1]]))
+        self.assertTrue(np.array_equal(indexes % 10, [[1, 1], [2, 1]]))
+        # each image of a digit is using once per epoch
+        self.assertEqual(sorted(indexes[indexes % 10 == 1][:2].tolist()), [1, 11])
+        self.assertEqual(sampler.epochs[1], 1)
+        self.assertEqual(sampler.cursors[1], 1)
+        # resume from a saved state
+        state = json.loads(json.dumps(sampler.state()))
+        expected = sampler.sample(np.arange(10).repeat(5))
+
+        restored = mnistdata.EpochSampler(self.labels_db)
+        restored.load_state(state)
+        self.assertTrue(np.array_equal(restored.sample(np.arange(10).repeat(5)), expected))
+        # seek to a position by counts of handed out indexes
+        sought = mnistdata.EpochSampler(self.labels_db, seed=sampler.seed)
+        sought.seek(np.bincount([1, 1, 2, 1], minlength=10))
+        self.assertTrue(np.array_equal(sought.sample(np.arange(10).repeat(5)), expected))
+
+        with self.assertRaises(Exception):
+            sampler.sample([10])
+
+    def test_ink(self):
+        mnistdata.GenerateTestData(
+            TestMnistDataFetch.test_data_home_path, 20, 24, 300, random_content=True, seed=5)
+
+        self.labels_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+        self.images_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+
+        ink = self.images_db.ink(threshold=10)
+        self.assertEqual(ink.dtype, mnistdata.INK_DTYPE)
+        for index in [0, 7, 299]:
+            ys, xs = np.nonzero(self.images_db.data[index] > 10)
+            self.assertEqual(ink[index].tolist(), (xs.min(), xs.max() + 1, ys.min(), ys.max() + 1,
+                                                   self.images_db.data[index][ys, xs].astype(int).sum()))
+        # extents are stored next to the datafile and loaded by the next reading
+        ink_file_name = self.images_db.file_path + ".ink10.npy"
+        self.assertTrue(os.path.exists(ink_file_name))
+        self.images_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+        self.assertTrue(np.array_equal(self.images_db.ink(threshold=10), ink))
+        # an image without ink has a box of the whole image
+        empty = mnistdata.compute_ink(np.zeros((1, 24, 20), dtype=np.uint8))
+        self.assertEqual(empty[0].tolist(), (0, 20, 0, 24, 0))
+        # sample narrow images only
+        narrow = ink['x1'] - ink['x0'] <= np.median(ink['x1'] - ink['x0'])
+        sampler = mnistdata.SubsetSampler(self.labels_db, narrow, seed=1)
+        indexes = sampler.sample(np.arange(10).repeat(20))
+        self.assertTrue(narrow[indexes].all())
+        for digit, index in zip(np.arange(10).repeat(20), indexes):
+            self.assertIn(index, self.labels_db.indexes[digit])
+
+    def test_sorted_layout(self):
+        mnistdata.GenerateTestData(
+            TestMnistDataFetch.test_data_home_path, 20, 24, 300,
+            label_distribution=[1, 2, 1, 1, 1, 1, 1, 1, 1, 3], random_content=True, seed=6)
+
+        self.labels_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+        self.images_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+        indexes = self.labels_db.sample(np.arange(10).repeat(30), rng=np.random.default_rng(1))
+        expected = self.images_db.take(indexes)
+        expected_ink = self.images_db.ink()
+        digit_imgs = {digit: self.images_db.take(self.labels_db.indexes[digit]) for digit in range(10)}
+
+        self.images_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path, sorted_layout=True)
+        # images of each digit are a contiguous range
+        self.assertEqual(sorted(self.images_db.class_ranges), list(range(10)))
+        for digit, (start, stop) in self.images_db.class_ranges.items():
+            self.assertEqual(stop - start, len(self.labels_db.indexes[digit]))
+            self.assertTrue(np.array_equal(self.images_db.data[start:stop], digit_imgs[digit]))
+        # indexes of records are the same
+        self.assertTrue(np.array_equal(self.images_db.take(indexes), expected))
+        self.assertTrue(np.array_equal(self.images_db.take(indexes[7]), expected[7]))
+        self.labels_db.rng = np.random.default_rng(2)
+        index = np.random.default_rng(2).integers(len(self.labels_db.indexes[9]))
+        self.assertTrue(np.array_equal(self.images_db[9], self.images_db.take(self.labels_db.indexes[9][index])))
+        # a sorted copy is stored next to the datafile and extents are in the order of records
+        self.assertTrue(os.path.exists(self.images_db.file_path + mnistdata.SORTED_LAYOUT_SUFFIX))
+        os.remove(self.images_db.file_path + ".ink0.npy")
+        self.assertTrue(np.array_equal(self.images_db.ink(), expected_ink))
+
+        self.images_db.close()
+        self.assertIsNone(self.images_db.positions)
+
+    def test_generate_test_data(self):
+        mnistdata.GenerateTestData(
+            TestMnistDataFetch.test_data_home_path, 20, 24, 500,
+            label_distribution=[0, 1, 1, 1, 1, 1, 1, 1, 1, 5], random_content=True, seed=3)
+
+        self.labels_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+        self.images_db.read(
+            data_home=TestMnistDataFetch.test_data_home_path)
+
+        self.assertEqual(self.images_db.data.shape, (500, 24, 20))
+        self.assertNotIn(0, self.labels_db.indexes)
+        self.assertGreater(len(self.labels_db.indexes[9]), len(self.labels_db.indexes[1]) * 2)
+        self.assertTrue(0.1 < (self.images_db.data > 0).mean() < 0.3)
+
+        with self.assertRaises(Exception):
+            mnistdata.GenerateTestData(
+                TestMnistDataFetch.test_data_home_path, 28, 28, 10, label_distribution=[1, 2])
+
     def test_data_read_fail(self):
         mnistdata.GenerateTestData(
             TestMnistDataFetch.test_data_home_path, 28, 28, 20, without_content=True)
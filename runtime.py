@@ -0,0 +1,172 @@
+import contextlib
+import os
+
+# threadpoolctl limits thread pools of already loaded libraries, it is optional
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+# environment variables of sizes of thread pools of BLAS and OpenMP libraries used by NumPy and SciPy
+RUNTIME_THREAD_ENV = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+]
+
+# limits of thread pools applied by threadpoolctl are active while the object is alive
+_thread_limits = None
+
+
+def available_cpus():
+    """
+    Returns
+    -------
+    A sorted list of indexes of CPUs available to a process.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+
+    return list(range(os.cpu_count() or 1))
+
+
+def thread_env(threads):
+    """
+    Returns
+    -------
+    A dictionary of environment variables limiting thread pools of libraries to a count of threads.
+    """
+    return {name: str(int(threads)) for name in RUNTIME_THREAD_ENV}
+
+
+@contextlib.contextmanager
+def environ(values):
+    """
+    A context setting environment variables and restoring them on exit,
+    ex. to start a process with limited thread pools of libraries.
+    """
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def limit_threads(threads):
+    """
+    Limiting thread pools of BLAS and OpenMP libraries of a process.
+    Environment variables are affecting libraries loaded after the call (ex. in a spawned process),
+    libraries loaded before are limiting by threadpoolctl if it is installed.
+
+    Parameters
+    ----------
+    threads: int
+        A maximum count of threads of a pool.
+    """
+    global _thread_limits
+
+    threads = int(threads)
+    if threads <= 0:
+        raise Exception("count of threads {} has to be a positive number".format(threads))
+
+    os.environ.update(thread_env(threads))
+    if threadpoolctl is not None:
+        _thread_limits = threadpoolctl.threadpool_limits(limits=threads)
+
+
+def pin_cpus(cpus):
+    """
+    Pinning a process to CPUs. A call is ignored by a platform without CPU affinity.
+
+    Parameters
+    ----------
+    cpus: list of ints
+        Indexes of CPUs.
+    """
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+
+def worker_cpus(rank, workers, threads=1, cpus=None):
+    """
+    Getting CPUs of a worker of a pool: workers take successive blocks of threads CPUs,
+    blocks wrap around if workers need more CPUs than available.
+
+    Parameters
+    ----------
+    rank: int
+        An index of a worker.
+
+    workers: int
+        A count of workers.
+
+    threads: int   Default: 1
+        A count of threads of a worker.
+
+    cpus: list of ints   Default: None
+        CPUs of a pool, available CPUs are using if it is None.
+
+    Returns
+    -------
+    A list of indexes of CPUs.
+    """
+    cpus = cpus or available_cpus()
+    start = rank * threads
+
+    return sorted(set(cpus[(start + i) % len(cpus)] for i in range(min(threads, len(cpus)))))
+
+
+def runtime_info():
+    """
+    Getting a runtime configuration of a process.
+
+    Returns
+    -------
+    A dictionary with keys: pid, cpus (CPUs of a process), threads (a limit of thread pools of environment variables
+    or None), pools (thread pools of loaded libraries, a list of dicts with keys: api, library, threads;
+    None if threadpoolctl is not installed).
+    """
+    threads = os.environ.get('OMP_NUM_THREADS')
+    pools = None
+    if threadpoolctl is not None:
+        pools = [{'api': pool['user_api'], 'library': pool['internal_api'], 'threads': pool['num_threads']}
+                 for pool in threadpoolctl.threadpool_info()]
+
+    return {
+        'pid': os.getpid(),
+        'cpus': available_cpus(),
+        'threads': int(threads) if threads else None,
+        'pools': pools,
+    }
+
+
+def configure_worker(threads=None, cpus=None):
+    """
+    Configuring a runtime of a worker process: limiting thread pools and pinning to CPUs.
+
+    Parameters
+    ----------
+    threads: int   Default: None
+        A maximum count of threads of pools of libraries, pools are not limiting if it is None.
+
+    cpus: list of ints   Default: None
+        CPUs of a worker, a worker is not pinning if it is None.
+
+    Returns
+    -------
+    A runtime configuration of a worker, see runtime_info.
+    """
+    if threads:
+        limit_threads(threads)
+    if cpus:
+        pin_cpus(cpus)
+
+    return runtime_info()
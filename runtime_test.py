@@ -0,0 +1,49 @@
+import unittest
+import concurrent.futures
+import multiprocessing
+import os
+
+if __name__.find('.')<0:
+    import runtime
+else:
+    from . import runtime
+
+
+class TestRuntime(unittest.TestCase):
+    def test_worker_cpus(self):
+        cpus = [0, 1, 2, 3, 4, 5]
+
+        self.assertEqual([runtime.worker_cpus(rank, 3, 2, cpus) for rank in range(3)], [[0, 1], [2, 3], [4, 5]])
+        # workers wrap around if they need more CPUs than available
+        self.assertEqual([runtime.worker_cpus(rank, 4, 2, cpus) for rank in range(4)],
+                         [[0, 1], [2, 3], [4, 5], [0, 1]])
+        self.assertEqual(runtime.worker_cpus(0, 1, 8, cpus), cpus)
+        self.assertTrue(set(runtime.worker_cpus(0, 1)) <= set(runtime.available_cpus()))
+
+    def test_environ(self):
+        name = runtime.RUNTIME_THREAD_ENV[0]
+        previous = os.environ.get(name)
+
+        with runtime.environ(runtime.thread_env(3)):
+            self.assertEqual(os.environ[name], "3")
+
+        self.assertEqual(os.environ.get(name), previous)
+
+        with self.assertRaises(Exception):
+            runtime.limit_threads(0)
+
+    def test_configure_worker(self):
+        # limits are applying in a child process, not to a process of tests
+        ctx = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+            info = executor.submit(runtime.configure_worker, threads=2, cpus=runtime.available_cpus()[:1]).result()
+
+        self.assertEqual(info['threads'], 2)
+        self.assertEqual(info['cpus'], runtime.available_cpus()[:1])
+        self.assertNotEqual(info['pid'], os.getpid())
+        if info['pools'] is not None:
+            self.assertTrue(all(pool['threads'] <= 2 for pool in info['pools']))
+
+
+if __name__ == '__main__':
+    unittest.main()
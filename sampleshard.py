@@ -0,0 +1,257 @@
+import json
+import lzma
+import struct
+import zlib
+import numpy as np
+
+if __name__.find('.')<0:
+    import writer
+else:
+    from . import writer
+
+SAMPLE_SHARD_MAGIC = b'MNISTSMP'
+SAMPLE_SHARD_VERSION = 1
+# codecs of samples: zlib, lzma and packed - deltas of rows of uint8 samples packed to a bitmap of changes
+# and values of changes, it is decoding by a few vectorized NumPy operations
+SAMPLE_SHARD_CODECS = ['zlib', 'lzma', 'packed']
+SAMPLE_SHARD_EXTENSION = ".smp"
+# samples are compressing by chunks, a chunk is a task of a pool of threads
+SAMPLE_SHARD_CHUNK_SIZE = 64
+
+
+def encode_chunk(arr, codec, level=writer.WRITER_DEFAULT_COMPRESS_LEVEL):
+    """
+    Compressing each sample of a chunk independently.
+
+    Parameters
+    ----------
+    arr: ndarray
+        An array of samples with a shape (count, ...).
+
+    codec: str
+        A codec, one of SAMPLE_SHARD_CODECS.
+
+    level: int   Default: writer.WRITER_DEFAULT_COMPRESS_LEVEL
+        A compression level of zlib (0-9) or a preset of lzma (0-9).
+
+    Returns
+    -------
+    A list of bytes of samples.
+    """
+    if codec == 'zlib':
+        return [zlib.compress(np.ascontiguousarray(sample).tobytes(), level) for sample in arr]
+    if codec == 'lzma':
+        return [lzma.compress(np.ascontiguousarray(sample).tobytes(), preset=level) for sample in arr]
+    if codec != 'packed':
+        raise Exception("unknown codec '{}', supported are {}".format(codec, SAMPLE_SHARD_CODECS))
+    if arr.dtype != np.uint8:
+        raise Exception("packed codec supports uint8 samples only, got {}".format(arr.dtype))
+    # deltas of neighbour pixels of rows wrap around 256, a white or a flat area has zero deltas
+    flat = arr.reshape(len(arr), -1, arr.shape[-1]) if arr.ndim > 1 else arr.reshape(len(arr), 1, 1)
+    deltas = np.diff(flat, axis=-1, prepend=np.zeros(flat.shape[:-1] + (1,), dtype=np.uint8))
+    deltas = deltas.reshape(len(arr), -1)
+    mask = deltas != 0
+    bitmaps = np.packbits(mask, axis=1)
+    values = deltas[mask]
+    ends = np.cumsum(mask.sum(axis=1))
+
+    return [bitmap.tobytes() + values[end - count:end].tobytes()
+            for bitmap, end, count in zip(bitmaps, ends, mask.sum(axis=1))]
+
+
+def decode_sample(data, codec, shape, dtype):
+    """
+    Decompressing a sample.
+
+    Parameters
+    ----------
+    data: bytes-like
+        Compressed bytes of a sample.
+
+    codec: str
+        A codec of a sample.
+
+    shape: tuple
+        A shape of a sample.
+
+    dtype: numpy.dtype
+        A type of items of a sample.
+
+    Returns
+    -------
+    An array of a sample.
+    """
+    if codec == 'zlib':
+        return np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(shape)
+    if codec == 'lzma':
+        return np.frombuffer(lzma.decompress(data), dtype=dtype).reshape(shape)
+
+    size = int(np.prod(shape, dtype=np.int64))
+    data = np.frombuffer(data, dtype=np.uint8)
+    bitmap_size = -(-size // 8)
+    mask = np.unpackbits(data[:bitmap_size], count=size).astype(bool)
+
+    deltas = np.zeros(size, dtype=np.uint8)
+    deltas[mask] = data[bitmap_size:]
+    width = shape[-1] if shape else 1
+
+    return np.cumsum(deltas.reshape(-1, width), axis=-1, dtype=np.uint8).reshape(shape)
+
+
+def encode_shard(arr, codec, level=writer.WRITER_DEFAULT_COMPRESS_LEVEL, executor=None):
+    """
+    Encoding an array of samples to a sample shard:
+    a magic, a length of a JSON header, a JSON header (version, codec, dtype, shape of a sample, count),
+    an offset table of samples (count + 1 uint64 offsets from the beginning of data) and compressed samples.
+
+    Parameters
+    ----------
+    arr: ndarray
+        An array of samples with a shape (count, ...).
+
+    codec, level:
+        A codec and a compression level, see encode_chunk.
+
+    executor: concurrent.futures.Executor   Default: None
+        A pool of threads compressing chunks of samples in parallel (zlib and lzma release the GIL).
+        Samples are compressing by the calling thread if it is None.
+
+    Returns
+    -------
+    A list of bytes parts of a file, see writer.write_stream.
+    """
+    if codec not in SAMPLE_SHARD_CODECS:
+        raise Exception("unknown codec '{}', supported are {}".format(codec, SAMPLE_SHARD_CODECS))
+
+    chunks = [arr[start:start+SAMPLE_SHARD_CHUNK_SIZE] for start in range(0, len(arr), SAMPLE_SHARD_CHUNK_SIZE)]
+    if executor is not None:
+        results = executor.map(encode_chunk, chunks, [codec] * len(chunks), [level] * len(chunks))
+    else:
+        results = (encode_chunk(chunk, codec, level) for chunk in chunks)
+    samples = [sample for result in results for sample in result]
+
+    offsets = np.zeros(len(samples) + 1, dtype='<u8')
+    offsets[1:] = np.cumsum([len(sample) for sample in samples])
+    header = json.dumps({
+        'version': SAMPLE_SHARD_VERSION,
+        'codec': codec,
+        'dtype': arr.dtype.str,
+        'shape': list(arr.shape[1:]),
+        'count': len(arr),
+    }).encode()
+
+    return [SAMPLE_SHARD_MAGIC, struct.pack('<I', len(header)), header, offsets.tobytes()] + samples
+
+
+def write_shard(file_name, arr, codec, level=writer.WRITER_DEFAULT_COMPRESS_LEVEL, executor=None, fsync='none'):
+    """
+    Storing an array of samples as a sample shard atomically, see encode_shard and writer.write_stream.
+    """
+    writer.write_stream(file_name, encode_shard(arr, codec, level=level, executor=executor), fsync=fsync)
+
+
+class SampleShard:
+    """
+    A reader of a sample shard. A file is mapping to memory and a sample is decompressing on demand
+    by offsets: an access of a sample is O(1) and doesn't depend on other samples, so many threads
+    read and decompress samples in parallel.
+    An object is array-like: len, indexing by an int, a slice or a list of indexes and numpy.asarray.
+    """
+
+    def __init__(self, file_name):
+        """
+        Parameters
+        ----------
+        file_name: str
+            A name of a sample shard file.
+        """
+        self.file_name = file_name
+        self.data = np.memmap(file_name, dtype=np.uint8, mode='r')
+
+        if self.data[:len(SAMPLE_SHARD_MAGIC)].tobytes() != SAMPLE_SHARD_MAGIC:
+            raise Exception("'{}' is not a sample shard".format(file_name))
+
+        start = len(SAMPLE_SHARD_MAGIC)
+        header_size, = struct.unpack('<I', self.data[start:start+4].tobytes())
+        header = json.loads(self.data[start+4:start+4+header_size].tobytes())
+        if header['version'] > SAMPLE_SHARD_VERSION:
+            raise Exception("'{}' has unsupported version {}".format(file_name, header['version']))
+
+        self.codec = header['codec']
+        self.dtype = np.dtype(header['dtype'])
+        self.sample_shape = tuple(header['shape'])
+        self.count = header['count']
+
+        start += 4 + header_size
+        self.offsets = self.data[start:start+8*(self.count+1)].view('<u8')
+        self.base = start + 8 * (self.count + 1)
+
+    @property
+    def shape(self):
+        return (self.count,) + self.sample_shape
+
+    def __len__(self):
+        return self.count
+
+    def sample(self, index):
+        """
+        Decompressing a sample by an index.
+        """
+        if not -self.count <= index < self.count:
+            raise IndexError("index {} is out of a shard of {} samples".format(index, self.count))
+        index %= self.count
+
+        start, stop = self.base + int(self.offsets[index]), self.base + int(self.offsets[index + 1])
+
+        return decode_sample(self.data[start:stop], self.codec, self.sample_shape, self.dtype)
+
+    def read(self, indexes=None, executor=None):
+        """
+        Decompressing samples.
+
+        Parameters
+        ----------
+        indexes: list of ints   Default: None
+            Indexes of samples, all of samples if it is None.
+
+        executor: concurrent.futures.Executor   Default: None
+            A pool of threads decompressing samples in parallel.
+
+        Returns
+        -------
+        An array with a shape (count of indexes, ...).
+        """
+        indexes = range(self.count) if indexes is None else indexes
+        out = np.empty((len(indexes),) + self.sample_shape, dtype=self.dtype)
+
+        def decode(i):
+            out[i] = self.sample(indexes[i])
+
+        if executor is not None:
+            list(executor.map(decode, range(len(indexes))))
+        else:
+            for i in range(len(indexes)):
+                decode(i)
+
+        return out
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.read(range(*index.indices(self.count)))
+        if isinstance(index, (int, np.integer)):
+            return self.sample(int(index))
+
+        return self.read(list(index))
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.read()
+
+        return arr if dtype is None else arr.astype(dtype)
+
+    def nbytes(self):
+        """
+        Returns
+        -------
+        A size of a file in bytes.
+        """
+        return len(self.data)
@@ -0,0 +1,81 @@
+import unittest
+import concurrent.futures
+import os
+import shutil
+import numpy as np
+
+if __name__.find('.')<0:
+    import sampleshard
+else:
+    from . import sampleshard
+
+
+class TestSampleShard(unittest.TestCase):
+    test_dir = "test-data/sampleshard"
+
+    def setUp(self):
+        shutil.rmtree(TestSampleShard.test_dir, ignore_errors=True)
+        os.makedirs(TestSampleShard.test_dir)
+
+        rng = np.random.default_rng(1)
+        # mostly white images with dark strokes, a count is not a multiple of a chunk
+        self.imgs = np.full((150, 28, 61), 255, dtype=np.uint8)
+        self.imgs[:, 5:20, 10:40] = rng.integers(256, size=(150, 15, 30), dtype=np.uint8)
+        self.imgs[3] = 0
+
+    def tearDown(self):
+        shutil.rmtree(TestSampleShard.test_dir, ignore_errors=True)
+
+    def test_codecs(self):
+        file_name = os.path.join(TestSampleShard.test_dir, "shard.smp")
+
+        for codec in sampleshard.SAMPLE_SHARD_CODECS:
+            sampleshard.write_shard(file_name, self.imgs, codec)
+            shard = sampleshard.SampleShard(file_name)
+
+            self.assertEqual(shard.codec, codec)
+            self.assertEqual(len(shard), 150)
+            self.assertEqual(shard.shape, self.imgs.shape)
+            self.assertLess(shard.nbytes(), self.imgs.nbytes)
+            self.assertTrue(np.array_equal(np.asarray(shard), self.imgs))
+
+        with self.assertRaises(Exception):
+            sampleshard.write_shard(file_name, self.imgs, 'png')
+        with self.assertRaises(Exception):
+            sampleshard.write_shard(file_name, self.imgs.astype(np.float32), 'packed')
+
+    def test_float_samples(self):
+        file_name = os.path.join(TestSampleShard.test_dir, "float.smp")
+        imgs = self.imgs.astype(np.float32) / 255
+
+        sampleshard.write_shard(file_name, imgs, 'zlib')
+        shard = sampleshard.SampleShard(file_name)
+        self.assertEqual(shard.dtype, np.float32)
+        self.assertTrue(np.array_equal(shard[:], imgs))
+
+    def test_random_access(self):
+        file_name = os.path.join(TestSampleShard.test_dir, "shard.smp")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            sampleshard.write_shard(file_name, self.imgs, 'packed', executor=executor)
+            shard = sampleshard.SampleShard(file_name)
+
+            self.assertTrue(np.array_equal(shard[7], self.imgs[7]))
+            self.assertTrue(np.array_equal(shard[-1], self.imgs[-1]))
+            self.assertTrue(np.array_equal(shard[10:100:7], self.imgs[10:100:7]))
+            self.assertTrue(np.array_equal(shard[[149, 3, 0]], self.imgs[[149, 3, 0]]))
+            # many threads decompress samples of the same shard
+            indexes = np.random.default_rng(2).permutation(150)
+            self.assertTrue(np.array_equal(shard.read(indexes, executor=executor), self.imgs[indexes]))
+
+        with self.assertRaises(IndexError):
+            shard[150]
+
+        with open(file_name, 'wb') as f:
+            f.write(b'not a shard')
+        with self.assertRaises(Exception):
+            sampleshard.SampleShard(file_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
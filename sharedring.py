@@ -0,0 +1,602 @@
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+if __name__.find('.')<0:
+    import bulk
+    import filters
+    import helper
+    import mnistdata
+    import runtime
+    import streaming
+else:
+    from . import bulk
+    from . import filters
+    from . import helper
+    from . import mnistdata
+    from . import runtime
+    from . import streaming
+
+SHARED_RING_SLOTS = 4
+# kinds of messages of a ready queue
+SHARED_RING_BATCH = 'batch'
+SHARED_RING_DONE = 'done'
+SHARED_RING_ERROR = 'error'
+SHARED_RING_INFO = 'info'
+# a start method of workers of a ProducerPool: a spawned process loads libraries after limits of thread pools are set,
+# a forked one inherits thread pools of loaded libraries which are limiting by threadpoolctl only
+SHARED_RING_POOL_START_METHOD = 'spawn'
+
+
+class RingBatch:
+    """
+    A batch received from a ring: a view of a slot of shared memory (not a copy) and metadata of a producer.
+    A view is valid till a batch is released, copy it to keep data longer.
+    """
+
+    def __init__(self, ring, slot, count, meta):
+        self.ring = ring
+        self.slot = slot
+        self.count = count
+        self.meta = meta
+        self.data = ring.slot(slot)[:count]
+
+    def release(self):
+        """
+        Returning a slot to a producer.
+        """
+        if self.data is not None:
+            self.data = None
+            self.ring.release(self.slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class SharedRing:
+    """
+    A transport of batches from producer processes to a consumer process without pickling images.
+    A ring is a fixed count of slots of preallocated shared memory, a slot holds a batch with a shape
+    (capacity, ...). A producer takes a free slot, writes a batch into it and sends a small message
+    with an index of a slot and metadata, a consumer maps a slot as an array without a copy
+    and returns it to free slots after using.
+
+    A ring is creating by a parent process and passing to producer processes as an argument of a process,
+    see start_producer. A creator process of a ring unlinks shared memory by close.
+    """
+
+    def __init__(self, shape, dtype=np.uint8, slots=SHARED_RING_SLOTS, ctx=None):
+        """
+        Parameters
+        ----------
+        shape: tuple of ints
+            A shape of a slot, ex. (a batch size, an image height, an image width).
+
+        dtype: numpy.dtype   Default: numpy.uint8
+            A type of items of slots.
+
+        slots: int   Default: SHARED_RING_SLOTS
+            A count of slots: a count of batches generating ahead of a consumer.
+
+        ctx: multiprocessing context   Default: None
+            A context of creating queues and processes, pool_context() is using if it is None:
+            spawned producers load libraries after limits of thread pools are set, see ProducerPool.
+        """
+        if int(slots) <= 0:
+            raise Exception("count of slots {} has to be a positive number".format(slots))
+
+        self.shape = tuple(int(v) for v in shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = int(slots)
+        self.ctx = ctx or pool_context()
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, self.slot_bytes() * self.slots))
+        # a pid of a creator, a forked producer inherits a ring as is
+        self.owner = os.getpid()
+        self.free = self.ctx.Queue()
+        self.ready = self.ctx.Queue()
+        # runtime configurations reported by producers, see report
+        self.infos = {}
+        for slot in range(self.slots):
+            self.free.put(slot)
+
+        self.array = self.map()
+
+    def __getstate__(self):
+        return {
+            'shape': self.shape,
+            'dtype': self.dtype.str,
+            'slots': self.slots,
+            'name': self.shm.name,
+            'free': self.free,
+            'ready': self.ready,
+        }
+
+    def __setstate__(self, state):
+        self.shape = state['shape']
+        self.dtype = np.dtype(state['dtype'])
+        self.slots = state['slots']
+        self.ctx = None
+        self.shm = shared_memory.SharedMemory(name=state['name'])
+        self.owner = None
+        self.free = state['free']
+        self.ready = state['ready']
+        self.infos = {}
+
+        self.array = self.map()
+
+    def slot_bytes(self):
+        """
+        Returns
+        -------
+        A size of a slot in bytes.
+        """
+        return int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize
+
+    def map(self):
+        """
+        Returns
+        -------
+        An array of all of slots mapped to shared memory.
+        """
+        return np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def slot(self, slot):
+        """
+        Returns
+        -------
+        An array of a slot mapped to shared memory.
+        """
+        return self.array[slot]
+
+    def acquire(self, timeout=None):
+        """
+        Taking a free slot by a producer, waiting while a consumer holds all of slots.
+
+        Returns
+        -------
+        An index of a slot.
+        """
+        return self.free.get(timeout=timeout)
+
+    def publish(self, slot, count, meta=None):
+        """
+        Sending a written slot to a consumer.
+
+        Parameters
+        ----------
+        slot: int
+            An index of a slot taken by acquire.
+
+        count: int
+            A count of items of a batch (a size of the first dimension), up to a capacity of a slot.
+
+        meta: object   Default: None
+            Picklable metadata of a batch, ex. labels and annotations.
+        """
+        self.ready.put((SHARED_RING_BATCH, slot, int(count), meta))
+
+    def put(self, batch, meta=None, timeout=None):
+        """
+        Copying a batch to a free slot and sending it to a consumer.
+
+        Parameters
+        ----------
+        batch: ndarray
+            A batch with a shape (count, ...) fitting a slot.
+
+        meta: object   Default: None
+            Picklable metadata of a batch.
+        """
+        if len(batch) > self.shape[0] or batch.shape[1:] != self.shape[1:]:
+            raise Exception("batch has a shape {}, but a slot has {}".format(batch.shape, self.shape))
+
+        slot = self.acquire(timeout=timeout)
+        self.slot(slot)[:len(batch)] = batch
+        self.publish(slot, len(batch), meta=meta)
+
+    def done(self):
+        """
+        Notifying a consumer that a producer has no more batches.
+        """
+        self.ready.put((SHARED_RING_DONE, None, 0, None))
+
+    def fail(self, e):
+        """
+        Notifying a consumer that a producer failed.
+        """
+        self.ready.put((SHARED_RING_ERROR, None, 0, "{}: {}".format(type(e).__name__, e)))
+
+    def report(self, rank, info):
+        """
+        Sending a runtime configuration of a producer to a consumer, see runtime.runtime_info.
+        """
+        self.ready.put((SHARED_RING_INFO, rank, 0, info))
+
+    def get(self, timeout=None):
+        """
+        Receiving a batch by a consumer. Reports of producers are storing to infos by ranks.
+
+        Returns
+        -------
+        A RingBatch or None if a producer has no more batches.
+
+        Raises
+        ------
+        An exception if a producer failed or queue.Empty if a timeout expired.
+        """
+        kind, slot, count, meta = self.ready.get(timeout=timeout)
+        while kind == SHARED_RING_INFO:
+            self.infos[slot] = meta
+            kind, slot, count, meta = self.ready.get(timeout=timeout)
+        if kind == SHARED_RING_ERROR:
+            raise Exception("producer failed: {}".format(meta))
+        if kind == SHARED_RING_DONE:
+            return None
+
+        return RingBatch(self, slot, count, meta)
+
+    def release(self, slot):
+        """
+        Returning a slot to free slots.
+        """
+        self.free.put(slot)
+
+    def batches(self, producers=1, timeout=None):
+        """
+        Iterating batches of producers till all of them are done.
+        A batch is releasing when the next one is requesting, copy its data to keep it longer.
+
+        Parameters
+        ----------
+        producers: int   Default: 1
+            A count of producers writing to a ring.
+
+        timeout: float   Default: None
+            Seconds of waiting a batch.
+
+        Returns
+        -------
+        A generator of RingBatch.
+        """
+        while producers > 0:
+            batch = self.get(timeout=timeout)
+            if batch is None:
+                producers -= 1
+                continue
+
+            try:
+                yield batch
+            finally:
+                batch.release()
+
+    def close(self):
+        """
+        Closing shared memory of a process, a creator of a ring unlinks it.
+        All of views of slots have to be released before.
+        """
+        if self.shm is None:
+            return
+
+        self.array = None
+        self.shm.close()
+        if self.owner == os.getpid():
+            self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def produce(ring, batches):
+    """
+    Sending batches to a ring and notifying a consumer about the end or a fail of a producer.
+
+    Parameters
+    ----------
+    ring: SharedRing
+        A ring.
+
+    batches: iterable
+        An iterable of tuples of a function writing a batch to a slot (it gets an array of a slot
+        and returns a count of items) and metadata of a batch.
+    """
+    try:
+        for write, meta in batches:
+            slot = ring.acquire()
+            try:
+                count = write(ring.slot(slot))
+            except BaseException:
+                ring.release(slot)
+                raise
+            ring.publish(slot, count, meta=meta)
+    except Exception as e:
+        ring.fail(e)
+        raise
+
+    ring.done()
+
+
+def produce_bulk(ring, count, length=(1, 10), spacing_range=None, image_width=None, image_height=None,
+                 line_length=None, evenly=False, filters_str=None, balanced=False,
+                 resize_mode=filters.RESIZE_DEFAULT_MODE, seed=None,
+                 data_home=None, images=None, rank=0, world_size=1):
+    """
+    Generating samples of a bulk dataset by shards to a ring. A shard is the same as bulk.generate_bulk
+    generates with the same seed, a size of a shard is a capacity of a slot.
+    Producers with a rank split shards of a dataset like nodes of a multi-node bulk job.
+
+    Parameters
+    ----------
+    ring: SharedRing
+        A ring of uint8 slots with a shape (a shard size, image height, image width).
+
+    count, length, spacing_range, image_width, image_height, line_length, evenly, filters_str, balanced,
+    resize_mode:
+        Parameters of a dataset, see bulk.bulk_params.
+
+    seed: None or int   Default: None
+        A seed of a dataset, producers of the same dataset have to share an int seed.
+
+    data_home: str  Default: None
+        A custom path of storing MNIST datafiles.
+
+    images: object
+        A custom MNIST image db to prevent using default DB of a mnistdata module.
+
+    rank, world_size: int   Default: 0, 1
+        An index of a producer and a count of producers.
+
+    A meta of a batch is a dictionary with keys: shard, labels, annotations (see bulk.generate_shard).
+    """
+    def batches():
+        shard_images = images if images is not None else mnistdata.get_images(data_home=data_home)
+        params = bulk.bulk_params(shard_images, count, length=length, spacing_range=spacing_range,
+                                  image_width=image_width, image_height=image_height, line_length=line_length,
+                                  evenly=evenly, filters_str=filters_str, balanced=balanced,
+                                  shard_size=ring.shape[0], resize_mode=resize_mode)
+        if ring.shape[1:] != (params['image_height'], params['image_width']):
+            raise Exception("slot has a shape {}, but images have {}".format(
+                ring.shape[1:], (params['image_height'], params['image_width'])))
+
+        for shard, imgs, labels, annotations in bulk.generate_shards(helper.seed_entropy(seed), params,
+                                                                     shard_images,
+                                                                     bulk.rank_shards(params, rank, world_size),
+                                                                     balanced=balanced):
+            yield ring_writer(imgs), {'shard': shard, 'labels': labels, 'annotations': annotations}
+
+    produce(ring, batches())
+
+
+def produce_stream(ring, digits_seqs, spacing_range, image_width, seed=None, data_home=None, images=None,
+                   rank=0, world_size=1, **kwargs):
+    """
+    Generating wide images of sequences by tiles directly to slots of a ring, see streaming.generate_numbers_stream.
+    A slot holds one image.
+
+    Parameters
+    ----------
+    ring: SharedRing
+        A ring of float32 or uint8 slots with a shape (1, image height, image width).
+
+    digits_seqs: list of lists of ints
+        Sequences of digits.
+
+    spacing_range, image_width, kwargs:
+        The same parameters as streaming.generate_numbers_stream has.
+
+    seed: None, int or numpy.random.Generator   Default: None
+        A seed of images.
+
+    data_home: str  Default: None
+        A custom path of storing MNIST datafiles.
+
+    images: object
+        A custom MNIST image db to prevent using default DB of a mnistdata module.
+
+    rank, world_size: int   Default: 0, 1
+        An index of a producer and a count of producers, producers take sequences in turn.
+
+    A meta of a batch is a dictionary with keys: index (an index of a sequence), digits.
+    """
+    def batches():
+        rng = helper.get_rng(seed)
+        # seeds of all of sequences, so an image doesn't depend on a count of producers
+        seeds = [helper.seed_entropy(rng) for _ in range(len(digits_seqs))]
+        seq_images = images if images is not None else mnistdata.get_images(data_home=data_home)
+
+        for i in range(rank, len(digits_seqs), world_size):
+            digits, image_seed = digits_seqs[i], seeds[i]
+
+            def write(array, digits=digits, image_seed=image_seed):
+                streaming.generate_numbers_stream(digits, spacing_range, image_width, out=array[0],
+                                                  images=seq_images, seed=image_seed, **kwargs)
+                return 1
+
+            yield write, {'index': i, 'digits': np.asarray(digits)}
+
+    produce(ring, batches())
+
+
+def ring_writer(batch):
+    """
+    Returns
+    -------
+    A function of produce copying a batch to a slot.
+    """
+    def write(array):
+        array[:len(batch)] = batch
+        return len(batch)
+
+    return write
+
+
+def start_producer(target, ring, *args, **kwargs):
+    """
+    Starting a producer process, ex. start_producer(produce_bulk, ring, 10000, seed=1).
+
+    Returns
+    -------
+    A started multiprocessing.Process.
+    """
+    process = ring.ctx.Process(target=target, args=(ring,) + args, kwargs=kwargs, daemon=True)
+    process.start()
+
+    return process
+
+
+def pool_context():
+    """
+    Returns
+    -------
+    A default multiprocessing context of a ring: spawned producers, so limits of thread pools of a ProducerPool
+    are applying to libraries loaded by workers.
+    """
+    return multiprocessing.get_context(SHARED_RING_POOL_START_METHOD)
+
+
+def run_worker(ring, target, rank, workers, threads, cpus, args, kwargs):
+    """
+    An entry of a process of a ProducerPool: configuring a runtime, reporting it and running a producer.
+    """
+    ring.report(rank, runtime.configure_worker(threads=threads, cpus=cpus))
+    target(ring, *args, rank=rank, world_size=workers, **kwargs)
+
+
+class ProducerPool:
+    """
+    A pool of producer processes writing to a ring, ex. produce_bulk splitting shards by ranks of workers.
+
+    Each of NumPy and SciPy libraries of a process starts own BLAS and OpenMP thread pools of a size of CPUs,
+    so parallel workers oversubscribe CPUs. A pool limits thread pools of each worker (environment variables
+    of a started process and threadpoolctl if it is installed) and optionally pins workers to successive blocks
+    of CPUs. Workers report their runtime configurations, see stats.
+
+    Environment variables are affecting libraries loaded after a process starts, so workers of a pool limiting
+    threads are spawned (a default context of a ring, see pool_context) unless threadpoolctl is installed.
+    """
+
+    def __init__(self, ring, target, *args, workers=None, threads=1, pin=False, **kwargs):
+        """
+        Parameters
+        ----------
+        ring: SharedRing
+            A ring of batches.
+
+        target: function
+            A producer accepting a ring, args, rank, world_size and kwargs, ex. produce_bulk.
+
+        workers: int   Default: None
+            A count of worker processes. A count of available CPUs divided by threads is using if it is None.
+
+        threads: int   Default: 1
+            A maximum count of threads of thread pools of libraries of a worker.
+            Thread pools are not limiting if it is None.
+
+        pin: boolean   Default: False
+            Pin workers to CPUs, each worker takes successive threads CPUs.
+
+        Raises
+        ------
+        An exception if thread pools of workers can't be limited: a ring of forked workers without threadpoolctl.
+        """
+        self.ring = ring
+        self.cpus = runtime.available_cpus()
+        self.threads = int(threads) if threads is not None else None
+        if self.threads is not None and self.threads <= 0:
+            raise Exception("count of threads {} has to be a positive number".format(threads))
+        # forked workers (and workers of a fork server) inherit libraries loaded before limits are set
+        if (self.threads is not None and runtime.threadpoolctl is None and
+                ring.ctx.get_start_method() != SHARED_RING_POOL_START_METHOD):
+            raise Exception("thread pools of '{}' workers are limiting by threadpoolctl only: "
+                            "install it or create a ring with a default context".format(ring.ctx.get_start_method()))
+        self.workers = int(workers or max(1, len(self.cpus) // (self.threads or 1)))
+        self.pin = bool(pin)
+        # a spawned worker loads libraries with limits of its environment
+        self.spawned = ring.ctx.get_start_method() == SHARED_RING_POOL_START_METHOD
+        self.batches_count = 0
+        self.started = time.monotonic()
+
+        self.processes = []
+        # a spawned worker loads libraries with limited thread pools
+        with runtime.environ(runtime.thread_env(self.threads) if self.threads else {}):
+            for rank in range(self.workers):
+                cpus = runtime.worker_cpus(rank, self.workers, self.threads or 1, self.cpus) if self.pin else None
+                process = ring.ctx.Process(target=run_worker,
+                                           args=(ring, target, rank, self.workers, self.threads, cpus, args, kwargs),
+                                           daemon=True)
+                process.start()
+                self.processes.append(process)
+
+    def batches(self, timeout=None):
+        """
+        Iterating batches of all of workers, see SharedRing.batches.
+        """
+        for batch in self.ring.batches(producers=self.workers, timeout=timeout):
+            self.batches_count += 1
+            yield batch
+
+    def join(self):
+        """
+        Waiting workers.
+
+        Returns
+        -------
+        A list of exit codes of workers.
+        """
+        for process in self.processes:
+            process.join()
+
+        return [process.exitcode for process in self.processes]
+
+    def stats(self):
+        """
+        Getting a runtime configuration of a pool.
+
+        Returns
+        -------
+        A dictionary with keys:
+            workers - a count of workers;
+            threads - a requested limit of thread pools of a worker;
+            cpus - a count of available CPUs;
+            pinned - a flag of pinning workers;
+            parallelism - an effective count of threads running at once: a count of threads of thread pools
+                reported by workers (by threadpoolctl or by a limit of an environment of a spawned worker)
+                limited by a count of CPUs. It is None if sizes of thread pools are unknown (forked workers
+                without threadpoolctl or workers have not reported yet);
+            oversubscription - a count of threads of workers per CPU, None if sizes of thread pools are unknown;
+            batches - a count of received batches;
+            seconds - a time since a pool started;
+            runtime - runtime configurations reported by workers by ranks, see runtime.runtime_info.
+        """
+        threads = 0
+        for rank in range(self.workers):
+            info = self.ring.infos.get(rank)
+            if info is not None and info['pools'] is not None:
+                threads += max([1] + [pool['threads'] for pool in info['pools']])
+            elif info is not None and self.spawned and info['threads']:
+                threads += info['threads']
+            else:
+                threads = None
+                break
+        cpus = len(set(cpu for info in self.ring.infos.values() for cpu in info['cpus'])) or len(self.cpus)
+
+        return {
+            'workers': self.workers,
+            'threads': self.threads,
+            'cpus': len(self.cpus),
+            'pinned': self.pin,
+            'parallelism': min(threads, cpus) if threads is not None else None,
+            'oversubscription': threads / cpus if threads is not None else None,
+            'batches': self.batches_count,
+            'seconds': time.monotonic() - self.started,
+            'runtime': dict(self.ring.infos),
+        }
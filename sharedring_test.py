@@ -0,0 +1,172 @@
+import unittest
+import multiprocessing
+import os
+import shutil
+import numpy as np
+
+if __name__.find('.')<0:
+    import bulk
+    import helper
+    import mnistdata
+    import runtime
+    import sharedring
+    import streaming
+else:
+    from . import bulk
+    from . import helper
+    from . import mnistdata
+    from . import runtime
+    from . import sharedring
+    from . import streaming
+
+
+class TestSharedRing(unittest.TestCase):
+    test_data_home_path = "test-data/sharedring-home"
+    test_dir = "test-data/sharedring"
+
+    def clear_dir(self):
+        for dr in [TestSharedRing.test_data_home_path, TestSharedRing.test_dir]:
+            shutil.rmtree(dr, ignore_errors=True)
+
+    def setUp(self):
+        self.clear_dir()
+
+        mnistdata.GenerateTestData(
+            TestSharedRing.test_data_home_path, 28, 28, 20, random_content=True, seed=1)
+
+        self.labels_db = mnistdata.MNISTLabelsFile()
+        self.images_db = mnistdata.MNISTImagesFile(self.labels_db)
+        self.labels_db.read(
+            data_home=TestSharedRing.test_data_home_path)
+        self.images_db.read(
+            data_home=TestSharedRing.test_data_home_path)
+
+    def tearDown(self):
+        self.images_db.close()
+        self.labels_db.close()
+
+        self.clear_dir()
+
+    def test_ring(self):
+        with sharedring.SharedRing((4, 2, 3), dtype=np.float32, slots=3) as ring:
+            batches = [np.full((count, 2, 3), count, dtype=np.float32) for count in [4, 1, 3]]
+            for i, batch in enumerate(batches):
+                ring.put(batch, meta={'index': i})
+            ring.done()
+
+            received = []
+            for batch in ring.batches():
+                received.append((batch.meta['index'], batch.data.copy()))
+                # a view of shared memory, not a copy
+                self.assertFalse(batch.data.flags.owndata)
+
+            self.assertEqual([index for index, _ in received], [0, 1, 2])
+            for (_, data), expected in zip(received, batches):
+                self.assertTrue(np.array_equal(data, expected))
+            # all of slots are free again
+            self.assertEqual(sorted(ring.acquire(timeout=1) for _ in range(3)), [0, 1, 2])
+
+            with self.assertRaises(Exception):
+                ring.put(np.zeros((5, 2, 3), dtype=np.float32))
+
+    def test_produce_bulk(self):
+        kwargs = dict(length=(2, 4), spacing_range=(0, 5), image_width=100, filters_str="distort", seed=5,
+                      balanced=True)
+        manifest = bulk.generate_bulk(TestSharedRing.test_dir, 30, shard_size=8, images=self.images_db, **kwargs)
+
+        with sharedring.SharedRing((8, 28, 100), slots=2) as ring:
+            # two producers split shards like nodes of a bulk job
+            processes = [sharedring.start_producer(sharedring.produce_bulk, ring, 30,
+                                                   data_home=TestSharedRing.test_data_home_path,
+                                                   rank=rank, world_size=2, **kwargs)
+                         for rank in range(2)]
+
+            shards = {}
+            for batch in ring.batches(producers=2):
+                shards[batch.meta['shard']] = (batch.data.copy(), batch.meta['labels'], batch.meta['annotations'])
+
+            for process in processes:
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+
+        self.assertEqual(sorted(shards), [0, 1, 2, 3])
+        for entry in manifest['shards']:
+            for exist, expected in zip(shards[entry['shard']], bulk.read_shard(TestSharedRing.test_dir, entry)):
+                self.assertTrue(np.array_equal(exist, expected))
+
+    def test_produce_stream(self):
+        digits_seqs = [np.random.default_rng(i).integers(10, size=300) for i in range(3)]
+
+        with sharedring.SharedRing((1, 28, 3000), dtype=np.float32, slots=2) as ring:
+            process = sharedring.start_producer(sharedring.produce_stream, ring, digits_seqs, (0, 4), 3000,
+                                                seed=2, data_home=TestSharedRing.test_data_home_path,
+                                                memory_budget=8 << 20)
+            imgs = [batch.data[0].copy() for batch in ring.batches()]
+            process.join()
+
+        rng = np.random.default_rng(2)
+        for img, digits in zip(imgs, digits_seqs):
+            expected = streaming.generate_numbers_stream(digits, (0, 4), 3000, images=self.images_db,
+                                                         seed=helper.seed_entropy(rng), memory_budget=8 << 20)
+            self.assertTrue(np.array_equal(img, expected))
+        self.assertEqual(len(imgs), len(digits_seqs))
+
+    def test_producer_pool(self):
+        kwargs = dict(length=(2, 4), spacing_range=(0, 5), image_width=100, seed=5)
+        manifest = bulk.generate_bulk(TestSharedRing.test_dir, 30, shard_size=8, images=self.images_db, **kwargs)
+
+        # spawned workers (a default context of a ring) load libraries with limited thread pools
+        with sharedring.SharedRing((8, 28, 100), slots=2) as ring:
+            pool = sharedring.ProducerPool(ring, sharedring.produce_bulk, 30, workers=3, threads=1, pin=True,
+                                           data_home=TestSharedRing.test_data_home_path, **kwargs)
+            shards = {batch.meta['shard']: batch.data.copy() for batch in pool.batches()}
+            self.assertEqual(pool.join(), [0, 0, 0])
+            stats = pool.stats()
+
+        for entry in manifest['shards']:
+            self.assertTrue(np.array_equal(shards[entry['shard']], bulk.read_shard(TestSharedRing.test_dir, entry)[0]))
+
+        self.assertEqual(stats['workers'], 3)
+        self.assertEqual(stats['batches'], 4)
+        self.assertEqual(sorted(stats['runtime']), [0, 1, 2])
+        for info in stats['runtime'].values():
+            self.assertNotEqual(info['pid'], os.getpid())
+            self.assertEqual(info['threads'], 1)
+            self.assertEqual(len(info['cpus']), 1)
+            # thread pools of libraries loaded by a worker are limited
+            if info['pools'] is not None:
+                self.assertTrue(all(pool['threads'] == 1 for pool in info['pools']))
+        # limits of environments of spawned workers are known without threadpoolctl
+        cpus = len(set(cpu for info in stats['runtime'].values() for cpu in info['cpus']))
+        self.assertEqual(stats['parallelism'], min(3, cpus))
+        self.assertEqual(stats['oversubscription'], 3 / cpus)
+
+    def test_producer_pool_fork(self):
+        with sharedring.SharedRing((8, 28, 100), slots=2, ctx=multiprocessing.get_context('fork')) as ring:
+            # thread pools of forked workers are not limited without threadpoolctl
+            if runtime.threadpoolctl is None:
+                with self.assertRaises(Exception):
+                    sharedring.ProducerPool(ring, sharedring.produce_bulk, 30, workers=2, threads=1,
+                                            data_home=TestSharedRing.test_data_home_path)
+            # not limited thread pools
+            pool = sharedring.ProducerPool(ring, sharedring.produce_bulk, 8, workers=1, threads=None,
+                                           data_home=TestSharedRing.test_data_home_path, image_width=100)
+            self.assertEqual(len([batch.release() for batch in pool.batches()]), 1)
+            self.assertEqual(pool.join(), [0])
+            self.assertIsNone(pool.stats()['threads'])
+            # thread pools of forked workers are unknown without threadpoolctl
+            if runtime.threadpoolctl is None:
+                self.assertIsNone(pool.stats()['parallelism'])
+
+    def test_producer_fail(self):
+        with sharedring.SharedRing((8, 28, 50), slots=2) as ring:
+            # images have another width
+            process = sharedring.start_producer(sharedring.produce_bulk, ring, 10, image_width=100,
+                                                data_home=TestSharedRing.test_data_home_path)
+            with self.assertRaises(Exception):
+                ring.get(timeout=30)
+            process.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
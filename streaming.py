@@ -0,0 +1,414 @@
+import contextlib
+import os
+import numpy as np
+
+if __name__.find('.')<0:
+    import argsparser
+    import filters
+    import generator
+    import helper
+    import mnistdata
+    import writer
+else:
+    from . import argsparser
+    from . import filters
+    from . import generator
+    from . import helper
+    from . import mnistdata
+    from . import writer
+
+STREAMING_DEFAULT_MEMORY_BUDGET = 64 << 20
+# a count of digits assembling at once, random filters draw numbers per chunk of digits
+STREAMING_CHUNK_DIGITS = 128
+# a minimum count of columns of a tile, narrower tiles are spending time on an overhead of a tile
+STREAMING_MIN_TILE_WIDTH = 64
+
+
+class StreamCanvas:
+    """
+    A lazy canvas of one line of a long sequence.
+    A layout and source images of all of digits are planning at once (a few integers per digit),
+    but digit images are assembling by chunks on demand, so only chunks overlapped by requested columns
+    are in memory.
+    """
+
+    def __init__(self, digits, spacing_range, image_width, images, evenly=False, fltrs=None, rng=None,
+                 sampler=None, chunk_digits=STREAMING_CHUNK_DIGITS, resize_mode=filters.RESIZE_DEFAULT_MODE):
+        """
+        Parameters
+        ----------
+        digits: ndarray
+            An int array of digits.
+
+        spacing_range, image_width, evenly, fltrs:
+            The same parameters as generator.generate_numbers_sequence has.
+
+        images: object
+            An MNIST image db.
+
+        rng: numpy.random.Generator   Default: None
+            A source of random numbers.
+
+        sampler: mnistdata.EpochSampler   Default: None
+            A sampler of source images. The labels db is sampling with replacement if it is None.
+
+        chunk_digits: int   Default: STREAMING_CHUNK_DIGITS
+            A count of digits of a chunk.
+
+        resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+            A mode of resizing digit images.
+        """
+        self.images = images
+        self.fltrs = fltrs
+        self.resize_mode = resize_mode
+        self.chunk_digits = int(chunk_digits)
+        self.height = images.digit_height()
+
+        digits = np.asarray(digits).reshape(1, -1)
+        # the same order of random numbers as generator.assemble_line has
+        if evenly:
+            widths, spacings = helper.evenly_layout(1, digit_width=images.digit_width(),
+                                                    digit_count=digits.shape[1],
+                                                    image_width=image_width, spacing=spacing_range)
+        else:
+            widths, spacings = helper.randomly_layout(1, digit_width=images.digit_width(),
+                                                      digit_count=digits.shape[1],
+                                                      image_width=image_width, spacing=spacing_range, rng=rng)
+        offsets, total_widths = helper.layout_offsets(widths, spacings)
+        self.indexes = (sampler or images.labels).sample(digits, rng=rng)[0]
+        # chunks are independent of each other and of an order of assembling
+        self.entropy = helper.seed_entropy(rng)
+
+        self.widths, self.offsets, self.width = widths[0], offsets[0], int(total_widths[0])
+        self.chunk_offsets = np.append(self.offsets[::self.chunk_digits], self.width)
+        self.chunks = {}
+
+    def chunk_count(self):
+        return len(self.chunk_offsets) - 1
+
+    def max_chunk_width(self):
+        return int(np.diff(self.chunk_offsets).max())
+
+    def assemble_chunk(self, chunk):
+        """
+        Assembling columns of a chunk: digits of a chunk and spacing after them.
+
+        Parameters
+        ----------
+        chunk: int
+            An index of a chunk.
+
+        Returns
+        -------
+        A float32 array with a shape (digit height, width of a chunk).
+        """
+        first = chunk * self.chunk_digits
+        last = min(first + self.chunk_digits, len(self.indexes))
+        x0 = self.chunk_offsets[chunk]
+
+        digit_imgs = self.images.take(self.indexes[first:last])
+        digit_imgs = filters.invert_normalize(self.images.max_value())(digit_imgs)
+        if self.fltrs:
+            rng = np.random.default_rng(np.random.SeedSequence(self.entropy, spawn_key=(chunk,)))
+            digit_imgs = filters.apply_filters_stack(self.fltrs, digit_imgs, rng=rng)
+
+        result_img = np.ones((self.height, self.chunk_offsets[chunk + 1] - x0), dtype=np.float32)
+        widths = self.widths[first:last]
+        for width in np.unique(widths):
+            columns = np.flatnonzero(widths == width)
+
+            stack = digit_imgs[columns]
+            if width != stack.shape[-1]:
+                stack = filters.resize(int(width), mode=self.resize_mode)(stack)
+
+            x = self.offsets[first + columns][:, None] - x0 + np.arange(width)
+            result_img[np.arange(self.height)[None, :, None], x[:, None, :]] = stack
+
+        return result_img
+
+    def columns(self, start, stop):
+        """
+        Getting columns [start, stop) of a canvas. Chunks which are not overlapped by columns are dropping.
+
+        Parameters
+        ----------
+        start, stop: int
+            A range of columns inside of a canvas.
+
+        Returns
+        -------
+        A float32 array with a shape (digit height, stop - start).
+        """
+        first = int(np.searchsorted(self.chunk_offsets, start, side='right')) - 1
+        last = int(np.searchsorted(self.chunk_offsets, stop - 1, side='right')) - 1
+
+        self.chunks = {chunk: self.chunks[chunk] for chunk in range(first, last + 1) if chunk in self.chunks}
+
+        parts = []
+        for chunk in range(first, last + 1):
+            if chunk not in self.chunks:
+                self.chunks[chunk] = self.assemble_chunk(chunk)
+
+            x0 = self.chunk_offsets[chunk]
+            parts.append(self.chunks[chunk][:, max(start, x0) - x0:min(stop, self.chunk_offsets[chunk + 1]) - x0])
+
+        return np.concatenate(parts, axis=1)
+
+    def gather(self, indexes):
+        """
+        Getting columns by an ascending range of indexes wrapped into a canvas, see filters.resize_window.
+
+        Returns
+        -------
+        A float32 array with a shape (digit height, count of indexes).
+        """
+        # split indexes to contiguous ranges of columns
+        breaks = np.flatnonzero(np.diff(indexes) != 1) + 1
+        parts = [self.columns(int(part[0]), int(part[-1]) + 1) for part in np.split(indexes, breaks)]
+
+        return np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0]
+
+
+def tile_width(memory_budget, height, image_height, scale, chunk_bytes):
+    """
+    Choosing a count of columns of a result tile to keep working arrays of a tile under a memory budget.
+
+    Parameters
+    ----------
+    memory_budget: int
+        A maximum size of working arrays in bytes.
+
+    height: int
+        A height of a canvas.
+
+    image_height: int
+        A height of a result image.
+
+    scale: float
+        A count of columns of a canvas per a column of a result.
+
+    chunk_bytes: int
+        A size of arrays of assembling one chunk.
+
+    Returns
+    -------
+    A count of columns, at least STREAMING_MIN_TILE_WIDTH.
+    """
+    # source columns (gathered, filtered and two interpolated copies) and result columns of both resizing
+    column_bytes = 4 * (height * (4 * max(scale, 1.) + 2) + 2 * image_height)
+    # two chunks overlapped by a tile are in memory while assembling the third one
+    available = memory_budget - 3 * chunk_bytes
+
+    return max(STREAMING_MIN_TILE_WIDTH, int(available // column_bytes))
+
+
+def generate_numbers_stream(digits, spacing_range, image_width,
+                            out=None,
+                            data_home=None,
+                            images=None,
+                            evenly=False,
+                            fltrs=None,
+                            seed=None,
+                            image_height=None,
+                            memory_budget=STREAMING_DEFAULT_MEMORY_BUDGET,
+                            sampler=None,
+                            resize_mode=filters.RESIZE_DEFAULT_MODE):
+    """
+    Generate an image of a very long sequence in one line by tiles of columns.
+    Digits are assembling by chunks, each tile of a result takes columns of a canvas overlapped by it
+    (with a margin of an anti-aliasing filter) and resizes them to the image width,
+    so a full-size canvas never exists and a peak memory is bounded by a memory budget.
+
+    Without filters an image is the same as generate_numbers_sequence generates with the same seed
+    and resize mode (up to rounding errors of resizing). Filters are applying on digit images before placing them to a canvas
+    in both modes. Random filters draw numbers per chunk of digits, so an image doesn't depend on a memory budget.
+
+    Parameters
+    ----------
+    digits: list of ints
+        A list-like containing digits.
+
+    spacing_range, image_width, data_home, images, evenly, fltrs, seed, image_height:
+        The same parameters as generate_numbers_sequence has.
+
+    out: ndarray   Default: None
+        A float32 or uint8 array with a shape (image_height, image_width) to write a result, ex. a memory-mapped
+        array. A float32 array is allocating if it is None.
+
+    memory_budget: int   Default: STREAMING_DEFAULT_MEMORY_BUDGET
+        A maximum size of working arrays in bytes, a size of out is not included.
+
+    sampler: mnistdata.EpochSampler   Default: None
+        A sampler of source images without replacement.
+
+    resize_mode: str    Default: filters.RESIZE_DEFAULT_MODE
+        A mode of resizing digits and an image, one of filters.RESIZE_WINDOW_MODES.
+
+    Returns
+    -------
+    The out array.
+    """
+    if resize_mode not in filters.RESIZE_WINDOW_MODES:
+        raise Exception("resize mode '{}' is not supported by streaming, supported are {}".format(
+            resize_mode, filters.RESIZE_WINDOW_MODES))
+
+    if images is None:
+        images = mnistdata.get_images(data_home=data_home)
+
+    digit_width, digit_height = images.digit_width(), images.digit_height()
+    if len(digits) == 0:
+        raise Exception("digits sequence is empty")
+
+    spacing_range, image_width = generator.default_parameters(digit_width, len(digits), spacing_range, image_width)
+    generator.check_parameters(len(digits), spacing_range, image_width)
+    image_height = int(image_height) if image_height else digit_height
+    if image_height <= 0:
+        raise Exception("image height {} is negative numbers or zero".format(image_height))
+
+    if out is None:
+        out = np.empty((image_height, image_width), dtype=np.float32)
+    if out.shape != (image_height, image_width):
+        raise Exception("out has a shape {}, but an image has {}".format(out.shape, (image_height, image_width)))
+
+    canvas = StreamCanvas(digits, spacing_range, image_width, images, evenly=evenly, fltrs=fltrs,
+                          rng=helper.get_rng(seed), sampler=sampler, resize_mode=resize_mode)
+    # source images, digits and a canvas of a chunk
+    chunk_bytes = canvas.chunk_digits * digit_height * digit_width * 9 + 4 * digit_height * canvas.max_chunk_width()
+    step = tile_width(memory_budget, digit_height, image_height, canvas.width / image_width, chunk_bytes)
+
+    resize_height = filters.resize_height(image_height, mode=resize_mode) if image_height != digit_height else None
+    for start in range(0, image_width, step):
+        stop = min(start + step, image_width)
+
+        indexes, sigma, positions = filters.resize_window(canvas.width, image_width, start, stop, mode=resize_mode)
+        tile = filters.resize_columns(canvas.gather(indexes), sigma, positions, mode=resize_mode)
+        if resize_height:
+            tile = resize_height(tile)
+
+        out[:, start:stop] = writer.to_uint8(tile) if out.dtype == np.uint8 else tile
+
+    return out
+
+
+def write_numbers_stream(file_name, digits, spacing_range, image_width,
+                         compress_level=writer.WRITER_DEFAULT_COMPRESS_LEVEL,
+                         fsync='none',
+                         **kwargs):
+    """
+    Generate an image of a very long sequence by tiles (see generate_numbers_stream) directly to a file.
+    A .npy file is a float32 memory-mapped array written by tiles to a temporary file which renames to a target.
+    Another one is a PNG image: tiles are writing to a temporary uint8 memory-mapped array next to a file
+    which is compressing by a PNG row stream, see writer.encode_png_rows.
+    Readers never see a half-written file of both formats.
+
+    Parameters
+    ----------
+    file_name: str
+        A name of a result .npy or PNG file.
+
+    digits, spacing_range, image_width:
+        The same parameters as generate_numbers_stream has.
+
+    compress_level: int     Default: 6
+        A PNG (zlib) compression level from 0 to 9.
+
+    fsync: str     Default: none
+        A policy of flushing a file to a storage, see writer.write_stream.
+
+    kwargs:
+        Other parameters of generate_numbers_stream except out.
+
+    Returns
+    -------
+    A shape of a result image.
+    """
+    images = kwargs.pop('images', None)
+    data_home = kwargs.pop('data_home', None)
+    if images is None:
+        images = mnistdata.get_images(data_home=data_home)
+
+    _, image_width = generator.default_parameters(images.digit_width(), len(digits), spacing_range, image_width)
+    image_height = int(kwargs.pop('image_height', None) or images.digit_height())
+    shape = (image_height, image_width)
+
+    if fsync not in writer.WRITER_FSYNC_POLICIES:
+        raise Exception("unknown fsync policy '{}', supported are {}".format(fsync, writer.WRITER_FSYNC_POLICIES))
+
+    if file_name.lower().endswith('.npy'):
+        tmp_file_name = writer.temporary_file_name(file_name)
+        try:
+            out = np.lib.format.open_memmap(tmp_file_name, mode='w+', dtype=np.float32, shape=shape)
+            generate_numbers_stream(digits, spacing_range, image_width, out=out, images=images,
+                                    image_height=image_height, **kwargs)
+            out.flush()
+            del out
+            if fsync != 'none':
+                fd = os.open(tmp_file_name, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+            os.replace(tmp_file_name, file_name)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_file_name)
+            raise
+
+        if fsync == 'full':
+            writer.sync_directory(file_name)
+
+        return shape
+
+    rows_file_name = writer.temporary_file_name(file_name + ".rows")
+    out = np.memmap(rows_file_name, mode='w+', dtype=np.uint8, shape=shape)
+    try:
+        generate_numbers_stream(digits, spacing_range, image_width, out=out, images=images,
+                                image_height=image_height, **kwargs)
+        writer.write_stream(file_name, writer.encode_png_rows(out, compress_level=compress_level), fsync=fsync)
+    finally:
+        del out
+        os.remove(rows_file_name)
+
+    return shape
+
+
+if __name__ == '__main__':
+    """
+    A tool generating an image of a very long digit sequence by tiles under a memory budget.
+
+    Example:
+        python streaming.py -o wide.png -w 2000000 -s 0,10 --memory_budget 32 498127864687234...
+
+    Requirements arguments:
+        digits
+            A string of digits. Use "@file" to read digits from a file.
+
+    Optiononal arguments:
+        See argsparser.stream_parser.
+    """
+    args = argsparser.stream_parser().parse_args()
+
+    digits = args.digits
+    if digits.startswith('@'):
+        with open(digits[1:], 'r') as f:
+            digits = "".join(f.read().split())
+
+    try:
+        print("Generate an image of {} digits into '{}'".format(len(digits), args.output))
+        shape = write_numbers_stream(args.output, [int(digit) for digit in digits], args.spacing,
+                                     args.image_width,
+                                     compress_level=args.compress_level,
+                                     fsync=args.fsync,
+                                     data_home=args.data_directory,
+                                     evenly=args.evenly,
+                                     fltrs=filters.parse_filters(args.filters),
+                                     seed=args.seed,
+                                     image_height=args.image_height,
+                                     memory_budget=args.memory_budget << 20,
+                                     resize_mode=args.resize_mode)
+    except Exception as e:
+        print("failed to generate an image: ", e)
+        exit(-1)
+
+    print("An image {}x{} is stored".format(shape[1], shape[0]))
@@ -0,0 +1,119 @@
+import unittest
+import os
+import shutil
+import imageio
+import numpy as np
+
+if __name__.find('.')<0:
+    import filters
+    import generator
+    import mnistdata
+    import streaming
+    import writer
+else:
+    from . import filters
+    from . import generator
+    from . import mnistdata
+    from . import streaming
+    from . import writer
+
+
+class TestStreaming(unittest.TestCase):
+    test_data_home_path = "test-data/streaming-home"
+    test_dir = "test-data/streaming"
+
+    def clear_dir(self):
+        for dr in [TestStreaming.test_data_home_path, TestStreaming.test_dir]:
+            shutil.rmtree(dr, ignore_errors=True)
+
+    def setUp(self):
+        self.clear_dir()
+        os.makedirs(TestStreaming.test_dir)
+
+        mnistdata.GenerateTestData(
+            TestStreaming.test_data_home_path, 28, 28, 20, random_content=True, seed=3)
+
+        self.labels_db = mnistdata.MNISTLabelsFile()
+        self.images_db = mnistdata.MNISTImagesFile(self.labels_db)
+        self.labels_db.read(
+            data_home=TestStreaming.test_data_home_path)
+        self.images_db.read(
+            data_home=TestStreaming.test_data_home_path)
+
+    def tearDown(self):
+        self.images_db.close()
+        self.labels_db.close()
+
+        self.clear_dir()
+
+    def test_generate_numbers_stream(self):
+        digits = np.random.default_rng(2).integers(10, size=700)
+        test_cases = [
+            ((0, 10), 9000, False, None),
+            ((0, 10), 30000, False, 40),
+            (None, 20000, True, None),
+        ]
+
+        for spacing_range, image_width, evenly, image_height in test_cases:
+            expected = generator.generate_numbers_sequence(digits, spacing_range, image_width,
+                                                           images=self.images_db, evenly=evenly, seed=7,
+                                                           image_height=image_height)
+            # small tiles cross chunks and digits
+            for memory_budget in [8 << 20, 64 << 20]:
+                img = streaming.generate_numbers_stream(digits, spacing_range, image_width,
+                                                        images=self.images_db, evenly=evenly, seed=7,
+                                                        image_height=image_height,
+                                                        memory_budget=memory_budget)
+                self.assertEqual(img.dtype, np.float32)
+                np.testing.assert_allclose(img, expected, atol=1e-5)
+
+    def test_stream_resize_mode(self):
+        digits = np.random.default_rng(5).integers(10, size=500)
+
+        for resize_mode in ['nearest', 'area']:
+            expected = generator.generate_numbers_sequence(digits, (0, 10), 7000, images=self.images_db, seed=7,
+                                                           image_height=40, resize_mode=resize_mode)
+            img = streaming.generate_numbers_stream(digits, (0, 10), 7000, images=self.images_db, seed=7,
+                                                    image_height=40, memory_budget=8 << 20,
+                                                    resize_mode=resize_mode)
+            np.testing.assert_allclose(img, expected, atol=1e-5)
+
+        with self.assertRaises(Exception):
+            streaming.generate_numbers_stream(digits, (0, 10), 7000, images=self.images_db, resize_mode='cubic')
+
+    def test_stream_filters(self):
+        digits = np.random.default_rng(3).integers(10, size=600)
+        fltrs = filters.parse_filters("distort,noise:sigma=0.05")
+
+        imgs = [streaming.generate_numbers_stream(digits, (0, 2), 9000, images=self.images_db,
+                                                  fltrs=fltrs, seed=11, memory_budget=memory_budget)
+                for memory_budget in [8 << 20, 64 << 20]]
+
+        self.assertTrue(np.array_equal(imgs[0], imgs[1]))
+
+    def test_write_numbers_stream(self):
+        digits = np.random.default_rng(4).integers(10, size=300)
+        expected = streaming.generate_numbers_stream(digits, (0, 4), 5000, images=self.images_db, seed=5,
+                                                     memory_budget=8 << 20)
+
+        npy_file_name = os.path.join(TestStreaming.test_dir, "wide.npy")
+        png_file_name = os.path.join(TestStreaming.test_dir, "wide.png")
+        for file_name in [npy_file_name, png_file_name]:
+            shape = streaming.write_numbers_stream(file_name, digits, (0, 4), 5000, images=self.images_db,
+                                                   seed=5, memory_budget=8 << 20, compress_level=1)
+            self.assertEqual(shape, expected.shape)
+
+        self.assertTrue(np.array_equal(np.load(npy_file_name), expected))
+        self.assertTrue(np.array_equal(imageio.imread(png_file_name), writer.to_uint8(expected)))
+        self.assertEqual(sorted(os.listdir(TestStreaming.test_dir)), ["wide.npy", "wide.png"])
+        # a failed job keeps a previous file and doesn't leave temporary files
+        for file_name in [npy_file_name, png_file_name]:
+            with self.assertRaises(Exception):
+                streaming.write_numbers_stream(file_name, digits, (0, 4), 5000, images=self.images_db,
+                                               resize_mode='cubic')
+        self.assertEqual(sorted(os.listdir(TestStreaming.test_dir)), ["wide.npy", "wide.png"])
+        self.assertTrue(np.array_equal(np.load(npy_file_name), expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,372 @@
+import contextlib
+import io
+import os
+import queue
+import struct
+import threading
+import zlib
+import imageio
+import numpy as np
+
+WRITER_FSYNC_POLICIES = ['none', 'file', 'full']
+
+WRITER_DEFAULT_COMPRESS_LEVEL = 6
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# a size of raw rows compressing at once by a PNG row stream
+PNG_ROWS_BAND_BYTES = 1 << 20
+
+
+def to_uint8(img):
+    """
+    Converting an image array with a scale ranging from 0 to 1 to uint8 values.
+
+    Parameters
+    ----------
+    img: ndarray
+        A float image array.
+
+    Returns
+    -------
+    A numpy array containing uint8 elements.
+    """
+    return (np.asarray(img) * 255).astype(np.uint8)
+
+
+def encode_png(img, compress_level=WRITER_DEFAULT_COMPRESS_LEVEL):
+    """
+    Compressing an image array to PNG bytes.
+
+    Parameters
+    ----------
+    img: ndarray
+        A float image array with a scale ranging from 0 to 1 or an uint8 array.
+
+    compress_level: int     Default: 6
+        A zlib compression level from 0 (no compression) to 9 (best compression).
+
+    Returns
+    -------
+    Bytes of a PNG image.
+    """
+    if img.dtype != np.uint8:
+        img = to_uint8(img)
+
+    return imageio.imwrite('<bytes>', img, format='PNG', compress_level=compress_level)
+
+
+def encode_npy(arr):
+    """
+    Serializing an array to bytes of the NumPy .npy format.
+
+    Parameters
+    ----------
+    arr: ndarray
+        An array.
+
+    Returns
+    -------
+    Bytes of a .npy file.
+    """
+    f = io.BytesIO()
+    np.save(f, arr)
+
+    return f.getvalue()
+
+
+def png_chunk(chunk_type, data):
+    """
+    Returns
+    -------
+    Bytes of a PNG chunk: a length, a type, data and a CRC.
+    """
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def encode_png_rows(rows, compress_level=WRITER_DEFAULT_COMPRESS_LEVEL):
+    """
+    Compressing a grayscale image to PNG bytes by bands of rows.
+    Only a band of rows is in memory at once, so rows might be a memory-mapped array of any size.
+
+    Parameters
+    ----------
+    rows: ndarray
+        A float image array with a scale ranging from 0 to 1 or an uint8 array with a shape (height, width).
+
+    compress_level: int     Default: 6
+        A zlib compression level from 0 (no compression) to 9 (best compression).
+
+    Returns
+    -------
+    A generator of parts of PNG bytes.
+    """
+    height, width = rows.shape
+
+    yield PNG_SIGNATURE
+    yield png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+
+    compressor = zlib.compressobj(compress_level)
+    band_height = max(1, PNG_ROWS_BAND_BYTES // (width + 1))
+    for y in range(0, height, band_height):
+        band = np.asarray(rows[y:y+band_height])
+        if band.dtype != np.uint8:
+            band = to_uint8(band)
+        # each row starts by a type of a filter, 0 - none
+        raw = np.zeros((band.shape[0], width + 1), dtype=np.uint8)
+        raw[:, 1:] = band
+
+        data = compressor.compress(raw.tobytes())
+        if data:
+            yield png_chunk(b'IDAT', data)
+
+    yield png_chunk(b'IDAT', compressor.flush())
+    yield png_chunk(b'IEND', b'')
+
+
+def temporary_file_name(file_name):
+    """
+    Returns
+    -------
+    A name of a temporary file next to a file, it is unique for threads and processes writing the same file.
+    """
+    return "{}.{}.{}.tmp".format(file_name, os.getpid(), threading.get_ident())
+
+
+def sync_directory(file_name):
+    """
+    Flushing a directory entry of a file to a storage.
+    """
+    fd = os.open(os.path.dirname(os.path.abspath(file_name)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_stream(file_name, parts, fsync='none'):
+    """
+    Writing parts of bytes to a file atomically: data is writing to a temporary file which renames to a target.
+    Readers never see a half-written file.
+
+    Parameters
+    ----------
+    file_name: str
+        A name of a result file.
+
+    parts: iterable of bytes
+        Parts of a content of a file.
+
+    fsync: str     Default: none
+        A policy of flushing data to a storage:
+            none - rely on an operating system;
+            file - flush a content of a file before renaming it;
+            full - flush a content of a file and a directory entry after renaming.
+    """
+    if fsync not in WRITER_FSYNC_POLICIES:
+        raise Exception("unknown fsync policy '{}', supported are {}".format(fsync, WRITER_FSYNC_POLICIES))
+
+    tmp_file_name = temporary_file_name(file_name)
+
+    try:
+        with open(tmp_file_name, 'wb') as f:
+            for data in parts:
+                f.write(data)
+            if fsync != 'none':
+                f.flush()
+                os.fsync(f.fileno())
+
+        os.replace(tmp_file_name, file_name)
+    except BaseException:
+        # a temporary file might be not created, keep the original error
+        with contextlib.suppress(OSError):
+            os.remove(tmp_file_name)
+        raise
+
+    if fsync == 'full':
+        sync_directory(file_name)
+
+
+def write_file(file_name, data, fsync='none'):
+    """
+    Writing bytes to a file atomically, see write_stream.
+
+    Parameters
+    ----------
+    file_name: str
+        A name of a result file.
+
+    data: bytes
+        A content of a file.
+
+    fsync: str     Default: none
+        A policy of flushing data to a storage, see write_stream.
+    """
+    write_stream(file_name, [data], fsync=fsync)
+
+
+def write_image(file_name, img, compress_level=WRITER_DEFAULT_COMPRESS_LEVEL, fsync='none'):
+    """
+    Storing an image array as a PNG image.
+
+    Parameters
+    ----------
+    file_name: str
+        A name of a result PNG file.
+
+    img: ndarray
+        A float image array with a scale ranging from 0 to 1 or an uint8 array.
+
+    compress_level, fsync:
+        See encode_png and write_file.
+    """
+    write_file(file_name, encode_png(img, compress_level=compress_level), fsync=fsync)
+
+
+class ImageWriter:
+    """
+    An asynchronous stage of storing images.
+    Finished arrays are putting to a bounded queue, a pool of threads is taking them,
+    compressing to PNG and writing to files. zlib releases the GIL while compressing,
+    so storing images runs in parallel with generating the next ones.
+    """
+
+    def __init__(self,
+                 workers=None,
+                 queue_size=None,
+                 compress_level=WRITER_DEFAULT_COMPRESS_LEVEL,
+                 fsync='none'):
+        """
+        Parameters
+        ----------
+        workers: int    Default: None
+            A count of threads of a pool. A count of CPU is using if it is None.
+
+        queue_size: int    Default: None
+            A maximum count of waiting images. Submitting blocks if the queue is full.
+            Twice count of workers is using if it is None.
+
+        compress_level: int     Default: 6
+            A zlib compression level from 0 (no compression) to 9 (best compression).
+
+        fsync: str     Default: none
+            A policy of flushing data to a storage, see write_file.
+        """
+        if fsync not in WRITER_FSYNC_POLICIES:
+            raise Exception("unknown fsync policy '{}', supported are {}".format(fsync, WRITER_FSYNC_POLICIES))
+
+        self.workers = workers or os.cpu_count() or 1
+        self.compress_level = compress_level
+        self.fsync = fsync
+        self.queue = queue.Queue(maxsize=queue_size or 2 * self.workers)
+        self.written = 0
+        self.errors = []
+        self.lock = threading.Lock()
+
+        self.threads = [threading.Thread(target=self.__run, daemon=True) for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def __run(self):
+        """
+        A loop of a thread of a pool: take a task, store it and take the next one till getting a stop marker.
+        """
+        while True:
+            task = self.queue.get()
+            if task is None:
+                self.queue.task_done()
+                return
+
+            file_name, img = task
+            try:
+                self.store(file_name, img)
+
+                with self.lock:
+                    self.written += 1
+            except Exception as e:
+                with self.lock:
+                    self.errors.append((file_name, e))
+            finally:
+                self.queue.task_done()
+
+    def store(self, file_name, img):
+        """
+        Compressing and writing one image. It is executing by threads of a pool.
+
+        Parameters
+        ----------
+        file_name: str
+            A name of a result file.
+
+        img: ndarray
+            An image array.
+        """
+        write_image(file_name, img, compress_level=self.compress_level, fsync=self.fsync)
+
+    def submit(self, file_name, img):
+        """
+        Putting an image to the queue of storing. It blocks while the queue is full.
+
+        Parameters
+        ----------
+        file_name: str
+            A name of a result file.
+
+        img: ndarray
+            An image array. An array shouldn't be changed after submitting.
+        """
+        if not self.threads:
+            raise Exception("writer is closed")
+
+        self.queue.put((file_name, img))
+
+    def join(self):
+        """
+        Waiting while all of the submitted images are stored.
+
+        Raises
+        ------
+        An exception describing failed images.
+        """
+        self.queue.join()
+
+        self.check()
+
+    def check(self):
+        """
+        Raises
+        ------
+        An exception describing failed images if any of them failed.
+        """
+        with self.lock:
+            errors, self.errors = self.errors, []
+
+        if errors:
+            raise Exception("failed to store {} images: {}".format(
+                len(errors), "; ".join("'{}': {}".format(file_name, e) for file_name, e in errors[:10])))
+
+    def close(self):
+        """
+        Waiting all of the submitted images and stopping threads of a pool.
+
+        Raises
+        ------
+        An exception describing failed images.
+        """
+        if not self.threads:
+            return
+
+        for _ in self.threads:
+            self.queue.put(None)
+
+        for thread in self.threads:
+            thread.join()
+
+        self.threads = []
+
+        self.check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import shutil
+import imageio
+import numpy as np
+
+if __name__.find('.')<0:
+    import writer
+else:
+    from . import writer
+
+
+class TestImageWriter(unittest.TestCase):
+    test_dir = "test-data/writer"
+
+    def clear_dir(self):
+        shutil.rmtree(TestImageWriter.test_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.clear_dir()
+        os.makedirs(TestImageWriter.test_dir)
+
+    def tearDown(self):
+        self.clear_dir()
+
+    def test_to_uint8(self):
+        exist = writer.to_uint8(np.array([0., .5, .999, 1.], dtype=np.float32))
+
+        self.assertEqual(exist.tolist(), [0, 127, 254, 255])
+
+    def test_write(self):
+        imgs = [np.random.rand(28, 40 + i).astype(np.float32) for i in range(10)]
+
+        for fsync in writer.WRITER_FSYNC_POLICIES:
+            file_names = [os.path.join(TestImageWriter.test_dir, "{}_{}.png".format(fsync, i))
+                          for i in range(len(imgs))]
+
+            with writer.ImageWriter(workers=3, queue_size=2, compress_level=1, fsync=fsync) as image_writer:
+                for file_name, img in zip(file_names, imgs):
+                    image_writer.submit(file_name, img)
+
+            self.assertEqual(image_writer.written, len(imgs))
+
+            for file_name, img in zip(file_names, imgs):
+                self.assertTrue(np.array_equal(imageio.imread(file_name), writer.to_uint8(img)))
+
+        self.assertEqual(sorted(os.listdir(TestImageWriter.test_dir)),
+                         sorted("{}_{}.png".format(fsync, i)
+                                for fsync in writer.WRITER_FSYNC_POLICIES for i in range(len(imgs))))
+
+    def test_write_fail(self):
+        image_writer = writer.ImageWriter(workers=2)
+        image_writer.submit(os.path.join(TestImageWriter.test_dir, "unknown", "a.png"), np.zeros((2, 2)))
+
+        with self.assertRaises(Exception):
+            image_writer.close()
+
+        with self.assertRaises(Exception):
+            writer.ImageWriter(fsync="always")
+        # an error of creating a file is not replaced by an error of removing a temporary file
+        with self.assertRaises(FileNotFoundError) as ctx:
+            writer.write_stream(os.path.join(TestImageWriter.test_dir, "unknown", "a.bin"), [b'data'])
+        self.assertIn("unknown", str(ctx.exception))
+        self.assertEqual(os.listdir(TestImageWriter.test_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()